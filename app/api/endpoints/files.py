@@ -4,18 +4,51 @@ This module provides FastAPI endpoints for retrieving CIF files,
 including latest versions, specific versions, and files after a given date.
 """
 
+import os
 from datetime import datetime as dt
 
 from fastapi import APIRouter
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import FileResponse, PlainTextResponse, Response
 
 from app.log import log as log
+from app.config import FILE_ACCEL_REDIRECT
+from app.database.store import get_blob_store
 from app.api.dependencies import FileServiceDep, IDCheckDep, ProteinServiceDep
 from app.api.exceptions import FileNotFound, FileVersionNotFound, NoFilesAfterDate
 
 router = APIRouter()
 
 
+def get_file_response(file: bytes | memoryview | str, filename: str) -> Response:
+    """Creates response sending file content or content kept on disk.
+
+    Content on disk is sent without being read into memory, either by the
+    server from the file or, with FILE_ACCEL_REDIRECT set and a file store
+    configured, by a fronting nginx from its internal location mapped to the
+    file store.
+
+    Args:
+        file: The file content, a slice of a memory mapped pack or a path in
+            the file store.
+        filename: Name of the file offered to the client.
+
+    Returns:
+        The response.
+    """
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+    if isinstance(file, (bytes, memoryview)):
+        return PlainTextResponse(file, headers=headers)
+
+    blob_store = get_blob_store()
+    if FILE_ACCEL_REDIRECT and blob_store is not None:
+        key = os.path.relpath(file, blob_store.root)
+        headers["X-Accel-Redirect"] = f"{FILE_ACCEL_REDIRECT.rstrip('/')}/{key}"
+        return Response(headers=headers, media_type="text/plain")
+
+    return FileResponse(file, headers=headers, media_type="text/plain")
+
+
 @router.get("/ping")
 async def ping() -> None:
     """Endpoint to test connection."""
@@ -35,17 +68,13 @@ async def get_latest_cif(file_service: FileServiceDep, protein_id: IDCheckDep):
         protein_id: Protein ID to check.
     """
     log.info(f"Received request for latest cif file with id {protein_id}")
-    file = file_service.get_latest_by_protein_id(protein_id=protein_id)
+    file = file_service.get_latest_by_protein_id(protein_id=protein_id, as_path=True)
 
     if not file:
         log.error(f"File with id {protein_id} not found.")
         raise FileNotFound(protein_id)
 
-    headers = {
-        "Content-Disposition": f'attachment; filename="pdb_mirror_{protein_id}.cif"'
-    }
-
-    return PlainTextResponse(file, headers=headers)
+    return get_file_response(file, f"pdb_mirror_{protein_id}.cif")
 
 
 @router.get(
@@ -65,18 +94,14 @@ async def get_cif_at_version(
     """
     log.info(f"Received request for cif file with id {protein_id} at version {version}")
     file = file_service.get_by_version_and_protein_id(
-        protein_id=protein_id, version=version
+        protein_id=protein_id, version=version, as_path=True
     )
 
     if not file:
         log.error(f"File for id {protein_id} at version {version} not found.")
         raise FileVersionNotFound(protein_id=protein_id, version=version)
 
-    headers = {
-        "Content-Disposition": f'attachment; filename="pdb_mirror_{protein_id}_v{version}.cif"'
-    }
-
-    return PlainTextResponse(file, headers=headers)
+    return get_file_response(file, f"pdb_mirror_{protein_id}_v{version}.cif")
 
 
 @router.get(
@@ -97,16 +122,14 @@ async def get_latest_cif_prior(
     log.info(
         f"Received request for latest cif file with id {protein_id} prior to {date}"
     )
-    file = file_service.get_latest_by_id_before_date(protein_id=protein_id, date=date)
+    file = file_service.get_latest_by_id_before_date(
+        protein_id=protein_id, date=date, as_path=True
+    )
 
     if not file:
         raise FileNotFound(protein_id=protein_id)
 
-    headers = {
-        "Content-Disposition": f'attachment; filename="pdb_mirror_{protein_id}_{date}.cif"'
-    }
-
-    return PlainTextResponse(file, headers=headers)
+    return get_file_response(file, f"pdb_mirror_{protein_id}_{date}.cif")
 
 
 @router.get(
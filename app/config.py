@@ -16,16 +16,89 @@ API_PATH = "/api/v1"
 
 # PDB API endpoints and settings
 PDB_DATA_API_URL = "https://data.rcsb.org/graphql"
+PDB_DATA_API_BATCH_SIZE = 300  # Maximum number of entries per GraphQL query
 PDB_SEARCH_API_URL = "https://search.rcsb.org/rcsbsearch/v2/query"
 PDB_SEARCH_API_LIMIT = 1000  # Maximum number of results per search query
 PDB_FTP_STATUS_URL = "https://files.rcsb.org/pub/pdb/data/status/"
+PDB_HOLDINGS_URL = (  # All current entries with their last modification date
+    "https://files.wwpdb.org/pub/pdb/holdings/"
+    "released_structures_last_modified_dates.json.gz"
+)
 
 # HTTP settings
-PDB_HTTP_TIMEOUT = 5  # Seconds
+PDB_HTTP_TIMEOUT = 5  # Seconds, connect timeout
+PDB_HTTP_READ_TIMEOUT = 60  # Seconds, maximum wait for response data
+PDB_HTTP_HOST_LIMIT = 20  # Maximum number of concurrent connections per host
+PDB_HTTP_RETRIES = 5  # Repeats of requests failing with transient errors
+PDB_HTTP_BACKOFF_BASE = 0.5  # Seconds, backoff before first retry
+PDB_HTTP_BACKOFF_MAX = 30  # Seconds, upper bound of backoff between retries
+PDB_HTTP_BREAKER_THRESHOLD = 20  # Consecutive failures opening circuit of a host
+PDB_HTTP_BREAKER_RESET = 60  # Seconds before open circuit lets a trial request in
+
+# Outbound limits per upstream, lowered automatically when upstream throttles.
+# rate: maximum requests per second, concurrency: maximum concurrent requests
+PDB_RATE_LIMITS = {
+    "search": {"rate": 2, "concurrency": 2},
+    "graphql": {"rate": 10, "concurrency": 10},
+    "files": {"rate": 200, "concurrency": PDB_HTTP_HOST_LIMIT},
+}
 PDB_HTTP_FILE_URL = (
     "https://files-versioned.wwpdb.org/pdb_versioned/views/all/coordinates/mmcif/"
 )
 
+# File storage, "database" keeps file contents in Postgres, "filesystem" keeps
+# them on disk addressed by SHA-256 with only hashes in Postgres, "pack" appends
+# them to pack files per category
+FILE_STORE = "database"
+FILE_STORE_PATH = "/store"  # Directory of the filesystem or pack store
+PACK_MAX_SIZE = 1073741824  # Bytes (1 GiB) after which a new pack file is started
+FILE_STORE_BATCH_SIZE = 500  # Files moved at once from Postgres to the file store
+FILE_ACCEL_REDIRECT = None  # nginx internal location of the file store, e.g. "/store/"
+FILE_DELTAS = False  # Sync worker keeps older versions as deltas against newer ones
+DELTA_INTERVAL = 24  # Hours between runs of the older version delta job
+DELTA_BATCH_SIZE = 200  # Older versions encoded as deltas at once
+DELTA_MAX_RATIO = 0.5  # Deltas larger than this share of gzipped content are discarded
+DELTA_CACHE_SIZE = 67108864  # Bytes (64 MiB) of reconstructed files cached per process
+
 # Application settings
 WORKER_LIMIT = 100  # Maximum number of concurrent workers
+PDB_LOAD_QUEUE_SIZE = 1  # Maximum number of batches buffered between load stages
+PDB_LOAD_PROGRESS_INTERVAL = 60  # Seconds between combined progress reports
+PDB_INSERT_BUFFER_SIZE = 67108864  # Bytes (64 MiB) of downloaded files stored at once
+PDB_INSERT_BUFFER_DOWNLOADS = 40  # Files streamed into the insert buffer at once
+PDB_LOCAL_BATCH_SIZE = 200  # Files read and stored at once when importing a local tree
+WATCH_BATCH_DELAY = 2  # Seconds a watched new file waits for others to be stored with
+WATCH_SCAN_INTERVAL = 3600  # Seconds between full scans of the watched tree
 CRON_JOB_DAY = 3  # 0-6 (Mon - Sun)
+PDB_SYNC_BATCH_SIZE = 1000  # Maximum number of entries stored at once by weekly jobs
+PDB_SYNC_MAX_WEEKS = 52  # Maximum number of missed weeks caught up by weekly jobs
+PDB_INGEST_QUEUE = (
+    False  # Weekly jobs queue entries for ingest workers instead of fetching
+)
+PDB_INGEST_BATCH_SIZE = 200  # Maximum number of tasks claimed from ingest queue at once
+PDB_INGEST_WORKERS = 4  # Concurrently processed batches per ingest worker process
+PDB_INGEST_LEASE = 600  # Seconds a claimed task is reserved for its worker
+PDB_INGEST_ATTEMPTS = 5  # Attempts before a queued task is recorded as failed fetch
+PDB_INGEST_BACKOFF = (
+    60  # Seconds before a failed task is claimed again, doubled each time
+)
+PDB_INGEST_BACKOFF_MAX = 3600  # Seconds, upper bound of backoff between task attempts
+FAILED_RETRY_INTERVAL = 6  # Hours between runs of the failed fetch retry job
+FAILED_RETRY_BATCH_SIZE = 500  # Maximum number of failed fetches retried at once
+FAILED_RETRY_ATTEMPTS = (
+    10  # Retries after which a failed fetch is left for manual check
+)
+FAILED_RETRY_BACKOFF = 3600  # Seconds before second retry, doubled with each failure
+FAILED_RETRY_BACKOFF_MAX = 604800  # Seconds, upper bound of backoff between retries
+FAILED_RETRY_LEASE = 3600  # Seconds a failed fetch claimed by the retry job is reserved
+RECONCILE_CRON_DAY = 6  # 0-6 (Mon - Sun), day of the weekly holdings reconciliation
+RECONCILE_MAX_OBSOLETE = (
+    0.01  # Maximum share of holdings deprecated by one reconciliation
+)
+BACKFILL_INTERVAL = 24  # Hours between historical version backfills of sync worker
+BACKFILL_BATCH_SIZE = 300  # Entries whose missing versions are resolved at once
+BACKFILL_RATE_DIVISOR = 4  # Backfill uses 1/N of upstream limits, rest is left to syncs
+BACKFILL_PAUSE = 60  # Seconds backfill waits before checking again for running syncs
+SCHEDULER_LOCK_ID = 12347  # Advisory lock held by the sync worker running the jobs
+SYNC_LOCK_ID = 12348  # Advisory lock shared by running weekly syncs of all processes
+SCHEDULER_LEADER_INTERVAL = 30  # Seconds between leadership checks of sync workers
@@ -0,0 +1,118 @@
+"""PostgreSQL binary COPY support module.
+
+This module provides a lazily encoded binary COPY stream and a helper for loading
+rows into a table with `COPY ... FROM STDIN`. Rows are encoded straight into the
+PostgreSQL wire format, so large blobs skip SQL parameter rendering entirely.
+"""
+
+import struct
+from collections.abc import Iterable
+from datetime import datetime
+
+from sqlmodel import Session
+
+__all__ = ["CopyStream", "copy_rows"]
+
+# Binary COPY file header: signature, flags and header extension length.
+COPY_HEADER = b"PGCOPY\n\377\r\n\0" + struct.pack("!ii", 0, 0)
+COPY_TRAILER = struct.pack("!h", -1)
+
+# Start of PostgreSQL timestamp epoch.
+PG_EPOCH = datetime(2000, 1, 1)
+
+
+def encode_value(value) -> bytes:
+    """Encodes single value as binary COPY field including its length.
+
+    Args:
+        value: Value to encode. Supported types are None, bool, int (int4),
+            str, bytes-like and naive datetime.
+
+    Returns:
+        Encoded field.
+
+    Raises:
+        TypeError: If value type is not supported.
+    """
+    if value is None:
+        return struct.pack("!i", -1)
+    if isinstance(value, bool):
+        data = b"\x01" if value else b"\x00"
+    elif isinstance(value, int):
+        data = struct.pack("!i", value)
+    elif isinstance(value, str):
+        data = value.encode()
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data = value
+    elif isinstance(value, datetime):
+        delta = value - PG_EPOCH
+        micros = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+        data = struct.pack("!q", micros)
+    else:
+        raise TypeError(f"Unsupported COPY value type: {type(value)}")
+
+    return struct.pack("!i", len(data)) + bytes(data)
+
+
+class CopyStream:
+    """File-like object producing binary COPY data from rows on demand.
+
+    Only the rows needed to fill the requested read size are encoded, so the
+    whole payload never has to be built in memory at once.
+
+    Args:
+        rows: Iterable of row tuples, all of the same length.
+    """
+
+    def __init__(self, rows: Iterable[tuple]):
+        self._rows = iter(rows)
+        self._buffer = bytearray(COPY_HEADER)
+        self._finished = False
+
+    def _encode_row(self, row: tuple) -> bytes:
+        """Encodes single row as binary COPY tuple."""
+        return struct.pack("!h", len(row)) + b"".join(encode_value(v) for v in row)
+
+    def read(self, size: int = -1) -> bytes:
+        """Reads up to given number of bytes of the stream.
+
+        Args:
+            size: Maximum number of bytes to return, -1 for everything.
+
+        Returns:
+            Next chunk of the stream, empty bytes at the end.
+        """
+        while not self._finished and (size < 0 or len(self._buffer) < size):
+            row = next(self._rows, None)
+            if row is None:
+                self._buffer += COPY_TRAILER
+                self._finished = True
+            else:
+                self._buffer += self._encode_row(row)
+
+        if size < 0:
+            size = len(self._buffer)
+
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+
+        return chunk
+
+
+def copy_rows(db: Session, table: str, columns: list[str], rows: Iterable[tuple]):
+    """Loads rows into a table using binary COPY within current transaction.
+
+    Args:
+        db: The database session.
+        table: Name of the target table.
+        columns: Names of the columns in order of row values.
+        rows: Iterable of row tuples.
+    """
+    column_list = ", ".join(columns)
+    statement = f"COPY {table} ({column_list}) FROM STDIN WITH (FORMAT binary)"
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(statement, CopyStream(rows))
+    finally:
+        cursor.close()
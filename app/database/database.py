@@ -9,16 +9,30 @@ from collections.abc import Generator
 from os import environ, getpid
 from time import sleep
 
+from sqlalchemy import Connection
 from sqlmodel import Session, create_engine, SQLModel, text, inspect
 from pydantic_core import MultiHostUrl
 
 from app.config import DB_USER, DB_PASSWORD, DB_HOST, DB_NAME, DB_PORT
-from app.database.repositories import OperationFlagRepository
+from app.database.repositories import (
+    FailedFetchRepository,
+    FileRepository,
+    IngestTaskRepository,
+    OperationFlagRepository,
+    ProteinRepository,
+)
 
 
 from app.log import log as log
 
-__all__ = ["get_session", "db_context", "create_db_and_tables"]
+__all__ = [
+    "get_session",
+    "db_context",
+    "create_db_and_tables",
+    "leader_lock",
+    "shared_lock",
+    "is_lock_shared",
+]
 
 DATABASE_URL = str(
     MultiHostUrl.build(
@@ -48,12 +62,55 @@ def get_session() -> Generator[Session, None, None]:
 
 db_context = contextmanager(get_session)
 
+
+@contextmanager
+def leader_lock(lock_id: int, interval: float) -> Generator[Connection, None, None]:
+    """Elects a single leader process by holding a session level advisory lock.
+
+    Blocks until the lock is acquired, standby processes retry periodically. The
+    lock is held on a dedicated connection while the context is open, so it is
+    released on exit and also when the leader dies or loses the connection. The
+    connection runs in autocommit mode, so polling doesn't keep a transaction
+    open for the whole life of the leader.
+
+    Args:
+        lock_id: ID of the advisory lock.
+        interval: Seconds between attempts to acquire the lock.
+
+    Returns:
+        A generator that yields the connection holding the lock.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        statement = text("SELECT pg_try_advisory_lock(:lock_id)")
+
+        while not connection.execute(statement, {"lock_id": lock_id}).scalar():
+            log.debug(f"Leader lock {lock_id} held by another process, waiting...")
+            sleep(interval)
+
+        log.info(f"Process {getpid()} acquired leader lock {lock_id}.")
+        try:
+            yield connection
+        finally:
+            try:
+                unlock = text("SELECT pg_advisory_unlock(:lock_id)")
+                connection.execute(unlock, {"lock_id": lock_id})
+            except Exception as e:
+                log.error(f"Failed to release leader lock {lock_id}: {e}")
+
+
 REQUIRED_TABLES = [
     "change",
     "failedfetch",
     "file",
+    "filecontent",
+    "filedelta",
+    "ingesttask",
+    "loadentry",
+    "loadpage",
+    "loadrun",
     "operationflag",
     "protein",
+    "syncstate",
 ]
 
 
@@ -72,6 +129,53 @@ def check_if_tables_exist():
     return True
 
 
+@contextmanager
+def shared_lock(lock_id: int) -> Generator[Connection, None, None]:
+    """Holds a session level advisory lock in shared mode.
+
+    Any number of processes may hold the lock at once, while others can check
+    with `is_lock_shared` whether some of them is running.
+
+    Args:
+        lock_id: ID of the advisory lock.
+
+    Returns:
+        A generator that yields the connection holding the lock.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(
+            text("SELECT pg_advisory_lock_shared(:lock_id)"), {"lock_id": lock_id}
+        )
+        try:
+            yield connection
+        finally:
+            try:
+                unlock = text("SELECT pg_advisory_unlock_shared(:lock_id)")
+                connection.execute(unlock, {"lock_id": lock_id})
+            except Exception as e:
+                log.error(f"Failed to release shared lock {lock_id}: {e}")
+
+
+def is_lock_shared(lock_id: int) -> bool:
+    """Checks whether any process holds an advisory lock in shared mode.
+
+    Args:
+        lock_id: ID of the advisory lock.
+
+    Returns:
+        True if the lock is held by another session.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        statement = text("SELECT pg_try_advisory_lock(:lock_id)")
+        if not connection.execute(statement, {"lock_id": lock_id}).scalar():
+            return True
+
+        unlock = text("SELECT pg_advisory_unlock(:lock_id)")
+        connection.execute(unlock, {"lock_id": lock_id})
+
+        return False
+
+
 def create_db_and_tables():
     """Creates all database tables defined in SQLModel models."""
     log.debug("Creating database and tables.")
@@ -83,8 +187,10 @@ def init_flag_data():
     """Initializes flag data in the database.
 
     This function inserts initial data into tables that store flag-like data
-    (method, category, source). It uses a database lock to ensure only one
-    process can perform the initialization at a time.
+    (method, category, source), enforces unique file versions and adds retry
+    columns of failed fetches and file store columns in databases created before
+    they existed. It uses a database lock to ensure
+    only one process can perform the initialization at a time.
 
     The function will wait if another process is already initializing the data.
     """
@@ -105,6 +211,12 @@ def init_flag_data():
 
                 if operation_repo.init_table():
                     log.debug("Flag data inserted successfully.")
+
+                FileRepository(db).ensure_unique_versions()
+                FileRepository(db).ensure_store_columns()
+                FailedFetchRepository(db).ensure_retry_columns()
+                IngestTaskRepository(db).ensure_backoff_column()
+                ProteinRepository(db).ensure_checked_column()
             else:
                 # Another worker is already inseting data, wait for completion.
                 log.debug(
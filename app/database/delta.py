@@ -0,0 +1,268 @@
+"""Delta encoding module for older file versions.
+
+This module provides a line based binary delta of decompressed mmCIF contents and
+a cache of reconstructed files. Successive versions of an entry usually differ
+only in a few metadata lines, so an older version can be kept as a small delta
+against the next one and rebuilt on demand when it is requested.
+
+Gzip deltas also record the original gzip header and the deflate parameters
+reproducing the original compressed stream, so rebuilt files are byte-identical
+to the downloaded ones. Files whose stream can't be reproduced aren't encoded.
+"""
+
+import gzip
+import struct
+import zlib
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from threading import Lock
+
+from app.config import DELTA_CACHE_SIZE
+
+__all__ = [
+    "ReconstructionCache",
+    "apply_delta",
+    "apply_gzip_delta",
+    "encode_delta",
+    "encode_gzip_delta",
+    "reconstructions",
+]
+
+# Delta operations: copy a range of base lines, insert literal bytes.
+COPY = struct.Struct("!BII")
+INSERT = struct.Struct("!BI")
+OP_COPY = 0
+OP_INSERT = 1
+
+# Gzip delta prefix: deflate level, memory level and length of the gzip header.
+GZIP_PARAMETERS = struct.Struct("!BBH")
+# Deflate (level, memory level) combinations tried, most common first.
+DEFLATE_PARAMETERS = [(6, 8), (9, 8)] + [
+    (level, mem_level)
+    for mem_level in (8, 9)
+    for level in range(10)
+    if (level, mem_level) not in ((6, 8), (9, 8))
+]
+# Bytes compressed at once while comparing with the original stream.
+COMPARE_CHUNK = 65536
+
+
+def encode_delta(base: bytes, target: bytes) -> bytes:
+    """Returns compressed delta rebuilding target content from base content.
+
+    Args:
+        base: Decompressed content of the newer version.
+        target: Decompressed content of the version to encode.
+
+    Returns:
+        The delta.
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    matcher = SequenceMatcher(None, base_lines, target_lines)
+
+    ops = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(COPY.pack(OP_COPY, i1, i2 - i1))
+        elif j2 > j1:
+            data = b"".join(target_lines[j1:j2])
+            ops.append(INSERT.pack(OP_INSERT, len(data)) + data)
+
+    return zlib.compress(b"".join(ops), 9)
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    """Rebuilds content from base content and a delta.
+
+    Args:
+        base: Decompressed content of the newer version.
+        delta: Delta created by `encode_delta`.
+
+    Returns:
+        The decompressed content of the encoded version.
+
+    Raises:
+        ValueError: If the delta is malformed.
+    """
+    base_lines = base.splitlines(keepends=True)
+    ops = zlib.decompress(delta)
+
+    parts, offset = [], 0
+    while offset < len(ops):
+        if ops[offset] == OP_COPY:
+            _, start, count = COPY.unpack_from(ops, offset)
+            parts.extend(base_lines[start : start + count])
+            offset += COPY.size
+        elif ops[offset] == OP_INSERT:
+            _, length = INSERT.unpack_from(ops, offset)
+            offset += INSERT.size
+            parts.append(ops[offset : offset + length])
+            offset += length
+        else:
+            raise ValueError(f"Unknown delta operation: {ops[offset]}")
+
+    return b"".join(parts)
+
+
+def get_gzip_header_size(data: bytes) -> int:
+    """Returns size of the header of a single member gzip file.
+
+    Args:
+        data: The gzipped content.
+
+    Returns:
+        Number of bytes preceding the deflate stream.
+
+    Raises:
+        ValueError: If the data doesn't start with a gzip header.
+    """
+    if data[:3] != b"\x1f\x8b\x08":
+        raise ValueError("Not a gzip file")
+
+    flags, offset = data[3], 10
+    if flags & 0x04:  # FEXTRA
+        offset += 2 + int.from_bytes(data[offset : offset + 2], "little")
+    for flag in (0x08, 0x10):  # FNAME, FCOMMENT
+        if flags & flag:
+            offset = data.index(b"\0", offset) + 1
+    if flags & 0x02:  # FHCRC
+        offset += 2
+
+    return offset
+
+
+def compress_raw(content: bytes, level: int, mem_level: int) -> bytes:
+    """Returns raw deflate stream of content."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, mem_level)
+    return compressor.compress(content) + compressor.flush()
+
+
+def find_deflate_parameters(content: bytes, stream: bytes) -> tuple[int, int] | None:
+    """Finds deflate parameters which reproduce given stream exactly.
+
+    Candidates are compressed in chunks and dropped at the first differing
+    byte, so most of them stop early.
+
+    Args:
+        content: The decompressed content.
+        stream: The original raw deflate stream.
+
+    Returns:
+        Tuple of deflate level and memory level, None if none reproduces it.
+    """
+    for level, mem_level in DEFLATE_PARAMETERS:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, mem_level)
+        size, matches = 0, True
+
+        for start in range(0, len(content), COMPARE_CHUNK):
+            output = compressor.compress(content[start : start + COMPARE_CHUNK])
+            if output != stream[size : size + len(output)]:
+                matches = False
+                break
+            size += len(output)
+
+        if matches and compressor.flush() == stream[size:]:
+            return level, mem_level
+
+    return None
+
+
+def encode_gzip_delta(base: bytes, target: bytes) -> bytes | None:
+    """Returns delta rebuilding gzipped target byte by byte from gzipped base.
+
+    Args:
+        base: Gzipped content of the newer version.
+        target: Gzipped content of the version to encode.
+
+    Returns:
+        The delta, None if the compressed stream of target can't be reproduced.
+
+    Raises:
+        ValueError: If either content is not valid gzip.
+    """
+    header_size = get_gzip_header_size(target)
+    content = gzip.decompress(target)
+    parameters = find_deflate_parameters(content, target[header_size:-8])
+    if parameters is None:
+        return None
+
+    prefix = GZIP_PARAMETERS.pack(*parameters, header_size) + target[:header_size]
+
+    return prefix + encode_delta(gzip.decompress(base), content)
+
+
+def apply_gzip_delta(base: bytes, delta: bytes) -> bytes:
+    """Rebuilds gzipped content from gzipped base content and a gzip delta.
+
+    Args:
+        base: Gzipped content of the newer version.
+        delta: Delta created by `encode_gzip_delta`.
+
+    Returns:
+        The gzipped content of the encoded version, identical to the original.
+    """
+    level, mem_level, header_size = GZIP_PARAMETERS.unpack_from(delta)
+    offset = GZIP_PARAMETERS.size
+    header = delta[offset : offset + header_size]
+
+    content = apply_delta(gzip.decompress(base), delta[offset + header_size :])
+    trailer = struct.pack("<II", zlib.crc32(content), len(content) & 0xFFFFFFFF)
+
+    return header + compress_raw(content, level, mem_level) + trailer
+
+
+class ReconstructionCache:
+    """Least recently used cache of reconstructed files bounded by size.
+
+    Args:
+        max_bytes: Maximum total size of cached contents.
+    """
+
+    def __init__(self, max_bytes: int = DELTA_CACHE_SIZE):
+        self.max_bytes = max_bytes
+        self._items: OrderedDict[int, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+    def get(self, file_id: int) -> bytes | None:
+        """Returns cached content of a file.
+
+        Args:
+            file_id: ID of the file.
+
+        Returns:
+            The content, None if it is not cached.
+        """
+        with self._lock:
+            data = self._items.get(file_id)
+            if data is not None:
+                self._items.move_to_end(file_id)
+
+            return data
+
+    def put(self, file_id: int, data: bytes) -> None:
+        """Caches content of a file, evicting least recently used contents.
+
+        Args:
+            file_id: ID of the file.
+            data: The content.
+        """
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._items.pop(file_id, None)
+            if previous is not None:
+                self._size -= len(previous)
+
+            self._items[file_id] = data
+            self._size += len(data)
+
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+
+# Reconstructions shared by all requests of the process.
+reconstructions = ReconstructionCache()
@@ -1,5 +1,7 @@
 from app.database.models.protein import Protein, Padding
 from app.database.models.file import FileBase, File, FileInsert
+from app.database.models.content import FileContent
+from app.database.models.delta import FileDelta
 from app.database.models.failed import FailedFetch
 from app.database.models.change import Change, ChangeInsert
 from app.database.models.operation_flag import (
@@ -7,3 +9,6 @@ from app.database.models.operation_flag import (
     Operations,
     OPERATIONS_NAMES,
 )
+from app.database.models.load_run import LoadRun, LoadPage, LoadEntry, EntryStatus
+from app.database.models.ingest_task import IngestTask, TaskState
+from app.database.models.sync_state import SyncState
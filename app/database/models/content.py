@@ -0,0 +1,20 @@
+"""Database models for deduplicated file contents.
+
+This module defines the SQLModel class for file contents kept in the database.
+Each distinct content is stored once, keyed by its SHA-256, and referenced by the
+hash of every file record having it.
+"""
+
+from sqlmodel import Field, SQLModel
+
+
+class FileContent(SQLModel, table=True):
+    """Database model for distinct file contents.
+
+    Args:
+        sha256: SHA-256 of the content, referenced by file records.
+        data: The binary content of the file.
+    """
+
+    sha256: str = Field(primary_key=True, max_length=64)
+    data: bytes = Field(nullable=False)
@@ -0,0 +1,24 @@
+"""Database models for older file versions kept as deltas.
+
+This module defines the SQLModel class for deltas of older file versions. Such a
+version is rebuilt on demand from the next version of the same protein.
+"""
+
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class FileDelta(SQLModel, table=True):
+    """Database model for an older file version encoded as delta.
+
+    Args:
+        file_id: The ID of the encoded file.
+        base_id: The ID of the next version the delta applies to.
+        data: The delta, None if it doesn't save space and the full content is
+            kept.
+    """
+
+    file_id: int = Field(foreign_key="file.id", primary_key=True)
+    base_id: int = Field(foreign_key="file.id", nullable=False)
+    data: Optional[bytes] = Field(default=None, nullable=True)
@@ -4,7 +4,7 @@ This module defines SQLModel classes for tracking failed fetch operations,
 including error details, timestamps, and relationships with proteins.
 """
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from datetime import datetime
 from sqlmodel import Field, Relationship, SQLModel
@@ -23,11 +23,15 @@ class FailedFetchBase(SQLModel):
         error: The error message describing the failure.
         fetch_date: The date and time when the fetch was attempted.
         fetch_version: The version number that was being fetched.
+        attempts: Number of retries which failed again.
+        next_attempt: When the fetch should be retried, None for right away.
     """
 
     error: str = Field(nullable=False)
     fetch_date: datetime = Field(nullable=False)
     fetch_version: int = Field(nullable=False)
+    attempts: int = Field(nullable=False, default=0)
+    next_attempt: Optional[datetime] = Field(default=None, nullable=True)
 
 
 class FailedFetch(FailedFetchBase, table=True):
@@ -4,9 +4,9 @@ This module defines SQLModel classes for protein file records, including
 base models, insert models, and relationships with proteins and changes.
 """
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
-from sqlmodel import Field, Relationship, SQLModel
+from sqlmodel import Field, Relationship, SQLModel, UniqueConstraint
 
 if TYPE_CHECKING:
     from app.database.models import Protein, Change
@@ -20,11 +20,16 @@ class FileBase(SQLModel):
 
     Args:
         version: The version number of the file.
-        file: The binary content of the file.
+        file: The binary content of files stored before deduplication, None if
+            it is kept in the file store or the file content table.
+        sha256: SHA-256 of the content, None for files stored before hashing.
     """
 
     version: int = Field(nullable=False)
-    file: bytes = Field(nullable=False)
+    file: Optional[bytes] = Field(default=None, nullable=True)
+    sha256: Optional[str] = Field(
+        default=None, max_length=64, nullable=True, index=True
+    )
 
 
 class FileInsert(FileBase):
@@ -43,7 +48,8 @@ class File(FileInsert, table=True):
     """Database model for protein file records.
 
     This model represents the file table in the database, including
-    relationships to proteins and changes.
+    relationships to proteins and changes. Each version of a protein is stored
+    at most once.
 
     Args:
         id: The unique identifier for the file.
@@ -51,6 +57,10 @@ class File(FileInsert, table=True):
         changes: List of changes associated with this file.
     """
 
+    __table_args__ = (
+        UniqueConstraint("protein_id", "version", name="file_protein_id_version_key"),
+    )
+
     id: int = Field(primary_key=True)
 
     protein: "Protein" = Relationship(back_populates="files")
@@ -0,0 +1,62 @@
+"""Database models for the distributed ingest work queue.
+
+This module defines SQLModel classes for the ingest queue, which holds entry
+versions waiting to be downloaded and stored. Workers on any node claim batches
+of tasks with time limited leases, so the work can be shared between pods.
+"""
+
+from enum import Enum
+from typing import Optional
+
+from datetime import datetime
+from sqlmodel import Field, Index, SQLModel, UniqueConstraint
+
+
+class TaskState(Enum):
+    """Enumeration of states of a queued task.
+
+    Attributes:
+        PENDING: Task waits to be claimed by a worker.
+        LEASED: Task is claimed by a worker until its lease expires.
+        FAILED: Task ran out of attempts and was recorded as failed fetch.
+    """
+
+    PENDING = 1
+    LEASED = 2
+    FAILED = 3
+
+
+class IngestTask(SQLModel, table=True):
+    """Database model for queued entry versions to ingest.
+
+    Stored tasks are removed from the queue, so it only holds outstanding work.
+
+    Args:
+        id: The unique identifier of the task.
+        protein_id: The ID of the protein to fetch.
+        version: The version to fetch.
+        operation_flag: The ID of the operation recorded for the stored file.
+        state: State of the task, see TaskState.
+        attempts: Number of times the task was claimed.
+        lease_until: When the current lease expires, None if not leased.
+        available_at: When a released task may be claimed again, None for right
+            away.
+        error: The error of the last failed attempt, if any.
+        created: When the task was queued.
+    """
+
+    __table_args__ = (
+        UniqueConstraint("protein_id", "version"),
+        Index("ix_ingesttask_state_lease_until", "state", "lease_until"),
+    )
+
+    id: int = Field(primary_key=True)
+    protein_id: str = Field(nullable=False)
+    version: int = Field(nullable=False)
+    operation_flag: int = Field(foreign_key="operationflag.id")
+    state: int = Field(nullable=False, default=TaskState.PENDING.value)
+    attempts: int = Field(nullable=False, default=0)
+    lease_until: Optional[datetime] = Field(default=None, nullable=True)
+    available_at: Optional[datetime] = Field(default=None, nullable=True)
+    error: Optional[str] = Field(default=None, nullable=True)
+    created: datetime = Field(nullable=False)
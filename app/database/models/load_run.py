@@ -0,0 +1,94 @@
+"""Database models for tracking progress of full loads.
+
+This module defines SQLModel classes for the full load ledger, which records
+each load run, its completed search pages and the status of every processed
+entry, so an interrupted load can be resumed where it stopped.
+"""
+
+from enum import Enum
+from typing import TYPE_CHECKING, List, Optional
+
+from datetime import datetime
+from sqlmodel import Field, Relationship, SQLModel, UniqueConstraint
+
+if TYPE_CHECKING:
+    from app.database.models import LoadPage, LoadEntry
+
+
+class EntryStatus(Enum):
+    """Enumeration of processing results of a single entry.
+
+    Attributes:
+        DONE: Entry was downloaded and stored.
+        FAILED: Entry failed and was recorded as failed fetch.
+    """
+
+    DONE = 1
+    FAILED = 2
+
+
+class LoadRun(SQLModel, table=True):
+    """Database model for full load runs.
+
+    Args:
+        id: The unique identifier of the run.
+        start: Search API index the run started from.
+        total: Total number of entries reported by Search API.
+        started: When the run was created.
+        finished: When the run processed all pages, None while unfinished.
+        pages: Completed search pages of this run.
+        entries: Processed entries of this run.
+    """
+
+    id: int = Field(primary_key=True)
+    start: int = Field(nullable=False, default=0)
+    total: int = Field(nullable=False)
+    started: datetime = Field(nullable=False)
+    finished: Optional[datetime] = Field(default=None, nullable=True)
+
+    pages: List["LoadPage"] = Relationship(back_populates="run")
+    entries: List["LoadEntry"] = Relationship(back_populates="run")
+
+
+class LoadPage(SQLModel, table=True):
+    """Database model for completed search pages of a load run.
+
+    Args:
+        id: The unique identifier of the page record.
+        run_id: The run this page belongs to.
+        start: Search API index of the page.
+        processed: Number of entries processed on the page.
+        failed: Number of entries which failed on the page.
+        completed: When the page was completed.
+        run: The run this page belongs to.
+    """
+
+    __table_args__ = (UniqueConstraint("run_id", "start"),)
+
+    id: int = Field(primary_key=True)
+    run_id: int = Field(foreign_key="loadrun.id", index=True)
+    start: int = Field(nullable=False)
+    processed: int = Field(nullable=False)
+    failed: int = Field(nullable=False)
+    completed: datetime = Field(nullable=False)
+
+    run: "LoadRun" = Relationship(back_populates="pages")
+
+
+class LoadEntry(SQLModel, table=True):
+    """Database model for processing status of entries in a load run.
+
+    Args:
+        run_id: The run the entry was processed in.
+        protein_id: The ID of the processed protein.
+        version: The version which was fetched, if resolved.
+        status: Processing result, see EntryStatus.
+        run: The run the entry was processed in.
+    """
+
+    run_id: int = Field(foreign_key="loadrun.id", primary_key=True)
+    protein_id: str = Field(primary_key=True)
+    version: Optional[int] = Field(default=None, nullable=True)
+    status: int = Field(nullable=False)
+
+    run: "LoadRun" = Relationship(back_populates="entries")
@@ -4,7 +4,8 @@ This module defines SQLModel classes for protein records, including
 base models, relationships, and pagination parameters.
 """
 
-from typing import TYPE_CHECKING, List
+from datetime import datetime
+from typing import TYPE_CHECKING, List, Optional
 
 from sqlmodel import Field, SQLModel, Relationship
 
@@ -37,8 +38,11 @@ class Protein(ProteinBase, table=True):
         files: List of files associated with this protein.
         failed: List of failed fetch attempts for this protein.
         changes: List of changes associated with this protein.
+        checked: Upstream modification time up to which the entry was confirmed
+            current without a new version, e.g. after minor revisions.
     """
 
+    checked: Optional[datetime] = Field(default=None, nullable=True)
     files: List["File"] = Relationship(back_populates="protein")
     failed: List["FailedFetch"] = Relationship(back_populates="protein")
     changes: List["Change"] = Relationship(back_populates="protein")
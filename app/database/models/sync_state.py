@@ -0,0 +1,22 @@
+"""Database models for the weekly synchronization state.
+
+This module defines SQLModel classes for tracking which weekly update lists were
+already processed, so missed weeks can be caught up later.
+"""
+
+from datetime import datetime
+from sqlmodel import Field, SQLModel
+
+
+class SyncState(SQLModel, table=True):
+    """Database model for the last processed weekly update list of an operation.
+
+    Args:
+        operation_flag: The ID of the operation whose lists are processed.
+        last_date: Date of the last processed list in YYYYMMDD format.
+        updated: When the state was last changed.
+    """
+
+    operation_flag: int = Field(foreign_key="operationflag.id", primary_key=True)
+    last_date: str = Field(nullable=False, max_length=8)
+    updated: datetime = Field(nullable=False)
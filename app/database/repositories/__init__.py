@@ -3,3 +3,6 @@ from app.database.repositories.protein import ProteinRepository
 from app.database.repositories.failed import FailedFetchRepository
 from app.database.repositories.change import ChangeRepository
 from app.database.repositories.operation_flag import OperationFlagRepository
+from app.database.repositories.load_run import LoadRunRepository
+from app.database.repositories.ingest_task import IngestTaskRepository
+from app.database.repositories.sync_state import SyncStateRepository
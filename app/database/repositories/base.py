@@ -19,3 +19,7 @@ class RepositoryBase:
 
     def __init__(self, db: Session):
         self.db = db
+
+    def commit(self):
+        """Commits current transaction of the session."""
+        self.db.commit()
@@ -5,7 +5,7 @@ failed fetch attempts, including tracking and retrieval of failed operations.
 """
 
 from datetime import datetime
-from sqlmodel import select
+from sqlmodel import select, text
 
 from app.log import log as log
 from app.database.repositories.base import RepositoryBase
@@ -30,13 +30,16 @@ class FailedFetchRepository(RepositoryBase):
 
         return files
 
-    def insert_new_failed_fetch(self, protein_id: str, version: int, error: str):
+    def insert_new_failed_fetch(
+        self, protein_id: str, version: int, error: str, operation_flag: int
+    ):
         """Inserts a new failed fetch record.
 
         Args:
             protein_id: The ID of the protein that failed to fetch.
             version: The version number that failed to fetch.
             error: The error message describing the failure.
+            operation_flag: The ID of the operation that failed.
 
         Returns:
             True if insertion was successful, False otherwise.
@@ -45,6 +48,7 @@ class FailedFetchRepository(RepositoryBase):
             new_file = FailedFetch(
                 fetch_date=datetime.now(),
                 fetch_version=version,
+                operation_flag=operation_flag,
                 protein_id=protein_id,
                 error=error,
             )
@@ -58,3 +62,151 @@ class FailedFetchRepository(RepositoryBase):
             self.db.rollback()
             log.error(f"Failed to insert new failed fetch data. Error {str(e)}")
             return False
+
+    def insert_in_bulk(
+        self,
+        protein_ids: list[str],
+        versions: list[int | None],
+        errors: list[str],
+        operation_flag: int,
+    ):
+        """Inserts multiple failed fetch records in a single statement.
+
+        Missing proteins are created in the same statement. Unknown versions
+        default to the one following the latest stored version of the protein.
+        Versions which already have a failed fetch record are skipped, so their
+        retry schedule is kept.
+
+        Args:
+            protein_ids: IDs of the proteins that failed to fetch.
+            versions: Version numbers that failed to fetch, None if unknown.
+            errors: Error messages describing the failures.
+            operation_flag: The ID of the operation that failed.
+        """
+        statement = text("""
+            WITH failed AS (
+                SELECT * FROM unnest(
+                    CAST(:protein_ids AS text[]),
+                    CAST(:versions AS int[]),
+                    CAST(:errors AS text[])
+                ) AS f(protein_id, version, error)
+            ), proteins AS (
+                INSERT INTO protein (id, deprecated)
+                SELECT DISTINCT protein_id, false FROM failed
+                ON CONFLICT (id) DO NOTHING
+            ), versions AS (
+                SELECT DISTINCT ON (f.protein_id, fetch_version)
+                    f.protein_id, f.error, COALESCE(f.version, (
+                        SELECT COALESCE(max(file.version), 0) + 1
+                        FROM file WHERE file.protein_id = f.protein_id
+                    )) AS fetch_version
+                FROM failed f
+            )
+            INSERT INTO failedfetch
+                (error, fetch_date, fetch_version, attempts, operation_flag, protein_id)
+            SELECT v.error, now(), v.fetch_version, 0, :operation_flag, v.protein_id
+            FROM versions v
+            WHERE NOT EXISTS (
+                SELECT 1 FROM failedfetch r
+                WHERE r.protein_id = v.protein_id
+                    AND r.fetch_version = v.fetch_version
+            )
+            """)
+        params = {
+            "protein_ids": protein_ids,
+            "versions": versions,
+            "errors": errors,
+            "operation_flag": operation_flag,
+        }
+        self.db.exec(statement, params=params)
+        self.db.commit()
+
+    def claim_due_failed_fetches(
+        self, limit: int, max_attempts: int, lease: float
+    ) -> list[tuple]:
+        """Claims failed fetches which are due to be retried.
+
+        Claimed records are not due again until the lease passes, so the ingest
+        queue doesn't take them while they are retried. A finished retry either
+        removes or postpones them.
+
+        Args:
+            limit: Maximum number of records to claim.
+            max_attempts: Number of retries after which records are left alone.
+            lease: Seconds the records stay reserved for the retry.
+
+        Returns:
+            List of (id, protein_id, version, operation_flag) tuples, oldest due
+                first.
+        """
+        statement = text("""
+            UPDATE failedfetch SET next_attempt = now() + make_interval(secs => :lease)
+            WHERE id IN (
+                SELECT id FROM failedfetch
+                WHERE attempts < :max_attempts
+                    AND (next_attempt IS NULL OR next_attempt <= now())
+                ORDER BY next_attempt NULLS FIRST, id
+                LIMIT :limit
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, protein_id, fetch_version, operation_flag
+            """)
+        params = {"limit": limit, "max_attempts": max_attempts, "lease": lease}
+        result = self.db.exec(statement, params=params)
+        rows = [tuple(row) for row in result.all()]
+        self.db.commit()
+
+        return rows
+
+    def delete_resolved(self, protein_ids: list[str], versions: list[int]) -> int:
+        """Removes all failed fetch records of given protein versions.
+
+        Args:
+            protein_ids: IDs of the resolved proteins.
+            versions: Resolved versions, one per protein ID.
+
+        Returns:
+            Number of removed records.
+        """
+        statement = text("""
+            DELETE FROM failedfetch f
+            USING unnest(CAST(:protein_ids AS text[]), CAST(:versions AS int[]))
+                AS r(protein_id, version)
+            WHERE f.protein_id = r.protein_id AND f.fetch_version = r.version
+            """)
+        params = {"protein_ids": protein_ids, "versions": versions}
+        result = self.db.exec(statement, params=params)
+        self.db.commit()
+
+        return result.rowcount
+
+    def postpone(self, ids: list[int], errors: list[str], base: float, cap: float):
+        """Counts failed retry and schedules the next one with exponential backoff.
+
+        Args:
+            ids: IDs of the failed fetch records.
+            errors: Error messages of the retries.
+            base: Backoff after the first failed retry in seconds.
+            cap: Maximum backoff in seconds.
+        """
+        statement = text("""
+            UPDATE failedfetch f
+            SET attempts = f.attempts + 1, error = r.error,
+                next_attempt = now() + make_interval(
+                    secs => least(:cap, :base * power(2, f.attempts))
+                )
+            FROM unnest(CAST(:ids AS int[]), CAST(:errors AS text[])) AS r(id, error)
+            WHERE f.id = r.id
+            """)
+        params = {"ids": ids, "errors": errors, "base": base, "cap": cap}
+        self.db.exec(statement, params=params)
+        self.db.commit()
+
+    def ensure_retry_columns(self):
+        """Adds retry tracking columns to tables created before they existed."""
+        self.db.exec(text("""
+                ALTER TABLE failedfetch
+                ADD COLUMN IF NOT EXISTS attempts integer NOT NULL DEFAULT 0,
+                ADD COLUMN IF NOT EXISTS next_attempt timestamp
+                """))
+        self.db.commit()
@@ -5,11 +5,14 @@ protein files, including version management, file retrieval, and bulk operations
 """
 
 from datetime import datetime
-from sqlmodel import insert, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import defer
+from sqlmodel import func, select, text
 
 from app.log import log as log
 from app.database.repositories.base import RepositoryBase
-from app.database.models import FileBase, File, Change
+from app.database.copy import copy_rows
+from app.database.models import FileBase, File, FileContent, FileDelta, Change
 
 
 class FileRepository(RepositoryBase):
@@ -19,11 +22,15 @@ class FileRepository(RepositoryBase):
     protein file records and their versions.
     """
 
-    def get_latest_by_protein_id(self, protein_id: str) -> FileBase:
+    def get_latest_by_protein_id(
+        self, protein_id: str, with_data: bool = True
+    ) -> FileBase:
         """Retrieves the latest version of a protein file.
 
         Args:
             protein_id: The ID of the protein to fetch.
+            with_data: Whether to load file content, otherwise it is loaded only
+                when accessed.
 
         Returns:
             The latest file record for the protein.
@@ -34,16 +41,22 @@ class FileRepository(RepositoryBase):
             .order_by(File.version.desc())
             .limit(1)
         )
+        if not with_data:
+            statement = statement.options(defer(File.file))
         file = self.db.exec(statement).first()
 
         return file
 
-    def get_by_protein_id_at_version(self, protein_id: str, version: int) -> FileBase:
+    def get_by_protein_id_at_version(
+        self, protein_id: str, version: int, with_data: bool = True
+    ) -> FileBase:
         """Retrieves a specific version of a protein file.
 
         Args:
             protein_id: The ID of the protein to fetch.
             version: The specific version to retrieve.
+            with_data: Whether to load file content, otherwise it is loaded only
+                when accessed.
 
         Returns:
             The file record for the specified version.
@@ -51,16 +64,22 @@ class FileRepository(RepositoryBase):
         statement = select(File).where(
             File.protein_id == protein_id, File.version == version
         )
+        if not with_data:
+            statement = statement.options(defer(File.file))
         file = self.db.exec(statement).first()
 
         return file
 
-    def get_latest_by_id_before_date(self, protein_id: str, date: datetime) -> FileBase:
+    def get_latest_by_id_before_date(
+        self, protein_id: str, date: datetime, with_data: bool = True
+    ) -> FileBase:
         """Retrieves the latest version of a protein file before a given date.
 
         Args:
             protein_id: The ID of the protein to fetch.
             date: The cutoff date for the file version.
+            with_data: Whether to load file content, otherwise it is loaded only
+                when accessed.
 
         Returns:
             The latest file record before the specified date.
@@ -72,10 +91,29 @@ class FileRepository(RepositoryBase):
             .order_by(Change.timestamp)
             .limit(1)
         )
+        if not with_data:
+            statement = statement.options(defer(File.file))
         file = self.db.exec(statement).first()
 
         return file
 
+    def get_by_id(self, file_id: int, with_data: bool = True) -> File | None:
+        """Retrieves a file record by its ID.
+
+        Args:
+            file_id: The ID of the file.
+            with_data: Whether to load file content, otherwise it is loaded only
+                when accessed.
+
+        Returns:
+            The file record, None if it doesn't exist.
+        """
+        statement = select(File).where(File.id == file_id)
+        if not with_data:
+            statement = statement.options(defer(File.file))
+
+        return self.db.exec(statement).first()
+
     # TODO fix version handling as now it doesnt return correct value.
     def get_latest_version_by_protein_id(self, protein_id: str) -> int:
         """Retrieves the latest version number for a protein.
@@ -86,18 +124,82 @@ class FileRepository(RepositoryBase):
         Returns:
             The latest version number, or 0 if no versions exist.
         """
-        file = self.get_latest_by_protein_id(protein_id=protein_id)
+        statement = select(func.max(File.version)).where(File.protein_id == protein_id)
+        version = self.db.exec(statement).first()
+
+        return version or 0
 
-        if file:
-            return file.version
+    def get_latest_versions(self, protein_ids: list[str]) -> dict[str, int]:
+        """Retrieves the latest stored version numbers of multiple proteins.
+
+        Args:
+            protein_ids: IDs of the proteins to check.
+
+        Returns:
+            Dictionary mapping protein IDs to their latest version, proteins
+                without stored files are left out.
+        """
+        statement = (
+            select(File.protein_id, func.max(File.version))
+            .where(File.protein_id.in_(protein_ids))
+            .group_by(File.protein_id)
+        )
 
-        return 0
+        return {protein_id: version for protein_id, version in self.db.exec(statement)}
 
-    def get_new_files_after_date(self, date: datetime) -> list[FileBase]:
+    def get_stored_versions(self, protein_ids: list[str]) -> set[tuple[str, int]]:
+        """Retrieves all stored versions of multiple proteins without file data.
+
+        Args:
+            protein_ids: IDs of the proteins to check.
+
+        Returns:
+            Set of (protein_id, version) tuples.
+        """
+        statement = select(File.protein_id, File.version).where(
+            File.protein_id.in_(protein_ids)
+        )
+
+        return {
+            (protein_id, version) for protein_id, version in self.db.exec(statement)
+        }
+
+    def get_missing_versions(
+        self, protein_ids: list[str], versions: list[int]
+    ) -> list[tuple[str, int]]:
+        """Selects which of given versions are not stored in a single query.
+
+        Args:
+            protein_ids: IDs of the proteins.
+            versions: Versions of the proteins, aligned with protein IDs.
+
+        Returns:
+            List of (protein_id, version) tuples which are not stored.
+        """
+        statement = text("""
+            SELECT t.protein_id, t.version
+            FROM unnest(CAST(:protein_ids AS text[]), CAST(:versions AS int[]))
+                AS t(protein_id, version)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM file f
+                WHERE f.protein_id = t.protein_id AND f.version = t.version
+            )
+            ORDER BY t.protein_id, t.version
+            """)
+        params = {"protein_ids": protein_ids, "versions": versions}
+        result = self.db.exec(statement, params=params)
+
+        return [tuple(row) for row in result.all()]
+
+    def get_new_files_after_date(
+        self, date: datetime, with_data: bool = True
+    ) -> list[FileBase]:
         """Retrieves all new files added after a given date.
 
         Args:
             date: The cutoff date for filtering files.
+            with_data: Whether to load file content, otherwise it is loaded only
+                when accessed.
 
         Returns:
             List of file records added after the specified date.
@@ -107,49 +209,419 @@ class FileRepository(RepositoryBase):
             .join(Change, Change.file_id == File.id)
             .where(Change.timestamp > date)
         )
+        if not with_data:
+            statement = statement.options(defer(File.file))
 
         files = self.db.exec(statement).all()
 
         return files
 
-    def insert_new_version(self, protein_id: str, version: int, file: bytes):
-        """Inserts a new version of a protein file.
+    def insert_new_version(
+        self,
+        protein_id: str,
+        version: int,
+        file: bytes | None,
+        sha256: str | None = None,
+    ):
+        """Inserts a new version of a protein file, creating the protein if needed.
+
+        Protein, content and file are upserted in a single statement, already
+        stored versions are left untouched. Content is kept once per hash in
+        the file content table.
 
         Args:
             protein_id: The ID of the protein.
             version: The version number to insert.
-            file: The file content to store.
+            file: The file content to store, None if kept in file store.
+            sha256: SHA-256 of the file content.
 
         Returns:
-            True if insertion was successful, False otherwise.
+            ID of the inserted file, None if the version was already stored or
+                the insert failed.
         """
-        new_file = File(
-            timestamp=datetime.now(), version=version, file=file, protein_id=protein_id
-        )
+        statement = text("""
+            WITH proteins AS (
+                INSERT INTO protein (id, deprecated) VALUES (:protein_id, false)
+                ON CONFLICT (id) DO NOTHING
+            ), contents AS (
+                INSERT INTO filecontent (sha256, data)
+                SELECT :sha256, CAST(:file AS bytea)
+                WHERE CAST(:file AS bytea) IS NOT NULL
+                ON CONFLICT (sha256) DO NOTHING
+            )
+            INSERT INTO file (protein_id, version, file, sha256)
+            VALUES (:protein_id, :version, NULL, :sha256)
+            ON CONFLICT (protein_id, version) DO NOTHING
+            RETURNING id
+            """)
+        params = {
+            "protein_id": protein_id,
+            "version": version,
+            "file": file,
+            "sha256": sha256,
+        }
 
         try:
-            self.db.add(new_file)
+            file_id = self.db.exec(statement, params=params).scalar()
             self.db.commit()
             log.debug(f"Inserted file version {version} for protein {protein_id}")
-            return True
+            return file_id
         except Exception as e:
             log.error(f"Failed to insert new file. Error {str(e)}")
             self.db.rollback()
-            return False
+            return None
+
+    def insert_contents(self, contents: dict[str, bytes]) -> None:
+        """Inserts file contents which are not stored yet without committing.
+
+        Args:
+            contents: Dictionary mapping SHA-256 hashes to contents.
+        """
+        if not contents:
+            return
+
+        values = [{"sha256": sha256, "data": data} for sha256, data in contents.items()]
+        statement = insert(FileContent).values(values).on_conflict_do_nothing()
+        self.db.exec(statement)
 
-    def insert_in_bulk(self, file_values: list):
+    def get_content(self, sha256: str) -> bytes | None:
+        """Retrieves file content by its hash.
+
+        Args:
+            sha256: SHA-256 of the content.
+
+        Returns:
+            The content, None if it is not in the file content table.
+        """
+        statement = select(FileContent.data).where(FileContent.sha256 == sha256)
+        data = self.db.exec(statement).first()
+
+        return bytes(data) if data is not None else None
+
+    def insert_in_bulk(self, file_values: list) -> list[tuple]:
         """Inserts multiple file records in a single operation.
 
+        Versions which are already stored are skipped.
+
         Args:
             file_values: List of file records to insert.
 
         Returns:
-            List of IDs for the inserted records.
+            List of (id, protein_id, version) tuples of the inserted records.
         """
-        statement = insert(File).values(file_values).returning(File.id)
+        statement = insert(File).values(file_values)
+        statement = statement.on_conflict_do_nothing(
+            index_elements=[File.protein_id, File.version]
+        ).returning(File.id, File.protein_id, File.version)
         result = self.db.exec(statement)
+        rows = [tuple(row) for row in result.all()]
+        self.db.commit()
+
+        return rows
+
+    def copy_in_bulk(self, rows) -> list[tuple]:
+        """Loads file records with their proteins and changes without committing.
+
+        Rows are loaded into a temporary staging table with binary COPY. Then a
+        single statement inserts missing proteins, contents not stored yet, new
+        file versions with server assigned IDs and a change for each inserted
+        file with an operation flag. Versions which are already stored are
+        skipped.
+
+        Args:
+            rows: Iterable of (protein_id, version, file, sha256, timestamp,
+                operation_flag) tuples, timestamp and operation_flag are None
+                for files stored without a change.
+
+        Returns:
+            List of (id, protein_id, version) tuples of the inserted files.
+        """
+        self.db.exec(text("""
+                CREATE TEMP TABLE IF NOT EXISTS file_stage (
+                    protein_id text, version int, file bytea, sha256 text,
+                    timestamp timestamp, operation_flag int
+                ) ON COMMIT DELETE ROWS
+                """))
+        self.db.exec(text("TRUNCATE file_stage"))
+
+        columns = [
+            "protein_id",
+            "version",
+            "file",
+            "sha256",
+            "timestamp",
+            "operation_flag",
+        ]
+        copy_rows(self.db, "file_stage", columns, rows)
+
+        statement = text("""
+            WITH proteins AS (
+                INSERT INTO protein (id, deprecated)
+                SELECT DISTINCT protein_id, false FROM file_stage
+                ON CONFLICT (id) DO NOTHING
+            ), contents AS (
+                INSERT INTO filecontent (sha256, data)
+                SELECT DISTINCT ON (sha256) sha256, file FROM file_stage
+                WHERE file IS NOT NULL
+                ON CONFLICT (sha256) DO NOTHING
+            ), files AS (
+                INSERT INTO file (protein_id, version, file, sha256)
+                SELECT protein_id, version, NULL, sha256 FROM file_stage
+                ON CONFLICT (protein_id, version) DO NOTHING
+                RETURNING id, protein_id, version
+            ), changes AS (
+                INSERT INTO change (timestamp, protein_id, operation_flag, file_id)
+                SELECT s.timestamp, f.protein_id, s.operation_flag, f.id
+                FROM files f
+                JOIN file_stage s USING (protein_id, version)
+                WHERE s.operation_flag IS NOT NULL
+            )
+            SELECT id, protein_id, version FROM files
+            """)
+        result = self.db.exec(statement)
+
+        return [tuple(row) for row in result.all()]
+
+    def get_contents_in_database(self, limit: int) -> list[tuple]:
+        """Retrieves a batch of files whose content is kept in the database.
+
+        Args:
+            limit: Maximum number of files to return.
+
+        Returns:
+            List of (id, protein_id, file) tuples.
+        """
+        statement = (
+            select(File.id, File.protein_id, File.file)
+            .where(File.file.is_not(None))
+            .order_by(File.id)
+            .limit(limit)
+        )
+
+        return [tuple(row) for row in self.db.exec(statement).all()]
+
+    def release_contents(self, ids: list[int], hashes: list[str]) -> None:
+        """Replaces contents of files moved to the file store by their hashes.
+
+        Args:
+            ids: IDs of the moved files.
+            hashes: SHA-256 of their contents, aligned with IDs.
+        """
+        statement = text("""
+            UPDATE file SET file = NULL, sha256 = m.sha256
+            FROM unnest(CAST(:ids AS int[]), CAST(:hashes AS text[]))
+                AS m(id, sha256)
+            WHERE file.id = m.id
+            """)
+        self.db.exec(statement, params={"ids": ids, "hashes": hashes})
+        self.db.commit()
+
+    def deduplicate_contents(self, limit: int) -> int:
+        """Moves a batch of contents kept in file records to the content table.
+
+        Hashes are computed by the database, identical contents are kept once.
+
+        Args:
+            limit: Maximum number of files to process.
+
+        Returns:
+            Number of processed files.
+        """
+        statement = text("""
+            WITH batch AS (
+                SELECT id, file, encode(sha256(file), 'hex') AS sha256
+                FROM file
+                WHERE file IS NOT NULL
+                ORDER BY id
+                LIMIT :limit
+            ), contents AS (
+                INSERT INTO filecontent (sha256, data)
+                SELECT DISTINCT ON (sha256) sha256, file FROM batch
+                ON CONFLICT (sha256) DO NOTHING
+            )
+            UPDATE file SET file = NULL, sha256 = batch.sha256
+            FROM batch
+            WHERE file.id = batch.id
+            """)
+        result = self.db.exec(statement, params={"limit": limit})
+        self.db.commit()
+
+        return result.rowcount
+
+    def get_contents_in_table(self, limit: int) -> list[tuple]:
+        """Retrieves a batch of contents from the content table.
+
+        Args:
+            limit: Maximum number of contents to return.
+
+        Returns:
+            List of (sha256, protein_ids, data) tuples, where protein_ids are
+                the proteins having the content.
+        """
+        statement = text("""
+            SELECT c.sha256, array_agg(DISTINCT f.protein_id), c.data
+            FROM filecontent c
+            JOIN file f ON f.sha256 = c.sha256
+            GROUP BY c.sha256
+            ORDER BY c.sha256
+            LIMIT :limit
+            """)
+        result = self.db.exec(statement, params={"limit": limit})
+
+        return [tuple(row) for row in result.all()]
+
+    def delete_contents(self, hashes: list[str]) -> None:
+        """Removes contents moved to the file store from the content table.
+
+        Args:
+            hashes: SHA-256 of the moved contents.
+        """
+        statement = text("DELETE FROM filecontent WHERE sha256 = ANY(:hashes)")
+        self.db.exec(statement, params={"hashes": hashes})
         self.db.commit()
 
-        ids = [row[0] for row in result.all()]
+    def get_delta(self, file_id: int) -> FileDelta | None:
+        """Retrieves delta of an older file version.
+
+        Args:
+            file_id: The ID of the file.
+
+        Returns:
+            The delta record, None if the file is not encoded as delta.
+        """
+        statement = select(FileDelta).where(
+            FileDelta.file_id == file_id, FileDelta.data.is_not(None)
+        )
+
+        return self.db.exec(statement).first()
+
+    def get_delta_candidates(self, after: int, limit: int) -> list[tuple[int, int]]:
+        """Retrieves older file versions which may be encoded as deltas.
+
+        Only files whose content is kept in the database and which have a newer
+        version are returned, files checked before are skipped.
+
+        Args:
+            after: ID of the last file of the previous batch.
+            limit: Maximum number of files to return.
+
+        Returns:
+            List of (file_id, base_id) tuples, base being the next version.
+        """
+        statement = text("""
+            SELECT f.id, n.id
+            FROM file f
+            JOIN LATERAL (
+                SELECT id FROM file n
+                WHERE n.protein_id = f.protein_id AND n.version > f.version
+                ORDER BY n.version
+                LIMIT 1
+            ) n ON true
+            WHERE f.id > :after
+                AND NOT EXISTS (SELECT 1 FROM filedelta d WHERE d.file_id = f.id)
+                AND (
+                    f.file IS NOT NULL
+                    OR EXISTS (SELECT 1 FROM filecontent c WHERE c.sha256 = f.sha256)
+                )
+            ORDER BY f.id
+            LIMIT :limit
+            """)
+        result = self.db.exec(statement, params={"after": after, "limit": limit})
+
+        return [tuple(row) for row in result.all()]
+
+    def insert_deltas(self, deltas: list[dict]) -> None:
+        """Stores deltas of older versions and releases their full contents.
+
+        Contents are removed from file records and from the content table, as
+        long as no file which is not encoded as delta refers to them.
 
-        return ids
+        Args:
+            deltas: List of delta records, data is None for files whose full
+                content is kept.
+        """
+        statement = insert(FileDelta).values(deltas).on_conflict_do_nothing()
+        self.db.exec(statement)
+
+        ids = [delta["file_id"] for delta in deltas if delta["data"] is not None]
+        if ids:
+            self.db.exec(
+                text("UPDATE file SET file = NULL WHERE id = ANY(:ids)"),
+                params={"ids": ids},
+            )
+            self.db.exec(
+                text("""
+                    DELETE FROM filecontent c
+                    WHERE c.sha256 IN (SELECT sha256 FROM file WHERE id = ANY(:ids))
+                        AND NOT EXISTS (
+                            SELECT 1 FROM file f
+                            WHERE f.sha256 = c.sha256 AND NOT EXISTS (
+                                SELECT 1 FROM filedelta d
+                                WHERE d.file_id = f.id AND d.data IS NOT NULL
+                            )
+                        )
+                    """),
+                params={"ids": ids},
+            )
+
+        self.db.commit()
+
+    def ensure_store_columns(self):
+        """Adds hash column and allows contents kept outside of the database.
+
+        Tables created before the file store was introduced require file
+        content in every row, the hash index serves deduplicated contents.
+        """
+        self.db.exec(text("""
+                ALTER TABLE file
+                ADD COLUMN IF NOT EXISTS sha256 varchar(64),
+                ALTER COLUMN file DROP NOT NULL
+                """))
+        self.db.exec(text("CREATE INDEX IF NOT EXISTS ix_file_sha256 ON file (sha256)"))
+        self.db.commit()
+
+    def ensure_unique_versions(self):
+        """Removes duplicate file versions and enforces their uniqueness.
+
+        Databases created before the unique key was introduced may contain the
+        same version stored more than once. If the key is missing, changes of
+        duplicates are pointed to the oldest copy, the other copies are removed
+        and the unique index is created. Otherwise nothing is done, so the
+        file table isn't scanned on every start.
+        """
+        exists = self.db.exec(text("""
+            SELECT EXISTS (
+                SELECT 1 FROM pg_constraint
+                WHERE conname = 'file_protein_id_version_key'
+            ) OR EXISTS (
+                SELECT 1 FROM pg_indexes
+                WHERE tablename = 'file'
+                AND indexname = 'file_protein_id_version_key'
+            )
+            """)).scalar()
+        if exists:
+            return
+
+        statement = text("""
+            WITH ranked AS (
+                SELECT id, min(id) OVER (PARTITION BY protein_id, version) AS keep
+                FROM file
+            ), moved AS (
+                UPDATE change SET file_id = ranked.keep
+                FROM ranked
+                WHERE change.file_id = ranked.id AND ranked.id <> ranked.keep
+            )
+            DELETE FROM file USING ranked
+            WHERE file.id = ranked.id AND ranked.id <> ranked.keep
+            """)
+        result = self.db.exec(statement)
+        if result.rowcount:
+            log.info(f"Removed {result.rowcount} duplicate file versions.")
+
+        self.db.exec(
+            text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS file_protein_id_version_key "
+                "ON file (protein_id, version)"
+            )
+        )
+        self.db.commit()
@@ -0,0 +1,309 @@
+"""Repository module for managing the ingest work queue in the database.
+
+This module provides a repository class for handling database operations related to
+queued ingest tasks, including enqueueing, claiming batches with leases and
+recording results of attempts.
+"""
+
+from sqlmodel import func, select, text
+
+from app.database.repositories.base import RepositoryBase
+from app.database.models import IngestTask, TaskState
+
+
+class IngestTaskRepository(RepositoryBase):
+    """Repository for managing the ingest work queue in the database.
+
+    Batches are claimed with `FOR UPDATE SKIP LOCKED`, so any number of workers
+    can claim concurrently without blocking each other or taking the same task.
+    """
+
+    def enqueue(
+        self, protein_ids: list[str], versions: list[int], operation_flags: list[int]
+    ) -> int:
+        """Adds tasks to the queue in a single statement.
+
+        Versions which are already queued are skipped.
+
+        Args:
+            protein_ids: IDs of the proteins to fetch.
+            versions: Versions to fetch.
+            operation_flags: IDs of the operations recorded for stored files.
+
+        Returns:
+            Number of queued tasks.
+        """
+        statement = text("""
+            INSERT INTO ingesttask
+                (protein_id, version, operation_flag, state, attempts, created)
+            SELECT protein_id, version, operation_flag, :state, 0, now()
+            FROM unnest(
+                CAST(:protein_ids AS text[]),
+                CAST(:versions AS int[]),
+                CAST(:operation_flags AS int[])
+            ) AS t(protein_id, version, operation_flag)
+            ON CONFLICT (protein_id, version) DO NOTHING
+            """)
+        params = {
+            "protein_ids": protein_ids,
+            "versions": versions,
+            "operation_flags": operation_flags,
+            "state": TaskState.PENDING.value,
+        }
+        result = self.db.exec(statement, params=params)
+        self.db.commit()
+
+        return result.rowcount
+
+    def enqueue_failed_fetches(
+        self, max_attempts: int, base: float, cap: float, obsolete_flag: int
+    ) -> int:
+        """Queues failed fetches which are due to be retried.
+
+        Records stay in failed fetches and count the retry with backoff in the
+        same statement, exactly as a retry by the retry job, so both never take
+        the same record and records converge to manual checking. Stored tasks
+        remove their records. Records of obsolete entries are left to the retry
+        job, which deprecates them instead of fetching. Tasks of the same
+        versions which failed are queued again.
+
+        Args:
+            max_attempts: Number of retries after which records are left alone.
+            base: Backoff after the first failed retry in seconds.
+            cap: Maximum backoff in seconds.
+            obsolete_flag: The ID of the obsolete operation.
+
+        Returns:
+            Number of queued tasks.
+        """
+        statement = text("""
+            WITH due AS (
+                SELECT id FROM failedfetch
+                WHERE attempts < :max_attempts AND operation_flag <> :obsolete
+                    AND (next_attempt IS NULL OR next_attempt <= now())
+                FOR UPDATE SKIP LOCKED
+            ), postponed AS (
+                UPDATE failedfetch f
+                SET attempts = f.attempts + 1,
+                    next_attempt = now() + make_interval(
+                        secs => least(:cap, :base * power(2, f.attempts))
+                    )
+                FROM due
+                WHERE f.id = due.id
+                RETURNING f.protein_id, f.fetch_version, f.operation_flag
+            )
+            INSERT INTO ingesttask
+                (protein_id, version, operation_flag, state, attempts, created)
+            SELECT DISTINCT ON (protein_id, fetch_version)
+                protein_id, fetch_version, operation_flag, :pending, 0, now()
+            FROM postponed
+            ON CONFLICT (protein_id, version) DO UPDATE
+            SET state = :pending, attempts = 0, lease_until = NULL,
+                available_at = NULL
+            WHERE ingesttask.state = :failed
+            """)
+        params = {
+            "max_attempts": max_attempts,
+            "base": base,
+            "cap": cap,
+            "obsolete": obsolete_flag,
+            "pending": TaskState.PENDING.value,
+            "failed": TaskState.FAILED.value,
+        }
+        result = self.db.exec(statement, params=params)
+        self.db.commit()
+
+        return result.rowcount
+
+    def expire_leases(self, max_attempts: int) -> list[tuple]:
+        """Fails tasks whose lease expired after their last allowed attempt.
+
+        Expired tasks with attempts left are claimed again by `claim`.
+
+        Args:
+            max_attempts: Maximum number of attempts of a task.
+
+        Returns:
+            List of (protein_id, version, operation_flag, error) tuples of the
+                failed tasks.
+        """
+        statement = text("""
+            UPDATE ingesttask SET state = :failed, lease_until = NULL,
+                error = COALESCE(error, 'Lease expired.')
+            WHERE id IN (
+                SELECT id FROM ingesttask
+                WHERE state = :leased AND lease_until < now()
+                    AND attempts >= :max_attempts
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING protein_id, version, operation_flag, error
+            """)
+        params = {
+            "failed": TaskState.FAILED.value,
+            "leased": TaskState.LEASED.value,
+            "max_attempts": max_attempts,
+        }
+        result = self.db.exec(statement, params=params)
+        rows = [tuple(row) for row in result.all()]
+        self.db.commit()
+
+        return rows
+
+    def claim(self, limit: int, lease: float, max_attempts: int) -> list[tuple]:
+        """Claims a batch of pending or expired tasks for the calling worker.
+
+        Tasks locked by other workers are skipped instead of waited for.
+
+        Args:
+            limit: Maximum number of tasks to claim.
+            lease: Seconds the tasks stay reserved for the worker.
+            max_attempts: Maximum number of attempts of a task.
+
+        Returns:
+            List of (id, protein_id, version, operation_flag) tuples of the
+                claimed tasks.
+        """
+        statement = text("""
+            UPDATE ingesttask SET state = :leased, attempts = attempts + 1,
+                lease_until = now() + make_interval(secs => :lease)
+            WHERE id IN (
+                SELECT id FROM ingesttask
+                WHERE (
+                    (state = :pending
+                        AND (available_at IS NULL OR available_at <= now()))
+                    OR (state = :leased AND lease_until < now())
+                )
+                    AND attempts < :max_attempts
+                ORDER BY id
+                LIMIT :limit
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, protein_id, version, operation_flag
+            """)
+        params = {
+            "pending": TaskState.PENDING.value,
+            "leased": TaskState.LEASED.value,
+            "lease": lease,
+            "limit": limit,
+            "max_attempts": max_attempts,
+        }
+        result = self.db.exec(statement, params=params)
+        rows = [tuple(row) for row in result.all()]
+        self.db.commit()
+
+        return rows
+
+    def delete(self, ids: list[int]) -> None:
+        """Removes finished tasks from the queue with failed fetches they resolve.
+
+        Args:
+            ids: IDs of the tasks to remove.
+        """
+        statement = text("""
+            WITH done AS (
+                DELETE FROM ingesttask WHERE id = ANY(:ids)
+                RETURNING protein_id, version
+            )
+            DELETE FROM failedfetch f USING done
+            WHERE f.protein_id = done.protein_id AND f.fetch_version = done.version
+            """)
+        self.db.exec(statement, params={"ids": ids})
+        self.db.commit()
+
+    def release(
+        self,
+        ids: list[int],
+        errors: list[str],
+        permanent: list[bool],
+        max_attempts: int,
+        base: float,
+        cap: float,
+    ) -> list:
+        """Returns failed tasks to the queue with backoff or fails them.
+
+        Tasks are failed right away on permanent errors or when out of attempts,
+        others may be claimed again after exponential backoff.
+
+        Args:
+            ids: IDs of the failed tasks.
+            errors: Error messages of the attempts.
+            permanent: Whether the errors are permanent, aligned with IDs.
+            max_attempts: Maximum number of attempts of a task.
+            base: Backoff after the first failed attempt in seconds.
+            cap: Maximum backoff in seconds.
+
+        Returns:
+            List of (protein_id, version, operation_flag, error) tuples of the
+                failed tasks.
+        """
+        statement = text("""
+            UPDATE ingesttask t
+            SET state = CASE WHEN t.attempts >= :max_attempts OR f.permanent
+                    THEN :failed ELSE :pending END,
+                lease_until = NULL, error = f.error,
+                available_at = now() + make_interval(
+                    secs => least(:cap, :base * power(2, t.attempts - 1))
+                )
+            FROM unnest(
+                CAST(:ids AS int[]),
+                CAST(:errors AS text[]),
+                CAST(:permanent AS boolean[])
+            ) AS f(id, error, permanent)
+            WHERE t.id = f.id
+            RETURNING t.protein_id, t.version, t.operation_flag, t.error, t.state
+            """)
+        params = {
+            "ids": ids,
+            "errors": errors,
+            "permanent": permanent,
+            "max_attempts": max_attempts,
+            "base": base,
+            "cap": cap,
+            "pending": TaskState.PENDING.value,
+            "failed": TaskState.FAILED.value,
+        }
+        result = self.db.exec(statement, params=params)
+        rows = [
+            tuple(row[:4]) for row in result.all() if row[4] == TaskState.FAILED.value
+        ]
+        self.db.commit()
+
+        return rows
+
+    def get_next_available(self, max_attempts: int) -> float | None:
+        """Retrieves seconds until the next pending task may be claimed.
+
+        Args:
+            max_attempts: Maximum number of attempts of a task.
+
+        Returns:
+            Seconds until the earliest backoff ends, None if no task is pending.
+        """
+        statement = text("""
+            SELECT EXTRACT(EPOCH FROM min(COALESCE(available_at, now())) - now())
+            FROM ingesttask
+            WHERE state = :pending AND attempts < :max_attempts
+            """)
+        params = {"pending": TaskState.PENDING.value, "max_attempts": max_attempts}
+        delay = self.db.exec(statement, params=params).scalar()
+
+        return float(delay) if delay is not None else None
+
+    def ensure_backoff_column(self):
+        """Adds backoff column to queues created before it existed."""
+        self.db.exec(text("""
+                ALTER TABLE ingesttask
+                ADD COLUMN IF NOT EXISTS available_at timestamp
+                """))
+        self.db.commit()
+
+    def get_counts(self) -> dict[int, int]:
+        """Retrieves number of queued tasks in each state.
+
+        Returns:
+            Dictionary mapping states to numbers of tasks.
+        """
+        statement = select(IngestTask.state, func.count()).group_by(IngestTask.state)
+        rows = self.db.exec(statement).all()
+
+        return {state: count for state, count in rows}
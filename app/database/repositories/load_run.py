@@ -0,0 +1,184 @@
+"""Repository module for managing full load ledger records in the database.
+
+This module provides a repository class for handling database operations related to
+full load runs, including run creation, page checkpoints and entry statuses.
+"""
+
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select, func, text, update
+
+from app.database.repositories.base import RepositoryBase
+from app.database.models import LoadRun, LoadPage, LoadEntry, EntryStatus
+
+# Advisory lock serializing creation of load runs between processes.
+LOAD_RUN_LOCK_ID = 12346
+
+
+class LoadRunRepository(RepositoryBase):
+    """Repository for managing full load ledger records in the database.
+
+    This class provides methods for creating and resuming load runs and for
+    checkpointing their progress.
+    """
+
+    def lock(self) -> None:
+        """Acquires advisory lock for load runs until end of transaction.
+
+        Processes starting at the same time then see each other's new run
+        instead of each creating their own.
+        """
+        self.db.exec(text(f"SELECT pg_advisory_xact_lock({LOAD_RUN_LOCK_ID})"))
+
+    def get_unfinished_run(self) -> LoadRun | None:
+        """Retrieves the most recent run which didn't process all pages.
+
+        Returns:
+            The unfinished run if any.
+        """
+        statement = (
+            select(LoadRun)
+            .where(LoadRun.finished.is_(None))
+            .order_by(LoadRun.started.desc())
+            .limit(1)
+        )
+        run = self.db.exec(statement).first()
+
+        return run
+
+    def get_run(self, run_id: int) -> LoadRun | None:
+        """Retrieves a run by its ID.
+
+        Args:
+            run_id: The ID of the run.
+
+        Returns:
+            The run if found.
+        """
+        return self.db.get(LoadRun, run_id)
+
+    def insert_run(self, start: int, total: int) -> LoadRun:
+        """Inserts a new load run.
+
+        Args:
+            start: Search API index the run starts from.
+            total: Total number of entries reported by Search API.
+
+        Returns:
+            The inserted run.
+        """
+        run = LoadRun(start=start, total=total, started=datetime.now())
+        self.db.add(run)
+        self.db.commit()
+        self.db.refresh(run)
+
+        return run
+
+    def update_total(self, run_id: int, total: int) -> None:
+        """Updates total number of entries of a run.
+
+        Args:
+            run_id: The ID of the run.
+            total: Total number of entries reported by Search API.
+        """
+        statement = update(LoadRun).where(LoadRun.id == run_id).values(total=total)
+        self.db.exec(statement)
+        self.db.commit()
+
+    def finish_run(self, run_id: int) -> None:
+        """Marks run as finished.
+
+        Args:
+            run_id: The ID of the run.
+        """
+        statement = (
+            update(LoadRun).where(LoadRun.id == run_id).values(finished=datetime.now())
+        )
+        self.db.exec(statement)
+        self.db.commit()
+
+    def get_completed_starts(self, run_id: int) -> set[int]:
+        """Retrieves indices of pages already completed in a run.
+
+        Args:
+            run_id: The ID of the run.
+
+        Returns:
+            Set of Search API indices of completed pages.
+        """
+        statement = select(LoadPage.start).where(LoadPage.run_id == run_id)
+        result = self.db.exec(statement).all()
+
+        return set(result)
+
+    def get_progress(self, run_id: int) -> tuple[int, int]:
+        """Retrieves number of processed and failed entries of a run.
+
+        Args:
+            run_id: The ID of the run.
+
+        Returns:
+            Tuple of processed and failed counts over completed pages.
+        """
+        statement = select(
+            func.coalesce(func.sum(LoadPage.processed), 0),
+            func.coalesce(func.sum(LoadPage.failed), 0),
+        ).where(LoadPage.run_id == run_id)
+        processed, failed = self.db.exec(statement).one()
+
+        return processed, failed
+
+    def get_processed_ids(self, run_id: int, protein_ids: list[str]) -> set[str]:
+        """Retrieves which of given proteins were already stored in a run.
+
+        Args:
+            run_id: The ID of the run.
+            protein_ids: IDs of proteins to check.
+
+        Returns:
+            Set of protein IDs stored successfully in the run.
+        """
+        statement = select(LoadEntry.protein_id).where(
+            LoadEntry.run_id == run_id,
+            LoadEntry.protein_id.in_(protein_ids),
+            LoadEntry.status == EntryStatus.DONE.value,
+        )
+        result = self.db.exec(statement).all()
+
+        return set(result)
+
+    def insert_entries(self, values: list) -> None:
+        """Inserts or updates statuses of multiple entries in a single operation.
+
+        Args:
+            values: List of entry records to insert.
+        """
+        statement = insert(LoadEntry).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[LoadEntry.run_id, LoadEntry.protein_id],
+            set_={
+                "version": statement.excluded.version,
+                "status": statement.excluded.status,
+            },
+        )
+        self.db.exec(statement)
+        self.db.commit()
+
+    def insert_page(self, run_id: int, start: int, processed: int, failed: int):
+        """Inserts checkpoint of a completed page.
+
+        Args:
+            run_id: The ID of the run.
+            start: Search API index of the page.
+            processed: Number of entries processed on the page.
+            failed: Number of entries which failed on the page.
+        """
+        page = LoadPage(
+            run_id=run_id,
+            start=start,
+            processed=processed,
+            failed=failed,
+            completed=datetime.now(),
+        )
+        self.db.add(page)
+        self.db.commit()
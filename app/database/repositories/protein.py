@@ -5,10 +5,12 @@ proteins, including retrieval, insertion, and status management.
 """
 
 from datetime import datetime
-from sqlmodel import insert, select, or_, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select, or_, func, text
 
 from app.log import log as log
 from app.database.repositories.base import RepositoryBase
+from app.database.copy import copy_rows
 from app.database.models import Protein, Change, Operations, File
 
 
@@ -72,6 +74,28 @@ class ProteinRepository(RepositoryBase):
 
         return result
 
+    def get_ids_after(self, after: str | None, limit: int) -> list[str]:
+        """Retrieves a page of current protein IDs in ID order.
+
+        Pages are selected by the last ID of the previous page, so each page
+        costs the same regardless of its position.
+
+        Args:
+            after: Last ID of the previous page, None for the first page.
+            limit: Maximum number of IDs to return.
+
+        Returns:
+            List of IDs of proteins which are not deprecated.
+        """
+        statement = select(Protein.id).where(Protein.deprecated.is_(False))
+
+        if after is not None:
+            statement = statement.where(Protein.id > after)
+
+        statement = statement.order_by(Protein.id).limit(limit)
+
+        return list(self.db.exec(statement).all())
+
     def get_proteins_after_date(self, date: datetime) -> list[str]:
         """Retrieves proteins with files created after a given date.
 
@@ -144,11 +168,137 @@ class ProteinRepository(RepositoryBase):
             log.error(f"Protein with id {protein_id} not found.")
             return False
 
+    def deprecate_in_bulk(self, protein_ids: list[str]) -> list[str]:
+        """Marks multiple proteins as deprecated in a single statement.
+
+        Args:
+            protein_ids: IDs of the proteins to deprecate.
+
+        Returns:
+            IDs of the proteins found and deprecated.
+        """
+        statement = text(
+            "UPDATE protein SET deprecated = true WHERE id = ANY(:ids) RETURNING id"
+        )
+        result = self.db.exec(statement, params={"ids": protein_ids})
+        deprecated = list(result.scalars().all())
+        self.db.commit()
+
+        return deprecated
+
     def insert_in_bulk(self, values: list):
         """Inserts multiple protein records in a single operation.
 
+        Proteins which already exist are skipped.
+
         Args:
             values: List of protein records to insert.
         """
-        self.db.exec(insert(Protein).values(values))
+        statement = insert(Protein).values(values).on_conflict_do_nothing()
+        self.db.exec(statement)
+        self.db.commit()
+
+    def copy_in_bulk(self, ids: list[str]):
+        """Inserts missing protein records using binary COPY.
+
+        IDs are copied into a temporary staging table first, then proteins which
+        don't exist yet are inserted in a single statement.
+
+        Args:
+            ids: List of protein IDs to insert.
+        """
+        self.db.exec(
+            text(
+                "CREATE TEMP TABLE IF NOT EXISTS protein_stage (id text) "
+                "ON COMMIT DELETE ROWS"
+            )
+        )
+        copy_rows(self.db, "protein_stage", ["id"], ((id,) for id in ids))
+        self.db.exec(
+            text(
+                "INSERT INTO protein (id, deprecated) "
+                "SELECT DISTINCT id, false FROM protein_stage "
+                "ON CONFLICT (id) DO NOTHING"
+            )
+        )
+        self.db.commit()
+
+    def diff_holdings(self, holdings) -> list[tuple[str, int]]:
+        """Compares upstream holdings with stored entries in a single pass.
+
+        Holdings are loaded into a temporary staging table with binary COPY and
+        compared with stored proteins, their files and time of their last change.
+
+        Args:
+            holdings: Iterable of (protein_id, last_modified) tuples of all
+                current upstream entries.
+
+        Returns:
+            List of (protein_id, operation_flag) tuples, ADDED for entries
+                without stored file, MODIFIED for entries changed upstream after
+                their last sync and OBSOLETE for stored entries not in holdings.
+        """
+        self.db.exec(text("""
+                CREATE TEMP TABLE IF NOT EXISTS holdings_stage (
+                    id text, modified timestamp
+                ) ON COMMIT DELETE ROWS
+                """))
+        self.db.exec(text("TRUNCATE holdings_stage"))
+        copy_rows(self.db, "holdings_stage", ["id", "modified"], holdings)
+
+        statement = text("""
+            WITH local AS (
+                SELECT p.id, p.deprecated, greatest(c.synced, p.checked) AS synced,
+                    f.protein_id IS NOT NULL AS stored
+                FROM protein p
+                LEFT JOIN (
+                    SELECT DISTINCT protein_id FROM file
+                ) f ON f.protein_id = p.id
+                LEFT JOIN (
+                    SELECT protein_id, max(timestamp) AS synced
+                    FROM change GROUP BY protein_id
+                ) c ON c.protein_id = p.id
+            )
+            SELECT h.id, CASE WHEN l.stored THEN :modified ELSE :added END
+            FROM holdings_stage h
+            LEFT JOIN local l ON l.id = h.id
+            WHERE l.id IS NULL OR NOT l.stored OR l.synced IS NULL
+                OR l.synced < h.modified
+            UNION ALL
+            SELECT l.id, :obsolete
+            FROM local l
+            WHERE l.stored AND NOT l.deprecated
+                AND NOT EXISTS (SELECT 1 FROM holdings_stage h WHERE h.id = l.id)
+            """)
+        params = {
+            "added": Operations.ADDED.value,
+            "modified": Operations.MODIFIED.value,
+            "obsolete": Operations.OBSOLETE.value,
+        }
+        rows = [tuple(row) for row in self.db.exec(statement, params=params).all()]
+        self.db.commit()
+
+        return rows
+
+    def set_checked(self, protein_ids: list[str], checked: list[datetime]):
+        """Records upstream modification times up to which proteins are current.
+
+        Args:
+            protein_ids: IDs of the proteins confirmed current.
+            checked: Upstream modification times of the proteins.
+        """
+        statement = text("""
+            UPDATE protein p SET checked = r.checked
+            FROM unnest(CAST(:ids AS text[]), CAST(:checked AS timestamp[]))
+                AS r(id, checked)
+            WHERE p.id = r.id
+            """)
+        self.db.exec(statement, params={"ids": protein_ids, "checked": checked})
+        self.db.commit()
+
+    def ensure_checked_column(self):
+        """Adds the checked column to protein tables created before it existed."""
+        self.db.exec(text("""
+                ALTER TABLE protein ADD COLUMN IF NOT EXISTS checked timestamp
+                """))
         self.db.commit()
@@ -0,0 +1,51 @@
+"""Repository module for managing the weekly synchronization state in the database.
+
+This module provides a repository class for reading and updating the date of the
+last processed weekly update list of each operation.
+"""
+
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select
+
+from app.database.repositories.base import RepositoryBase
+from app.database.models import SyncState
+
+
+class SyncStateRepository(RepositoryBase):
+    """Repository for managing the weekly synchronization state in the database."""
+
+    def get_last_date(self, operation_flag: int) -> str | None:
+        """Retrieves the date of the last processed list of an operation.
+
+        Args:
+            operation_flag: The ID of the operation.
+
+        Returns:
+            Date in YYYYMMDD format, None if no list was processed yet.
+        """
+        statement = select(SyncState.last_date).where(
+            SyncState.operation_flag == operation_flag
+        )
+
+        return self.db.exec(statement).first()
+
+    def set_last_date(self, operation_flag: int, last_date: str) -> None:
+        """Stores the date of the last processed list of an operation.
+
+        Args:
+            operation_flag: The ID of the operation.
+            last_date: Date in YYYYMMDD format.
+        """
+        values = {
+            "operation_flag": operation_flag,
+            "last_date": last_date,
+            "updated": datetime.now(),
+        }
+        statement = insert(SyncState).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[SyncState.operation_flag],
+            set_={"last_date": last_date, "updated": values["updated"]},
+        )
+        self.db.exec(statement)
+        self.db.commit()
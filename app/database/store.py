@@ -0,0 +1,292 @@
+"""Blob store module for file contents.
+
+This module provides pluggable storage backends for contents of stored files. By
+default contents live in the `filecontent` table. The filesystem backend keeps them
+on disk instead, addressed by their SHA-256 and sharded by PDB category, so the
+database holds only metadata and hashes and files can be served straight from disk.
+The pack backend appends contents of each category to a few large pack files with
+a compact offset index, avoiding an inode per file.
+"""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import cache
+from tempfile import NamedTemporaryFile
+from threading import Lock
+
+from app.config import FILE_STORE, FILE_STORE_PATH, PACK_MAX_SIZE
+
+__all__ = ["BlobStore", "FilesystemStore", "PackStore", "get_blob_store", "get_hash"]
+
+# Pack index record: SHA-256 digest, pack number, offset and length of content.
+INDEX_RECORD = struct.Struct("!32sIQI")
+
+
+def get_hash(data: bytes) -> str:
+    """Returns SHA-256 of file content.
+
+    Args:
+        data: The file content.
+
+    Returns:
+        Hexadecimal digest.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def get_category(protein_id: str) -> str:
+    """Returns PDB category of given protein, as used by the versioned archive.
+
+    Args:
+        protein_id: The full protein ID, e.g. pdb_00001abc.
+
+    Returns:
+        Middle two characters of the short ID, e.g. ab.
+    """
+    return protein_id[-3:-1].lower()
+
+
+class BlobStore:
+    """Base class of stores keeping file contents outside of the database."""
+
+    def put(self, protein_id: str, sha256: str, data: bytes) -> None:
+        """Stores file content, content which is already stored is kept.
+
+        Args:
+            protein_id: ID of the protein the file belongs to.
+            sha256: SHA-256 of the content.
+            data: The file content.
+        """
+        raise NotImplementedError
+
+    def get(self, protein_id: str, sha256: str) -> bytes | memoryview | None:
+        """Reads stored file content.
+
+        Args:
+            protein_id: ID of the protein the file belongs to.
+            sha256: SHA-256 of the content.
+
+        Returns:
+            The file content, None if it is not stored.
+        """
+        raise NotImplementedError
+
+    def get_path(self, protein_id: str, sha256: str) -> str | None:
+        """Returns local path of stored file content.
+
+        Content on disk can be sent by the operating system or a proxy without
+        being read into memory.
+
+        Args:
+            protein_id: ID of the protein the file belongs to.
+            sha256: SHA-256 of the content.
+
+        Returns:
+            Path of the content, None if the store doesn't keep files on disk.
+        """
+        return None
+
+
+class FilesystemStore(BlobStore):
+    """Content addressed store of files in a local directory.
+
+    Contents are kept as `<root>/<category>/<sha256>.cif.gz`. Files are written
+    to a temporary name and renamed, so readers never see partial content.
+
+    Args:
+        root: Directory holding the stored files.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def get_key(self, protein_id: str, sha256: str) -> str:
+        """Returns location of stored file content relative to the store root.
+
+        Args:
+            protein_id: ID of the protein the file belongs to.
+            sha256: SHA-256 of the content.
+
+        Returns:
+            Relative path of the content, e.g. ab/<sha256>.cif.gz.
+        """
+        return f"{get_category(protein_id)}/{sha256}.cif.gz"
+
+    def get_path(self, protein_id: str, sha256: str) -> str:
+        return os.path.join(self.root, self.get_key(protein_id, sha256))
+
+    def put(self, protein_id: str, sha256: str, data: bytes) -> None:
+        path = self.get_path(protein_id, sha256)
+        if os.path.exists(path):
+            return
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        with NamedTemporaryFile(dir=directory, prefix=".", delete=False) as file:
+            file.write(data)
+        os.replace(file.name, path)
+
+    def get(self, protein_id: str, sha256: str) -> bytes | None:
+        try:
+            with open(self.get_path(protein_id, sha256), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+
+class PackStore(BlobStore):
+    """Content addressed store appending files to pack files per category.
+
+    Each category directory holds append-only pack files (`00000.pack`, ...)
+    which are rolled over at `max_pack_size`, and an append-only `index` of
+    fixed size records locating every content by its SHA-256. Content is
+    appended before its index record, so a record only ever points to complete
+    content and a record torn by a crash is ignored.
+
+    Indexes are read through `mmap` and cached, new records appended by other
+    processes are picked up on a cache miss. Reads return slices of memory
+    mapped packs without copying. Appends are serialized with a file lock, so
+    processes on the same host can share the store.
+
+    Args:
+        root: Directory holding the category directories.
+        max_pack_size: Size in bytes after which a new pack is started.
+    """
+
+    def __init__(self, root: str, max_pack_size: int = PACK_MAX_SIZE):
+        self.root = root
+        self.max_pack_size = max_pack_size
+        self._lock = Lock()
+        self._indexes: dict[str, dict[bytes, tuple[int, int, int]]] = {}
+        self._index_sizes: dict[str, int] = {}
+        self._maps: dict[tuple[str, int], mmap.mmap] = {}
+
+    def _get_pack_path(self, category: str, pack: int) -> str:
+        """Returns path of a pack file."""
+        return os.path.join(self.root, category, f"{pack:05d}.pack")
+
+    def _load_index(self, category: str) -> dict[bytes, tuple[int, int, int]]:
+        """Reads index records appended since the last load.
+
+        Args:
+            category: The PDB category.
+
+        Returns:
+            Dictionary mapping digests to (pack, offset, length) tuples.
+        """
+        index = self._indexes.setdefault(category, {})
+        start = self._index_sizes.get(category, 0)
+
+        try:
+            with open(os.path.join(self.root, category, "index"), "rb") as file:
+                size = os.fstat(file.fileno()).st_size
+                end = size - size % INDEX_RECORD.size
+                if end <= start:
+                    return index
+
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    for digest, pack, offset, length in INDEX_RECORD.iter_unpack(
+                        mapped[start:end]
+                    ):
+                        index[digest] = (pack, offset, length)
+        except FileNotFoundError:
+            return index
+
+        self._index_sizes[category] = end
+        return index
+
+    def _get_map(self, category: str, pack: int, end: int) -> mmap.mmap:
+        """Returns memory map of a pack covering given end offset.
+
+        Maps of active packs are replaced once they grow. Replaced maps are
+        closed when no returned slice refers to them anymore.
+        """
+        mapped = self._maps.get((category, pack))
+        if mapped is None or len(mapped) < end:
+            with open(self._get_pack_path(category, pack), "rb") as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[(category, pack)] = mapped
+
+        return mapped
+
+    @contextmanager
+    def _lock_category(self, category: str) -> Iterator[None]:
+        """Holds exclusive lock of appends to a category across processes."""
+        directory = os.path.join(self.root, category)
+        os.makedirs(directory, exist_ok=True)
+
+        with open(os.path.join(directory, "lock"), "a") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def put(self, protein_id: str, sha256: str, data: bytes) -> None:
+        category = get_category(protein_id)
+        digest = bytes.fromhex(sha256)
+
+        with self._lock, self._lock_category(category):
+            index = self._load_index(category)
+            if digest in index:
+                return
+
+            pack = max((location[0] for location in index.values()), default=0)
+            path = self._get_pack_path(category, pack)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if size and size + len(data) > self.max_pack_size:
+                pack, path, size = pack + 1, self._get_pack_path(category, pack + 1), 0
+
+            with open(path, "ab") as file:
+                file.write(data)
+
+            record = INDEX_RECORD.pack(digest, pack, size, len(data))
+            with open(os.path.join(self.root, category, "index"), "ab") as file:
+                file.write(record)
+
+            index[digest] = (pack, size, len(data))
+            self._index_sizes[category] = (
+                self._index_sizes.get(category, 0) + INDEX_RECORD.size
+            )
+
+    def get(self, protein_id: str, sha256: str) -> memoryview | None:
+        category = get_category(protein_id)
+        digest = bytes.fromhex(sha256)
+
+        with self._lock:
+            location = self._indexes.get(category, {}).get(digest)
+            if location is None:
+                location = self._load_index(category).get(digest)
+            if location is None:
+                return None
+
+            pack, offset, length = location
+            mapped = self._get_map(category, pack, offset + length)
+
+        return memoryview(mapped)[offset : offset + length]
+
+
+@cache
+def get_blob_store() -> BlobStore | None:
+    """Returns store configured for new file contents.
+
+    Returns:
+        The configured store, None if contents are kept in the database.
+
+    Raises:
+        ValueError: If the configured backend is unknown.
+    """
+    if FILE_STORE == "database":
+        return None
+    if FILE_STORE == "filesystem":
+        return FilesystemStore(FILE_STORE_PATH)
+    if FILE_STORE == "pack":
+        return PackStore(FILE_STORE_PATH)
+
+    raise ValueError(f"Unknown file store backend: {FILE_STORE}")
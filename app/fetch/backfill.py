@@ -0,0 +1,146 @@
+"""Historical version backfill module for PDB entries.
+
+The full load and weekly jobs store only the latest version of each entry. This
+module fills in older versions: stored entries are walked in pages, their revision
+histories are resolved in batched Data API requests, a single query selects the
+versions which are not stored yet and only those are downloaded. Already stored
+versions are never fetched again, so an interrupted backfill simply resumes on the
+next run.
+
+The backfill runs with a fraction of upstream limits and pauses while weekly
+synchronization is running in any process, so it can run in the background
+without slowing it. Backfilled versions are stored without change records, they
+are history rather than new releases.
+"""
+
+import asyncio
+
+from app.log import log as log
+from app.config import (
+    BACKFILL_BATCH_SIZE,
+    BACKFILL_PAUSE,
+    BACKFILL_RATE_DIVISOR,
+    WORKER_LIMIT,
+)
+from app.fetch.buffer import InsertBuffer
+from app.fetch.client import HttpClient
+from app.fetch.jobs import is_sync_running
+from app.fetch.load import fetch_versions, get_shard_limits, insert_files
+from app.fetch.utils import get_short_id, resolve_revision_histories
+from app.services import FileService, ProteinService
+from app.database.database import db_context
+
+
+def get_protein_ids(after: str | None, limit: int) -> list[str]:
+    """Returns next page of current protein IDs.
+
+    Args:
+        after: Last ID of the previous page, None for the first page.
+        limit: Maximum number of IDs to return.
+
+    Returns:
+        List of protein IDs.
+    """
+    with db_context() as session:
+        return ProteinService(session).get_ids_after(after, limit)
+
+
+def get_missing_versions(versions: dict[str, list[int]]) -> list[tuple[str, int]]:
+    """Returns which of given protein versions are not stored.
+
+    Args:
+        versions: Dictionary mapping protein IDs to their versions.
+
+    Returns:
+        List of missing (protein_id, version) tuples.
+    """
+    with db_context() as session:
+        return FileService(session).get_missing_versions(versions)
+
+
+async def wait_for_sync() -> None:
+    """Waits until no weekly synchronization is running in any process."""
+    while await asyncio.to_thread(is_sync_running):
+        log.debug("Weekly sync is running, backfill paused.")
+        await asyncio.sleep(BACKFILL_PAUSE)
+
+
+async def backfill_batch(client: HttpClient, protein_ids: list[str]) -> tuple[int, int]:
+    """Downloads and stores missing versions of given proteins.
+
+    Versions are stored without change records. Versions which fail to download
+    are only logged, they are selected as missing again by the next backfill.
+
+    Args:
+        client: Pooled HTTP client.
+        protein_ids: List of protein IDs.
+
+    Returns:
+        Tuple of numbers of stored and failed versions.
+    """
+    ids = {get_short_id(protein_id): protein_id for protein_id in protein_ids}
+    histories = await resolve_revision_histories(client, list(ids))
+    versions = {ids[id]: sorted(set(history)) for id, history in histories.items()}
+
+    missing = await asyncio.to_thread(get_missing_versions, versions)
+    if not missing:
+        return 0, 0
+
+    buffer = InsertBuffer(insert_files)
+    errors = await fetch_versions(
+        client, [(protein_id, version, None) for protein_id, version in missing], buffer
+    )
+    await buffer.flush()
+
+    failed = [
+        (protein_id, version, error)
+        for (protein_id, version), error in zip(missing, errors)
+        if error
+    ]
+    for protein_id, version, error in failed:
+        log.warning(f"Backfill of {protein_id} version {version} failed: {error}")
+
+    return len(missing) - len(failed), len(failed)
+
+
+async def backfill(
+    batch_size: int = BACKFILL_BATCH_SIZE, divisor: int = BACKFILL_RATE_DIVISOR
+) -> tuple[int, int]:
+    """Stores all missing historical versions of stored entries.
+
+    Args:
+        batch_size: Number of entries checked at once.
+        divisor: Backfill uses 1/divisor of upstream limits.
+
+    Returns:
+        Tuple of numbers of stored and failed versions.
+    """
+    stored, failed, after = 0, 0, None
+
+    client = HttpClient(
+        max_connections=max(WORKER_LIMIT // divisor, 1),
+        rate_limits=get_shard_limits(divisor),
+    )
+    async with client:
+        while protein_ids := await asyncio.to_thread(
+            get_protein_ids, after, batch_size
+        ):
+            await wait_for_sync()
+
+            result = await backfill_batch(client, protein_ids)
+            stored += result[0]
+            failed += result[1]
+            after = protein_ids[-1]
+
+            if any(result):
+                log.info(f"Backfilled versions up to {after}: {stored} stored.")
+
+    return stored, failed
+
+
+def run() -> None:
+    """Backfills historical versions of all stored entries."""
+    log.info("Backfilling historical versions.")
+    stored, failed = asyncio.run(backfill())
+
+    log.info(f"Backfill finished, stored {stored} versions, {failed} failed.")
@@ -0,0 +1,213 @@
+"""Insert buffer module for downloaded files.
+
+This module provides a buffer collecting downloaded files until a byte budget is
+reached and storing them in the background, so memory used by a batch depends on
+the budget rather than on the number or size of its files. Downloads are streamed
+into the buffer and reserve the budget chunk by chunk as they arrive.
+"""
+
+import asyncio
+from collections.abc import AsyncGenerator, Callable
+from contextlib import asynccontextmanager
+
+from app.log import log as log
+from app.config import PDB_INSERT_BUFFER_DOWNLOADS, PDB_INSERT_BUFFER_SIZE
+from app.database.models import ChangeInsert, FileInsert
+
+__all__ = ["Download", "InsertBuffer"]
+
+
+class Download:
+    """Download streamed into an insert buffer.
+
+    Chunks are written as they arrive, each first reserving its size in the
+    budget of the buffer. The reservation is handed over to the buffered file
+    once it is added.
+
+    Args:
+        buffer: The buffer whose budget the download uses.
+    """
+
+    def __init__(self, buffer: "InsertBuffer"):
+        self.buffer = buffer
+        self.size = 0
+        self._chunks: list[bytes] = []
+
+    async def write(self, chunk: bytes) -> None:
+        """Reserves budget for a received chunk and keeps it.
+
+        Args:
+            chunk: The received bytes.
+        """
+        await self.buffer._reserve(self, len(chunk))
+        self._chunks.append(chunk)
+
+    async def discard(self) -> None:
+        """Drops received chunks and their reservation, e.g. before a retry."""
+        self._chunks = []
+        await self.buffer._release(self)
+
+    def getvalue(self) -> bytes:
+        """Returns all received bytes."""
+        data = b"".join(self._chunks)
+        self._chunks = [data]
+
+        return data
+
+    async def add(self, file: FileInsert, change: ChangeInsert | None) -> None:
+        """Adds the downloaded file to the buffer.
+
+        Args:
+            file: File object to insert.
+            change: Change object to insert with the file, None for none.
+        """
+        self._chunks = []
+        await self.buffer.add(file, change, self)
+
+
+class InsertBuffer:
+    """Buffer of downloaded files flushed to the database by byte budget.
+
+    Downloads reserve budget for every received chunk, so bytes of buffered files
+    and downloads in progress stay within the budget. A chunk which doesn't fit
+    waits, flushing buffered files first if there are any. The oldest download
+    in progress never waits, so downloads always progress and a single file may
+    exceed the budget. Flushed files are handed to a worker thread for insertion
+    while new files fill an empty buffer, and a flush waits for the running
+    insertion, so about two budgets of files are held at once. The number of
+    downloads in progress is bounded by the `downloads` semaphore.
+
+    Args:
+        insert: Function storing a list of files with their changes.
+        max_bytes: Byte budget of buffered files and downloads in progress.
+        max_downloads: Maximum number of files downloaded at once.
+    """
+
+    def __init__(
+        self,
+        insert: Callable[[list[FileInsert], list[ChangeInsert | None]], None],
+        max_bytes: int = PDB_INSERT_BUFFER_SIZE,
+        max_downloads: int = PDB_INSERT_BUFFER_DOWNLOADS,
+    ):
+        self.insert = insert
+        self.max_bytes = max_bytes
+        self.downloads = asyncio.Semaphore(max_downloads)
+        self.stored = {}
+        self._files = []
+        self._changes = []
+        self._size = 0
+        self._reserved = 0
+        self._active: list[Download] = []
+        self._condition = asyncio.Condition()
+        self._pending: asyncio.Future | None = None
+
+    @asynccontextmanager
+    async def download(self) -> AsyncGenerator[Download, None]:
+        """Opens a download streamed into the buffer.
+
+        Returns:
+            A generator that yields the download, whose reservation is released
+                on exit unless its file was added.
+        """
+        async with self.downloads:
+            download = Download(self)
+            self._active.append(download)
+            try:
+                yield download
+            finally:
+                async with self._condition:
+                    if download in self._active:
+                        self._active.remove(download)
+                        self._take_reservation(download)
+
+    async def add(
+        self,
+        file: FileInsert,
+        change: ChangeInsert | None,
+        download: Download | None = None,
+    ) -> None:
+        """Adds a downloaded file, flushing the buffer once it is full.
+
+        Files are added one at a time, a file reaching the budget is added only
+        after the previous insertion finished and the buffer was handed over.
+
+        Args:
+            file: File object to insert.
+            change: Change object to insert with the file, None for none.
+            download: Download of the file, whose reservation the file takes.
+        """
+        async with self._condition:
+            if download is not None:
+                self._active.remove(download)
+                self._take_reservation(download)
+
+            self._files.append(file)
+            self._changes.append(change)
+            self._size += len(file.file)
+
+            if self._size >= self.max_bytes:
+                await self._start_insert()
+
+    async def flush(self) -> None:
+        """Stores all buffered files and waits until they are stored."""
+        async with self._condition:
+            await self._start_insert()
+            await self._wait_pending()
+
+    async def _reserve(self, download: Download, size: int) -> None:
+        """Waits until a chunk of a download fits into the budget and reserves it.
+
+        Args:
+            download: The download receiving the chunk.
+            size: Size of the chunk.
+        """
+        async with self._condition:
+            while (
+                self._size + self._reserved + size > self.max_bytes
+                and self._active[0] is not download
+            ):
+                if self._files:
+                    await self._start_insert()
+                else:
+                    await self._condition.wait()
+
+            self._reserved += size
+            download.size += size
+
+    async def _release(self, download: Download) -> None:
+        """Releases reservation of a download."""
+        async with self._condition:
+            self._take_reservation(download)
+
+    def _take_reservation(self, download: Download) -> None:
+        """Removes reservation of a download from the budget.
+
+        Must be called with the lock held.
+        """
+        self._reserved -= download.size
+        download.size = 0
+        self._condition.notify_all()
+
+    async def _start_insert(self) -> None:
+        """Hands buffered files to a worker thread once the previous one is done.
+
+        Must be called with the lock held.
+        """
+        await self._wait_pending()
+
+        if self._files:
+            files, changes = self._files, self._changes
+            log.debug(f"Flushing {len(files)} files ({self._size} bytes).")
+            self._files, self._changes, self._size = [], [], 0
+            self._condition.notify_all()
+
+            self.stored |= {file.protein_id: file.version for file in files}
+            self._pending = asyncio.ensure_future(
+                asyncio.to_thread(self.insert, files, changes)
+            )
+
+    async def _wait_pending(self) -> None:
+        """Waits for the running insertion, raising its error if it failed."""
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            await pending
@@ -0,0 +1,240 @@
+"""Asynchronous HTTP client module for PDB data fetching.
+
+This module provides a shared asyncio HTTP client backed by a single pool of
+keep-alive connections. Concurrency and request rate are bounded per upstream by
+adaptive limiters, so thousands of queued lookups and downloads reuse a handful
+of sockets and run at the fastest pace the upstream tolerates. Transient failures
+are retried with backoff and failing hosts are cut off by a circuit breaker.
+"""
+
+import asyncio
+from typing import Protocol
+from urllib.parse import urlsplit
+
+from httpx import AsyncClient, Limits, Response, Timeout, TransportError
+
+from app.log import log as log
+from app.fetch.limiter import AdaptiveLimiter, parse_retry_after
+from app.fetch.retry import CircuitBreaker, RetryPolicy
+from app.config import (
+    PDB_DATA_API_URL,
+    PDB_FTP_STATUS_URL,
+    PDB_HTTP_FILE_URL,
+    PDB_HTTP_HOST_LIMIT,
+    PDB_HTTP_READ_TIMEOUT,
+    PDB_HTTP_TIMEOUT,
+    PDB_RATE_LIMITS,
+    PDB_SEARCH_API_URL,
+    WORKER_LIMIT,
+)
+
+__all__ = ["HttpClient"]
+
+# Upstream names of known hosts, used to look up their rate limits.
+UPSTREAMS = {
+    urlsplit(PDB_SEARCH_API_URL).netloc: "search",
+    urlsplit(PDB_DATA_API_URL).netloc: "graphql",
+    urlsplit(PDB_HTTP_FILE_URL).netloc: "files",
+    urlsplit(PDB_FTP_STATUS_URL).netloc: "files",
+}
+
+
+class ChunkSink(Protocol):
+    """Receiver of a streamed response body."""
+
+    async def write(self, chunk: bytes) -> None: ...
+
+    async def discard(self) -> None: ...
+
+
+class HttpClient:
+    """Pooled asynchronous HTTP client with adaptive per-upstream limits.
+
+    The client must be used as an async context manager, which opens the
+    underlying connection pool on enter and closes it on exit. Limiters and
+    circuit breakers are shared by all requests to the same upstream host.
+
+    Args:
+        max_connections: Maximum number of open connections across all hosts.
+        host_limit: Maximum number of concurrent requests to a host without
+            configured limits.
+        timeout: Connect timeout in seconds.
+        read_timeout: Timeout for receiving response data in seconds.
+        rate_limits: Rate and concurrency limits of each upstream.
+        retry_policy: Policy for repeating failed requests.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = WORKER_LIMIT,
+        host_limit: int = PDB_HTTP_HOST_LIMIT,
+        timeout: float = PDB_HTTP_TIMEOUT,
+        read_timeout: float = PDB_HTTP_READ_TIMEOUT,
+        rate_limits: dict = PDB_RATE_LIMITS,
+        retry_policy: RetryPolicy | None = None,
+    ):
+        self.max_connections = max_connections
+        self.host_limit = host_limit
+        self.timeout = timeout
+        self.read_timeout = read_timeout
+        self.rate_limits = rate_limits
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._client: AsyncClient | None = None
+        self._limiters: dict[str, AdaptiveLimiter] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    async def __aenter__(self) -> "HttpClient":
+        log.debug(
+            f"Opening HTTP connection pool ({self.max_connections=}, {self.host_limit=})."
+        )
+        limits = Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+        timeout = Timeout(self.read_timeout, connect=self.timeout)
+        self._client = AsyncClient(
+            limits=limits, timeout=timeout, follow_redirects=True
+        )
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        log.debug("Closing HTTP connection pool.")
+        await self._client.aclose()
+        self._client = None
+
+    def get_limiter(self, url: str) -> AdaptiveLimiter:
+        """Returns limiter of the upstream serving given url.
+
+        Args:
+            url: The requested URL.
+
+        Returns:
+            Limiter shared by all requests to the same host.
+        """
+        host = urlsplit(url).netloc
+        if host not in self._limiters:
+            name = UPSTREAMS.get(host, host)
+            limits = self.rate_limits.get(name)
+
+            if limits:
+                limiter = AdaptiveLimiter(name, **limits)
+            else:
+                limiter = AdaptiveLimiter(
+                    name, rate=self.max_connections, concurrency=self.host_limit
+                )
+            self._limiters[host] = limiter
+
+        return self._limiters[host]
+
+    def get_breaker(self, url: str) -> CircuitBreaker:
+        """Returns circuit breaker of the host serving given url.
+
+        Args:
+            url: The requested URL.
+
+        Returns:
+            Circuit breaker shared by all requests to the same host.
+        """
+        host = urlsplit(url).netloc
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(host)
+
+        return self._breakers[host]
+
+    async def get(self, url: str, sink: ChunkSink | None = None) -> Response:
+        """Sends GET request to given url using pooled connections.
+
+        Server errors, throttled responses and transport errors are repeated
+        according to the retry policy. Throttled requests wait for the upstream
+        limiter, others back off exponentially with jitter. Other responses,
+        such as 404, are returned right away.
+
+        Args:
+            url: The URL to request.
+            sink: If given, body of a successful response is streamed into it
+                chunk by chunk instead of being read into the response. Chunks
+                of an attempt failing midway are discarded before a retry.
+
+        Returns:
+            The HTTP response with its body fully read, or streamed into sink.
+
+        Raises:
+            CircuitOpenError: If the host failed too many times recently.
+            TransportError: If the request keeps failing on network level.
+        """
+        limiter = self.get_limiter(url)
+        breaker = self.get_breaker(url)
+        policy = self.retry_policy
+
+        for attempt in range(policy.attempts):
+            trial = breaker.check()
+            try:
+                await limiter.acquire()
+                response, status, retry_after, error = None, None, None, None
+                try:
+                    response = await self._receive(url, sink)
+                    status = response.status_code
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                except TransportError as e:
+                    error = e
+                    if sink is not None:
+                        await sink.discard()
+                finally:
+                    await limiter.release(status, retry_after)
+
+                if status is not None and not policy.is_retryable(status):
+                    breaker.record_success()
+                    return response
+
+                if status != 429:
+                    breaker.record_failure()
+            finally:
+                # Trial without recorded outcome would keep the circuit open.
+                if trial:
+                    breaker.end_trial()
+
+            if attempt == policy.retries:
+                break
+
+            reason = status if status is not None else type(error).__name__
+            if status == 429:
+                log.debug(f"Request throttled ({attempt=}), retrying url: {url}")
+                continue
+
+            delay = policy.get_delay(attempt)
+            log.warning(
+                f"Request failed with {reason} ({attempt=}), retrying in {delay:.2f}s: {url}"
+            )
+            await asyncio.sleep(delay)
+
+        log.error(f"Request failed after {policy.attempts} attempts: {url}")
+        if error is not None:
+            raise error
+
+        return response
+
+    async def _receive(self, url: str, sink: ChunkSink | None) -> Response:
+        """Sends single GET request, streaming successful body into sink if given.
+
+        Args:
+            url: The URL to request.
+            sink: Receiver of body chunks, None to read body into the response.
+
+        Returns:
+            The HTTP response.
+        """
+        if sink is None:
+            return await self._client.get(url)
+
+        request = self._client.build_request("GET", url)
+        response = await self._client.send(request, stream=True)
+        try:
+            if response.status_code == 200:
+                async for chunk in response.aiter_bytes():
+                    await sink.write(chunk)
+            else:
+                await response.aread()
+        finally:
+            await response.aclose()
+
+        return response
@@ -0,0 +1,230 @@
+"""Ingest queue worker module for PDB entries.
+
+This module provides functions for feeding entry versions into the distributed
+ingest queue and for draining it. Workers on any number of nodes claim batches of
+queued tasks, download their files concurrently over a shared connection pool and
+store them, so ingest throughput scales with the number of running workers.
+"""
+
+import asyncio
+import multiprocessing as mp
+from itertools import groupby
+
+from app.log import log as log
+from app.config import (
+    PDB_INGEST_BACKOFF_MAX,
+    PDB_INGEST_BATCH_SIZE,
+    PDB_INGEST_WORKERS,
+    WORKER_LIMIT,
+)
+from app.fetch.buffer import InsertBuffer
+from app.fetch.client import HttpClient
+from app.fetch.load import fetch_versions, get_shard_limits, insert_files
+from app.services import FailedFetchService, IngestQueueService
+from app.database.database import db_context
+from app.database.models import Operations
+
+
+def enqueue_failed() -> int:
+    """Queues failed fetches due to be retried, counting the retry.
+
+    Records stay in failed fetches until a task stores their version, so the
+    retry job and ingest workers never retry the same record concurrently.
+
+    Returns:
+        Number of queued tasks.
+    """
+    with db_context() as session:
+        return IngestQueueService(session).enqueue_failed_fetches()
+
+
+def record_exhausted(exhausted: list[tuple]) -> None:
+    """Records tasks which ran out of attempts as failed fetches.
+
+    Args:
+        exhausted: List of (protein_id, version, operation_flag, error) tuples.
+    """
+    if not exhausted:
+        return
+
+    with db_context() as session:
+        failed_service = FailedFetchService(session)
+        exhausted = sorted(exhausted, key=lambda task: task[2])
+
+        for flag, tasks in groupby(exhausted, key=lambda task: task[2]):
+            failed_service.insert_failed_fetches(
+                [(id, version, error) for id, version, _, error in tasks],
+                Operations(flag),
+            )
+
+    log.warning(f"{len(exhausted)} queued entries ran out of attempts.")
+
+
+def claim_tasks(limit: int) -> list[tuple]:
+    """Claims a batch of queued tasks for this worker.
+
+    Args:
+        limit: Maximum number of tasks to claim.
+
+    Returns:
+        List of (id, protein_id, version, operation_flag) tuples.
+    """
+    with db_context() as session:
+        tasks, expired = IngestQueueService(session).claim(limit)
+
+    record_exhausted(expired)
+
+    return tasks
+
+
+def get_next_available() -> float | None:
+    """Returns seconds until a task waiting for backoff can be claimed.
+
+    Returns:
+        Seconds to wait, None if no task is pending.
+    """
+    with db_context() as session:
+        return IngestQueueService(session).get_next_available()
+
+
+def settle_tasks(done: list[int], failed: list[tuple[int, str, bool]]) -> None:
+    """Removes stored tasks from the queue and releases failed ones.
+
+    Args:
+        done: IDs of the stored tasks.
+        failed: List of (id, error, permanent) tuples of the failed tasks.
+    """
+    with db_context() as session:
+        exhausted = IngestQueueService(session).settle(done, failed)
+
+    record_exhausted(exhausted)
+
+
+async def process_tasks(client: HttpClient, tasks: list[tuple]) -> int:
+    """Downloads files of claimed tasks and stores them.
+
+    Files are stored through an insert buffer, so memory used by a batch is
+    bounded by its byte budget.
+
+    Args:
+        client: Pooled HTTP client.
+        tasks: List of (id, protein_id, version, operation_flag) tuples.
+
+    Returns:
+        Number of failed tasks.
+    """
+    buffer = InsertBuffer(insert_files)
+    errors = await fetch_versions(
+        client,
+        [(protein_id, version, flag) for _, protein_id, version, flag in tasks],
+        buffer,
+    )
+    await buffer.flush()
+
+    done = [task[0] for task, error in zip(tasks, errors) if error is None]
+    failed = [
+        (task[0], str(error), error.permanent)
+        for task, error in zip(tasks, errors)
+        if error
+    ]
+
+    await asyncio.to_thread(settle_tasks, done, failed)
+
+    return len(failed)
+
+
+async def work(client: HttpClient, batch_size: int) -> int:
+    """Claims and processes batches until the queue has no pending tasks.
+
+    Tasks released with backoff are waited for, tasks leased by other workers
+    are left to them.
+
+    Args:
+        client: Pooled HTTP client.
+        batch_size: Maximum number of tasks claimed at once.
+
+    Returns:
+        Number of processed tasks.
+    """
+    processed = 0
+
+    while True:
+        tasks = await asyncio.to_thread(claim_tasks, batch_size)
+        if not tasks:
+            delay = await asyncio.to_thread(get_next_available)
+            if delay is None:
+                break
+
+            await asyncio.sleep(min(max(delay, 0.0), PDB_INGEST_BACKOFF_MAX))
+            continue
+
+        failures = await process_tasks(client, tasks)
+        processed += len(tasks)
+        log.info(f"Ingested {len(tasks) - failures} of {len(tasks)} queued entries.")
+
+    return processed
+
+
+async def drain(
+    batch_size: int = PDB_INGEST_BATCH_SIZE,
+    workers: int = PDB_INGEST_WORKERS,
+    shards: int = 1,
+) -> None:
+    """Processes the ingest queue with concurrent claim loops until it is empty.
+
+    Args:
+        batch_size: Maximum number of tasks claimed at once.
+        workers: Number of batches processed concurrently.
+        shards: Number of processes sharing upstream rate limits on this node.
+    """
+    client = HttpClient(
+        max_connections=max(WORKER_LIMIT // shards, 1),
+        rate_limits=get_shard_limits(shards),
+    )
+    async with client:
+        async with asyncio.TaskGroup() as group:
+            loops = [
+                group.create_task(work(client, batch_size)) for _ in range(workers)
+            ]
+
+    processed = sum(loop.result() for loop in loops)
+    log.info(f"Ingest queue drained, processed {processed} tasks.")
+
+
+def run_worker(shards: int) -> None:
+    """Drains the ingest queue in current process.
+
+    Args:
+        shards: Number of processes sharing upstream rate limits on this node.
+    """
+    asyncio.run(drain(shards=shards))
+
+
+def run(processes: int = 1) -> None:
+    """Drains the ingest queue with given number of worker processes.
+
+    Any number of nodes may run workers at the same time, each claims its own
+    batches.
+
+    Args:
+        processes: Number of worker processes.
+    """
+    log.info("Draining ingest queue.")
+
+    if processes <= 1:
+        run_worker(1)
+        return
+
+    context = mp.get_context("spawn")
+    workers = [
+        context.Process(target=run_worker, args=(processes,), daemon=True)
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    failed_workers = [w.name for w in workers if w.exitcode != 0]
+    if failed_workers:
+        log.error(f"Workers {failed_workers} exited with error, rerun to resume.")
@@ -4,9 +4,17 @@ This module contains functions for processing different types of PDB data update
 - New entries
 - Modified entries
 - Obsolete entries
-It also handles failed fetches and provides event listeners for job status monitoring.
+It also retries failed fetches with backoff and provides event listeners for job
+status monitoring.
+Entries are downloaded concurrently over a shared connection pool and stored in
+batches.
 """
 
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
 from apscheduler.events import (
     EVENT_JOB_ERROR,
     EVENT_JOB_EXECUTED,
@@ -14,69 +22,242 @@ from apscheduler.events import (
     SchedulerEvent,
 )
 
-from app.services import ProteinService, FileService, FailedFetchService
-from app.database.database import db_context
+from app.config import (
+    FAILED_RETRY_BATCH_SIZE,
+    PDB_INGEST_QUEUE,
+    PDB_SYNC_BATCH_SIZE,
+    PDB_SYNC_MAX_WEEKS,
+    SYNC_LOCK_ID,
+)
+from app.services import (
+    FailedFetchService,
+    FileService,
+    ProteinService,
+    SyncStateService,
+)
+from app.database.database import db_context, is_lock_shared, shared_lock
+from app.database.models import (
+    Operations,
+    OPERATIONS_NAMES,
+)
+from app.fetch.buffer import InsertBuffer
+from app.fetch.client import HttpClient
+from app.fetch.ingest import enqueue_failed
+from app.fetch.load import (
+    enqueue_entries,
+    fetch_files,
+    fetch_versions,
+    get_file_urls,
+    insert_failed,
+    insert_files,
+)
 from app.fetch.utils import (
-    fetch_file_at_version,
-    get_last_version,
+    fetch_last_versions,
+    fetch_list_file,
     get_full_id,
-    get_last_date,
-    get_list_file,
+    get_next_date,
+    get_status_dates,
 )
 from app.log import log as log
 
+# Prevents overlapping synchronization of the same weekly lists.
+SYNC_LOCKS = {operation: Lock() for operation in Operations}
 
-def process_failed(failed: list[str], failed_fetch_service: FailedFetchService):
-    """Store information about failed fetches for future repeat.
 
-    Args:
-        failed: List of tuples containing protein IDs and error messages.
-        failed_fetch_service: Service for handling failed fetch records.
+def is_sync_running() -> bool:
+    """Checks whether weekly synchronization is running in any process.
+
+    Returns:
+        True if a sync holds its lock in this process or the shared sync lock
+            in the database.
     """
-    log.debug("Storing failed entries for later processing.")
-    for entry in failed:
-        failed_fetch_service.insert_failed_fetch(protein_id=entry[0], error=entry[1])
+    if any(lock.locked() for lock in SYNC_LOCKS.values()):
+        return True
 
+    return is_lock_shared(SYNC_LOCK_ID)
 
-def process_valid(new: bool):
-    """Processes added or updated entries based on flag.
 
-    This function handles both new and modified PDB entries by fetching their files
-    and storing them in the database. Failed operations are tracked for later retry.
+async def sync_entries(
+    ids: list[str],
+    operation: Operations,
+    batch_size: int = PDB_SYNC_BATCH_SIZE,
+    enqueue: bool = PDB_INGEST_QUEUE,
+) -> int:
+    """Downloads and stores latest versions of given entries in batches.
+
+    New entries are stored at version 1, versions of modified entries are
+    resolved with batched Data API requests. Each batch is downloaded
+    concurrently into an insert buffer, which stores files in a worker thread
+    whenever its byte budget is reached.
+    With enqueue set, resolved versions are put into the ingest queue for
+    ingest workers instead.
 
     Args:
-        If True, process new entries; if False, process modified entries.
+        ids: List of PDB IDs.
+        operation: The operation recorded for stored entries.
+        batch_size: Maximum number of entries stored at once.
+        enqueue: If True, queue entries for ingest workers instead of fetching.
+
+    Returns:
+        Number of entries which failed to be fetched.
     """
-    log.debug(f"Processing {'new' if new else 'modified'} entries.")
-    last_date = get_last_date()
-    file_name = "added" if new else "removed"
-    added = get_list_file(last_date, file_name)
+    failures = 0
 
-    with db_context() as session:
-        file_service = FileService(session)
-        failed = []
+    async with HttpClient() as client:
+        for i in range(0, len(ids), batch_size):
+            batch = ids[i : i + batch_size]
 
-        for id in added:
-            full_id = get_full_id(id)
-            version = 1 if new else get_last_version(id=id)
+            if operation == Operations.ADDED:
+                id_to_version = {id: 1 for id in batch}
+            else:
+                id_to_version = await fetch_last_versions(client, batch)
 
-            file, error = fetch_file_at_version(full_id, version)
+            file_urls = get_file_urls(batch, id_to_version)
+            failed = [(id, "Version not found.") for id in batch if id not in file_urls]
 
-            if error:
-                failed.append((full_id, f"Fetch error: {error} "))
+            if enqueue:
+                entries = [(get_full_id(id), id_to_version[id]) for id in file_urls]
+                await asyncio.to_thread(enqueue_entries, entries, operation)
             else:
-                result = file_service.insert_new_version(
-                    protein_id=full_id, file=file, version=version
+                buffer = InsertBuffer(insert_files)
+                fetch_failed = await fetch_files(
+                    client, file_urls, id_to_version, buffer, operation
                 )
-                if not result:
-                    failed.append((full_id, f"Insert error: {result}"))
+                await buffer.flush()
+                failed = fetch_failed + failed
+
+            if failed:
+                await asyncio.to_thread(insert_failed, failed, id_to_version, operation)
+
+            failures += len(failed)
+            log.debug(f"Processed {len(batch)} entries with {len(failed)} failures.")
+
+    return failures
+
+
+def get_pending_dates(operation: Operations) -> list[str]:
+    """Returns dates of weekly lists of an operation which weren't processed yet.
+
+    Args:
+        operation: The operation whose lists are processed.
+
+    Returns:
+        List of date strings in YYYYMMDD format, oldest first.
+    """
+    with db_context() as session:
+        last_date = SyncStateService(session).get_last_date(operation)
+
+    dates = get_status_dates(last_date)
+    if last_date is not None and dates and dates[0] > get_next_date(last_date):
+        log.warning(
+            f"More than {PDB_SYNC_MAX_WEEKS} weeks of {OPERATIONS_NAMES[operation]} "
+            "entries were missed, run reconciliation or full load to fill the gap."
+        )
+
+    return dates
+
+
+def set_synced_date(operation: Operations, last_date: str) -> None:
+    """Records the date of the last processed list of an operation.
+
+    Args:
+        operation: The operation whose lists are processed.
+        last_date: Date in YYYYMMDD format.
+    """
+    with db_context() as session:
+        SyncStateService(session).set_last_date(operation, last_date)
+
+
+async def fetch_list_files(
+    dates: list[str], file_name: str
+) -> tuple[list[str], str | None]:
+    """Fetches weekly lists of given dates concurrently.
+
+    Args:
+        dates: List of date strings in YYYYMMDD format, oldest first.
+        file_name: The type of entries to fetch ('added', 'modified', or 'obsolete').
+
+    Returns:
+        A tuple containing:
+            - list[str]: Unique PDB IDs of all consecutive fetched lists
+            - str | None: Date of the last list fetched without a gap before it
+    """
+    async with HttpClient() as client:
+        lists = await asyncio.gather(
+            *(fetch_list_file(client, date, file_name) for date in dates)
+        )
+
+    ids, synced = [], None
+    for date, listed in zip(dates, lists):
+        if listed is None:
+            break
+
+        ids += listed
+        synced = date
+
+    return list(dict.fromkeys(ids)), synced
+
+
+def sync_lists(operation: Operations, handler: Callable[[list[str]], None]) -> None:
+    """Processes all weekly lists of an operation missed since the last sync.
+
+    Lists of all missing weeks are fetched at once and their entries handled
+    together. The state advances to the last list fetched without a gap, so
+    a week failing with a transient error is retried on the next run, while a
+    week upstream has no list for is skipped. Runs of the same operation
+    never overlap, a run started meanwhile is skipped. While running, the sync
+    holds the shared sync lock, so other processes can pause for it.
+
+    Args:
+        operation: The operation whose lists are processed.
+        handler: Function processing the listed PDB IDs.
+    """
+    file_name = OPERATIONS_NAMES[operation]
+    lock = SYNC_LOCKS[operation]
+
+    if not lock.acquire(blocking=False):
+        log.info(f"Synchronization of {file_name} entries is already running.")
+        return
+
+    try:
+        dates = get_pending_dates(operation)
+        if not dates:
+            log.debug(f"No new lists of {file_name} entries.")
+            return
+
+        with shared_lock(SYNC_LOCK_ID):
+            log.debug(f"Processing {file_name} entries of {dates}.")
+            ids, synced = asyncio.run(fetch_list_files(dates, file_name))
+
+            if ids:
+                handler(ids)
+
+            if synced is not None:
+                set_synced_date(operation, synced)
+    finally:
+        lock.release()
+
+
+def process_valid(new: bool):
+    """Processes added or updated entries based on flag.
+
+    This function handles both new and modified PDB entries by fetching their files
+    and storing them in the database. Failed operations are tracked for later retry.
+    All weeks missed since the last synchronization are caught up.
 
-        if added:
-            log.debug(f"Finished processing new entries with {len(failed)} failures.")
+    Args:
+        new: If True, process new entries; if False, process modified entries.
+    """
+    operation = Operations.ADDED if new else Operations.MODIFIED
+
+    def handler(ids: list[str]) -> None:
+        failures = asyncio.run(sync_entries(ids, operation))
+        log.debug(
+            f"Finished processing {len(ids)} {OPERATIONS_NAMES[operation]} entries "
+            f"with {failures} failures."
+        )
 
-        if failed:
-            failed_service = FailedFetchService(session)
-            process_failed(failed, failed_service)
+    sync_lists(operation, handler)
 
 
 def process_added() -> None:
@@ -99,35 +280,198 @@ def process_modified() -> None:
     process_valid(new=False)
 
 
+def deprecate_entries(ids: list[str]) -> None:
+    """Marks given entries as deprecated with a single bulk update.
+
+    Entries missing in the mirror are only logged, there is nothing to deprecate.
+
+    Args:
+        ids: List of PDB IDs.
+    """
+    obsolete = [get_full_id(id) for id in ids]
+
+    with db_context() as session:
+        protein_service = ProteinService(session)
+        deprecated = protein_service.deprecate_proteins(obsolete)
+
+    missing = set(obsolete) - set(deprecated)
+    if missing:
+        log.warning(f"Obsolete entries not found in database: {sorted(missing)}")
+
+    log.debug(f"Finished processing obsolete entries, deprecated {len(deprecated)}.")
+
+
 def process_obsolete() -> None:
     """Handles processing of removed entries.
 
-    This function processes PDB entries that have been marked as obsolete,
-    updating their status in the database and tracking any failures.
+    This function processes PDB entries that have been marked as obsolete since
+    the last synchronization, updating their status in the database.
     """
     log.debug("Processing obsolete entries.")
-    last_date = get_last_date()
-    obsolete = get_list_file(last_date, "obsolete")
+    sync_lists(Operations.OBSOLETE, deprecate_entries)
 
+
+def catch_up() -> None:
+    """Processes all weekly lists missed while the sync worker was down.
+
+    Operations are caught up in parallel, each one skips if its regular job is
+    already running.
+    """
+    log.debug("Catching up on missed weekly lists.")
+    jobs = (process_added, process_modified, process_obsolete)
+
+    with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+        for future in [executor.submit(job) for job in jobs]:
+            future.result()
+
+
+def get_due_failed(limit: int) -> list[tuple]:
+    """Claims failed fetches due to be retried.
+
+    Args:
+        limit: Maximum number of records to claim.
+
+    Returns:
+        List of (id, protein_id, version, operation_flag) tuples.
+    """
     with db_context() as session:
-        protein_service = ProteinService(session)
-        failed = []
+        return FailedFetchService(session).claim_due_failed_fetches(limit)
+
+
+def settle_failed(resolved: list[tuple[str, int]], failed: list[tuple[int, str]]):
+    """Removes resolved failed fetches and postpones the ones failing again.
+
+    Args:
+        resolved: List of (protein_id, version) tuples which were stored.
+        failed: List of (id, error) tuples of records which failed again.
+    """
+    with db_context() as session:
+        failed_service = FailedFetchService(session)
+        failed_service.resolve_failed_fetches(resolved)
+        failed_service.postpone_failed_fetches(failed)
+
+
+def deprecate_obsolete(ids: list[str]) -> list[str]:
+    """Marks given proteins as deprecated.
+
+    Args:
+        ids: List of protein IDs.
+
+    Returns:
+        List of protein IDs which were found and deprecated.
+    """
+    with db_context() as session:
+        return ProteinService(session).deprecate_proteins(ids)
+
+
+async def retry_failed_batch(client: HttpClient, records: list[tuple]) -> int:
+    """Retries a batch of failed fetches concurrently.
+
+    Each protein version is fetched once even if it failed repeatedly. Stored
+    versions are removed from failed fetches, failing ones are postponed.
 
-        for id in obsolete:
-            full_id = get_full_id(id)
-            result = protein_service.deprecate_protein(protein_id=full_id)
+    Args:
+        client: Pooled HTTP client.
+        records: List of (id, protein_id, version, operation_flag) tuples.
 
-            if not result:
-                failed.append((full_id, f"Insert error. {result}"))
+    Returns:
+        Number of resolved protein versions.
+    """
+    entries: dict[tuple[str, int], list] = {}
+    for id, protein_id, version, flag in records:
+        entries.setdefault((protein_id, version), []).append((id, flag))
+
+    obsolete = [
+        key for key, rows in entries.items() if rows[0][1] == Operations.OBSOLETE.value
+    ]
+    deprecated = set()
+    if obsolete:
+        ids = [protein_id for protein_id, _ in obsolete]
+        deprecated = set(await asyncio.to_thread(deprecate_obsolete, ids))
+
+    fetched = [key for key in entries if key not in obsolete]
+    buffer = InsertBuffer(insert_files)
+    errors = await fetch_versions(
+        client,
+        [
+            (protein_id, version, entries[(protein_id, version)][0][1])
+            for protein_id, version in fetched
+        ],
+        buffer,
+    )
+    await buffer.flush()
+
+    resolved = [key for key in obsolete if key[0] in deprecated]
+    failed = [
+        (id, "Protein not found.")
+        for key in obsolete
+        if key[0] not in deprecated
+        for id, _ in entries[key]
+    ]
+
+    for key, error in zip(fetched, errors):
+        if error is None:
+            resolved.append(key)
+        else:
+            failed += [(id, str(error)) for id, _ in entries[key]]
+
+    await asyncio.to_thread(settle_failed, resolved, failed)
+
+    return len(resolved)
+
+
+async def retry_failed(batch_size: int = FAILED_RETRY_BATCH_SIZE) -> tuple[int, int]:
+    """Retries all due failed fetches in bounded batches.
+
+    Every retried record is either removed or postponed, so the loop ends once
+    no record is due.
 
-        if obsolete:
-            log.debug(
-                f"Finished processing obsolete entries with {len(failed)} failures."
-            )
+    Args:
+        batch_size: Maximum number of records retried at once.
 
-        if failed:
-            failed_service = FailedFetchService(session)
-            process_failed(failed, failed_service)
+    Returns:
+        Tuple of numbers of retried records and resolved protein versions.
+    """
+    retried, resolved = 0, 0
+
+    async with HttpClient() as client:
+        while records := await asyncio.to_thread(get_due_failed, batch_size):
+            resolved += await retry_failed_batch(client, records)
+            retried += len(records)
+
+    return retried, resolved
+
+
+def process_failed(enqueue: bool = PDB_INGEST_QUEUE) -> None:
+    """Retries failed fetches whose backoff has passed.
+
+    Failures heal on their own, so a temporary outage doesn't require a new
+    full load. Records failing repeatedly are retried less and less often and
+    left alone after the configured number of attempts.
+    With enqueue set, due records are handed to ingest workers, which count
+    their retries the same way, and only obsolete entries are retried here.
+
+    Args:
+        enqueue: If True, queue due records for ingest workers.
+    """
+    log.debug("Retrying failed fetches.")
+    if enqueue:
+        queued = enqueue_failed()
+        log.info(f"Queued {queued} failed fetches for ingest.")
+
+    retried, resolved = asyncio.run(retry_failed())
+
+    if retried:
+        log.info(f"Retried {retried} failed fetches, resolved {resolved} entries.")
+
+
+def compact_versions() -> None:
+    """Keeps older versions of stored files as deltas against newer ones."""
+    log.info("Encoding older versions as deltas.")
+    with db_context() as session:
+        encoded = FileService(session).compact_versions()
+
+    log.info(f"Delta encoding finished, encoded {encoded} versions.")
 
 
 def event_listener(event: SchedulerEvent):
@@ -146,6 +490,6 @@ def event_listener(event: SchedulerEvent):
     elif event.code == EVENT_JOB_EXECUTED:
         log.info("Fetching job finished.")
     elif event.code == EVENT_JOB_MISSED:
-        log.debug(
-            "Fetching job missed it's planned execution. It will be re-executed at next planned date."
+        log.warning(
+            "Fetching job missed it's planned execution. Missed weeks will be caught up on its next run."
         )
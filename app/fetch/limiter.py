@@ -0,0 +1,164 @@
+"""Adaptive rate limiting module for outbound PDB requests.
+
+This module provides a limiter combining a token bucket with AIMD (additive
+increase, multiplicative decrease) concurrency control. Each upstream gets its own
+limiter which backs off when the upstream answers with 429/503 or a Retry-After
+header, and slowly ramps back up to the configured maximum while it stays healthy.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from time import monotonic
+
+from app.log import log as log
+
+__all__ = ["AdaptiveLimiter", "THROTTLE_CODES", "parse_retry_after"]
+
+# Status codes signalling that upstream wants us to slow down.
+THROTTLE_CODES = (429, 503)
+
+# Pause used when throttled upstream doesn't send Retry-After.
+DEFAULT_RETRY_AFTER = 1.0  # Seconds
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parses value of Retry-After header.
+
+    Args:
+        value: Header value, either delay in seconds or HTTP date.
+
+    Returns:
+        Delay in seconds, None if header is missing or malformed.
+    """
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class AdaptiveLimiter:
+    """Token bucket and AIMD concurrency limiter for a single upstream.
+
+    Both the request rate and the number of concurrent requests scale with the
+    current concurrency limit. The limit halves whenever upstream throttles and
+    grows by one after a full window of successful responses.
+
+    Args:
+        name: Name of the upstream, used in logs.
+        rate: Maximum number of requests per second.
+        concurrency: Maximum number of concurrent requests.
+        min_concurrency: Lower bound for the concurrency limit.
+    """
+
+    def __init__(
+        self, name: str, rate: float, concurrency: int, min_concurrency: int = 1
+    ):
+        self.name = name
+        self.max_rate = rate
+        self.max_concurrency = concurrency
+        self.min_concurrency = min(min_concurrency, concurrency)
+        self.limit = float(concurrency)
+        self.active = 0
+        self.tokens = 1.0
+        self.updated = monotonic()
+        self.blocked_until = 0.0
+        self._condition = asyncio.Condition()
+
+    @property
+    def rate(self) -> float:
+        """Current allowed number of requests per second."""
+        return self.max_rate * self.limit / self.max_concurrency
+
+    def _take_token(self) -> float:
+        """Takes a token from the bucket if available.
+
+        Returns:
+            Seconds to wait before next attempt, 0 if token was taken.
+        """
+        now = monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+
+        burst = max(self.rate, 1.0)
+        self.tokens = min(burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0
+
+        return (1.0 - self.tokens) / self.rate
+
+    async def acquire(self) -> None:
+        """Waits for free concurrency slot and rate token.
+
+        If cancelled while waiting for a token, the taken slot is given back.
+        """
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+
+        try:
+            while (wait := self._take_token()) > 0:
+                await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            async with self._condition:
+                self.active -= 1
+                self._condition.notify_all()
+            raise
+
+    async def release(self, status: int | None, retry_after: float | None = None):
+        """Releases concurrency slot and adapts limits to the response.
+
+        Args:
+            status: Status code of the response, None on transport error.
+            retry_after: Delay requested by upstream in seconds, if any.
+        """
+        async with self._condition:
+            self.active -= 1
+
+            if status in THROTTLE_CODES:
+                self._decrease(retry_after)
+            elif status is not None and status < 500:
+                self._increase()
+
+            self._condition.notify_all()
+
+    def _increase(self) -> None:
+        """Additively raises concurrency limit by one per window of successes."""
+        if self.limit < self.max_concurrency:
+            self.limit = min(self.limit + 1 / self.limit, self.max_concurrency)
+
+    def _decrease(self, retry_after: float | None) -> None:
+        """Halves concurrency limit and pauses upstream for requested delay.
+
+        Responses throttled during an already running pause only extend it, so
+        a burst of in-flight rejections halves the limit just once.
+        """
+        delay = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER
+        now = monotonic()
+        paused = now < self.blocked_until
+        self.blocked_until = max(self.blocked_until, now + delay)
+
+        if paused:
+            return
+
+        previous = self.limit
+        self.limit = max(self.limit / 2, self.min_concurrency)
+        self.tokens = min(self.tokens, 0.0)
+
+        log.warning(
+            f"Upstream '{self.name}' throttled, lowering concurrency "
+            f"{int(previous)} -> {int(self.limit)} and pausing for {delay}s."
+        )
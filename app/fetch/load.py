@@ -1,43 +1,75 @@
 """Data loading module for PDB entries.
 
 This module provides functions for fetching and loading PDB entries into the database,
-including parallel processing capabilities and error handling.
+including parallel processing capabilities and error handling. Network requests are
+issued concurrently on a single asyncio event loop over a shared connection pool.
 """
 
-from requests import get
-import concurrent.futures as cf
+import asyncio
+import multiprocessing as mp
+from functools import partial
+from multiprocessing.connection import wait
 from math import ceil
 from datetime import datetime as dt
-from time import sleep
 import logging
 
 from app.log import log as log
-from app.config import WORKER_LIMIT, PDB_SEARCH_API_LIMIT
+from app.config import (
+    WORKER_LIMIT,
+    PDB_LOAD_PROGRESS_INTERVAL,
+    PDB_LOAD_QUEUE_SIZE,
+    PDB_RATE_LIMITS,
+    PDB_SEARCH_API_LIMIT,
+)
+from httpx import HTTPError
+
+from app.fetch.buffer import InsertBuffer
+from app.fetch.client import HttpClient
+from app.fetch.retry import CircuitOpenError
 from app.fetch.utils import (
-    get_last_version,
+    FetchError,
+    fetch_last_versions,
     get_search_url,
     get_file_url,
-    get_file,
+    fetch_file,
     get_full_id,
+    get_short_id,
+)
+from app.fetch.progress import LoadProgress
+from app.services import (
+    FileService,
+    FailedFetchService,
+    IngestQueueService,
+    LoadRunService,
 )
-from app.services import ProteinService, FileService
 from app.database.database import db_context
-from app.database.models import FileInsert, ChangeInsert, Operations
+from app.database.models import (
+    FileInsert,
+    ChangeInsert,
+    Operations,
+    LoadRun,
+    EntryStatus,
+)
 
 
-def fetch_ids(start: int, limit: int) -> list[str]:
+async def fetch_ids(client: HttpClient, start: int, limit: int) -> dict | None:
     """Fetches a list of PDB IDs based on start and limit parameters.
 
     Args:
+        client: Pooled HTTP client.
         start: The starting index for pagination.
         limit: The maximum number of IDs to fetch.
 
     Returns:
-        List of PDB IDs if successful, None if the request fails.
+        Search API response body if successful, None if the request fails.
     """
     url = get_search_url(start=start, limit=limit)
 
-    response = get(url)
+    try:
+        response = await client.get(url)
+    except (HTTPError, CircuitOpenError) as e:
+        log.error(f"Search request failed with error: {e!r}")
+        return None
 
     if response.status_code == 200:
         return response.json()
@@ -47,17 +79,20 @@ def fetch_ids(start: int, limit: int) -> list[str]:
     return None
 
 
-def get_latest_versions(ids: list[str]) -> dict:
+async def get_latest_versions(client: HttpClient, ids: list[str]) -> dict:
     """Returns dictionary of latest versions of each protein ID.
 
+    Versions are resolved with multi-entry Data API queries, one request per
+    PDB_DATA_API_BATCH_SIZE IDs.
+
     Args:
+        client: Pooled HTTP client.
         ids: List of PDB IDs to fetch versions for.
 
     Returns:
         Dictionary mapping PDB IDs to their latest version numbers.
     """
-    with cf.ThreadPoolExecutor(max_workers=WORKER_LIMIT) as executor:
-        id_to_version = dict(zip(ids, executor.map(get_last_version, ids)))
+    id_to_version = await fetch_last_versions(client, ids)
 
     return id_to_version
 
@@ -65,6 +100,8 @@ def get_latest_versions(ids: list[str]) -> dict:
 def get_file_urls(ids: list[str], id_to_version: dict) -> dict:
     """Returns url for fetching latest file for each protein ID.
 
+    IDs without a resolved version are skipped.
+
     Args:
         ids: List of PDB IDs.
         id_to_version: Dictionary mapping PDB IDs to their versions.
@@ -75,163 +112,783 @@ def get_file_urls(ids: list[str], id_to_version: dict) -> dict:
     file_urls = {}
     for id in ids:
         version = id_to_version[id]
-        file_urls[id] = get_file_url(id, version)
+        if version is not None:
+            file_urls[id] = get_file_url(id, version)
 
     return file_urls
 
 
-def fetch_files(file_urls: dict, id_to_version: dict) -> tuple:
-    """Fetches files from given urls and returns SQLModel objects for insertion.
+async def fetch_versions(
+    client: HttpClient,
+    versions: list[tuple[str, int, int | None]],
+    buffer: InsertBuffer,
+) -> list[FetchError | None]:
+    """Fetches given protein versions into an insert buffer.
+
+    Files are streamed into the buffer, reserving its byte budget chunk by
+    chunk, and added as soon as they are complete, so neither the batch nor
+    downloads in progress exceed the budget. Files may still be buffered on
+    return, the caller flushes the buffer.
 
     Args:
-        file_urls: Dictionary mapping PDB IDs to their file URLs.
-        id_to_version: Dictionary mapping PDB IDs to their versions.
+        client: Pooled HTTP client.
+        versions: List of (protein_id, version, operation_flag) tuples, files
+            with operation_flag None are stored without a change record.
+        buffer: Buffer storing fetched files.
 
     Returns:
-        A tuple containing:
-            - list[FileInsert]: List of file objects to insert
-            - list[ChangeInsert]: List of change objects to insert
-            - list[str]: List of failed PDB IDs
+        List of errors aligned with versions, None for fetched ones.
     """
-    with cf.ThreadPoolExecutor(max_workers=WORKER_LIMIT) as executor:
-        id_to_data = dict(
-            zip(file_urls.keys(), executor.map(get_file, file_urls.values()))
-        )
 
-    failed = []
-    files_to_insert = []
-    changes_to_insert = []
+    async def fetch(
+        protein_id: str, version: int, flag: int | None
+    ) -> FetchError | None:
+        async with buffer.download() as download:
+            url = get_file_url(get_short_id(protein_id), version)
+            data, error = await fetch_file(client, url, download)
+            if not data:
+                status = error.status if error else None
+                return FetchError(f"Fetch error: {error}", status)
+
+            new_file = FileInsert(protein_id=protein_id, version=version, file=data)
+            new_change = None
+            if flag is not None:
+                new_change = ChangeInsert(
+                    file_id=0,  # placeholder
+                    protein_id=protein_id,
+                    operation_flag=flag,
+                    timestamp=dt.now(),
+                )
+            await download.add(new_file, new_change)
+
+        return None
+
+    return await asyncio.gather(*(fetch(*entry) for entry in versions))
+
+
+async def fetch_files(
+    client: HttpClient,
+    file_urls: dict,
+    id_to_version: dict,
+    buffer: InsertBuffer,
+    operation: Operations = Operations.ADDED,
+) -> list[tuple]:
+    """Fetches files of given IDs into an insert buffer.
+
+    Files may still be buffered on return, the caller flushes the buffer.
 
-    for id, data in id_to_data.items():
-        if data:
-            full_id = get_full_id(id)
-            version = id_to_version[id]
+    Args:
+        client: Pooled HTTP client.
+        file_urls: Dictionary mapping PDB IDs to their file URLs.
+        id_to_version: Dictionary mapping PDB IDs to their versions.
+        buffer: Buffer storing fetched files.
+        operation: The operation recorded in changes of fetched files.
 
-            new_file = FileInsert(protein_id=full_id, version=version, file=data)
-            files_to_insert.append(new_file)
+    Returns:
+        List of failed PDB IDs with error messages.
+    """
+    versions = [
+        (get_full_id(id), id_to_version[id], operation.value) for id in file_urls
+    ]
+    errors = await fetch_versions(client, versions, buffer)
 
-            new_change = ChangeInsert(
-                file_id=0,  # placeholder
-                protein_id=full_id,
-                operation_flag=Operations.ADDED.value,
-                timestamp=dt.now(),
-            )
-            changes_to_insert.append(new_change)
-        else:
-            failed.append(id)
+    return [(id, str(error)) for id, error in zip(file_urls, errors) if error]
 
-    return files_to_insert, changes_to_insert, failed
 
+def insert_files(
+    files: list[FileInsert], changes: list[ChangeInsert], run: LoadRun | None = None
+) -> None:
+    """Inserts multiple new file entries at once using binary COPY.
 
-def insert_files(files: list[FileInsert], changes: list[ChangeInsert]) -> None:
-    """Inserts multiple new file entries at once.
+    Missing proteins are created and already stored versions skipped, so a
+    repeated batch doesn't create duplicates.
 
     Args:
         files: List of file objects to insert.
         changes: List of change objects to insert.
+        run: Load run in which the files are recorded as done once committed.
     """
     with db_context() as session:
-        protein_service = ProteinService(session)
         file_service = FileService(session)
+        file_service.copy_new_files(files, changes)
 
-        ids = [file.protein_id for file in files]
-        protein_service.bulk_insert_new_proteins(ids=ids)
+        if run is not None:
+            LoadRunService(session).record_entries(
+                run, {file.protein_id: file.version for file in files}, EntryStatus.DONE
+            )
 
-        batch_size = 100
-        for i in range(0, len(files), batch_size):
-            batch_files = files[i : i + batch_size]
-            batch_changes = changes[i : i + batch_size] if i < len(changes) else []
-            file_service.bulk_insert_new_files(batch_files, batch_changes)
 
+def insert_failed(
+    failed: list[tuple],
+    id_to_version: dict[str, int | None],
+    operation: Operations = Operations.ADDED,
+    run: LoadRun | None = None,
+) -> None:
+    """Stores failed entries for later processing.
 
-def fetch_all(start: int, total: int) -> None:
-    """Fetches IDs and corresponding latest file entries and stores them in database.
+    Args:
+        failed: List of tuples containing PDB IDs and error messages.
+        id_to_version: Mapping of PDB IDs to versions which failed to fetch.
+        operation: The operation that failed.
+        run: Load run in which the entries are recorded as failed.
+    """
+    with db_context() as session:
+        failed_service = FailedFetchService(session)
+        failed_service.insert_failed_fetches(
+            [(get_full_id(id), id_to_version.get(id), error) for id, error in failed],
+            operation,
+        )
+
+        if run is not None:
+            LoadRunService(session).record_entries(
+                run,
+                {get_full_id(id): id_to_version.get(id) for id, _ in failed},
+                EntryStatus.FAILED,
+            )
+
+
+def enqueue_entries(
+    entries: list[tuple[str, int]], operation: Operations = Operations.ADDED
+) -> int:
+    """Queues entry versions for ingest workers instead of fetching them here.
 
-    Uses threads to speed up the fetching but requires explicit timeout after given batch,
-    to avoid overwhelming PDB APIs.
+    Args:
+        entries: List of (protein_id, version) tuples.
+        operation: The operation recorded for stored files.
+
+    Returns:
+        Number of newly queued tasks.
+    """
+    with db_context() as session:
+        return IngestQueueService(session).enqueue(entries, operation)
+
+
+def get_processed_ids(run: LoadRun, ids: list[str]) -> set[str]:
+    """Returns which of given IDs were already stored in the run.
 
     Args:
-        start: The starting index for fetching.
-        total: Total number of IDs to process.
+        run: The processed load run.
+        ids: List of PDB IDs.
+
+    Returns:
+        Set of PDB IDs which don't need to be fetched again.
     """
-    log.debug("Entry fetching stareted.")
+    full_ids = {get_full_id(id): id for id in ids}
+
+    with db_context() as session:
+        load_run_service = LoadRunService(session)
+        processed = load_run_service.get_processed_ids(run, list(full_ids))
+
+    return {full_ids[full_id] for full_id in processed}
+
+
+def get_stored_ids(ids: list[str], id_to_version: dict) -> set[str]:
+    """Returns which of given IDs are already stored at their resolved version.
+
+    Args:
+        ids: List of PDB IDs.
+        id_to_version: Dictionary mapping PDB IDs to their versions.
+
+    Returns:
+        Set of PDB IDs whose resolved version doesn't need to be fetched.
+    """
+    versions = {
+        get_full_id(id): [version]
+        for id in ids
+        if (version := id_to_version[id]) is not None
+    }
+    if not versions:
+        return set()
+
+    with db_context() as session:
+        missing = FileService(session).get_missing_versions(versions)
+
+    missing_ids = {protein_id for protein_id, _ in missing}
+
+    return {
+        id
+        for id in ids
+        if id_to_version[id] is not None and get_full_id(id) not in missing_ids
+    }
+
 
-    logging.getLogger("requests").setLevel(logging.WARNING)
-    logging.getLogger("urllib3").setLevel(logging.WARNING)
+def get_run_progress(run: LoadRun) -> tuple[int, int]:
+    """Returns number of processed and failed entries of the run.
 
-    starts = [x for x in range(start, total, PDB_SEARCH_API_LIMIT)]
-    log.debug(f"Created range starts: {starts}")
-    total_processed = 0
-    total_failed = 0
+    Args:
+        run: The processed load run.
+
+    Returns:
+        Tuple of processed and failed counts over completed pages.
+    """
+    with db_context() as session:
+        return LoadRunService(session).get_progress(run)
+
+
+def complete_page(
+    run: LoadRun, start: int, count: int, stored: dict, failed: int
+) -> None:
+    """Records entries stored before the run and marks the page as completed.
+
+    Fetched and failed entries are recorded as their batches commit, so an
+    interrupted page only repeats what wasn't committed.
+
+    Args:
+        run: The processed load run.
+        start: Search API index of the page.
+        count: Number of entries on the page.
+        stored: Dictionary mapping protein IDs already stored at their latest
+            version to their versions.
+        failed: Number of entries which failed on the page.
+    """
+    with db_context() as session:
+        load_run_service = LoadRunService(session)
+        load_run_service.record_entries(run, stored, EntryStatus.DONE)
+        load_run_service.complete_page(run, start, count, failed)
+
+
+async def search_stage(client: HttpClient, starts: list[int], output: asyncio.Queue):
+    """Pipeline stage fetching pages of IDs from Search API.
+
+    Args:
+        client: Pooled HTTP client.
+        starts: Starting indices of pages to fetch.
+        output: Queue receiving tuples of page index and its IDs, closed with None.
+    """
     for start in starts:
-        url = get_search_url(start=start, limit=PDB_SEARCH_API_LIMIT)
-        response = get(url)
-        if response.status_code == 200 and "result_set" in (
-            formatted := response.json()
-        ):
+        formatted = await fetch_ids(client, start=start, limit=PDB_SEARCH_API_LIMIT)
+        if formatted and "result_set" in formatted:
             ids = [entry["identifier"] for entry in formatted["result_set"]]
-            log.debug(f"Received {len(ids)} ids.")
+            log.debug(f"Received {len(ids)} ids from page starting at {start}.")
+            await output.put((start, ids))
+        else:
+            log.error(f"No ids received for page starting at {start}.")
 
-            id_to_version = get_latest_versions(ids)
-            file_urls = get_file_urls(ids, id_to_version)
+    await output.put(None)
 
-            files_to_insert, changes_to_insert, failed_batch = fetch_files(
-                file_urls, id_to_version
-            )
 
-            insert_files(files_to_insert, changes_to_insert)
+async def version_stage(
+    client: HttpClient, run: LoadRun, input: asyncio.Queue, output: asyncio.Queue
+):
+    """Pipeline stage resolving latest versions of received IDs.
+
+    IDs already stored earlier in the run are skipped, so a resumed page only
+    fetches what is missing.
+
+    Args:
+        client: Pooled HTTP client.
+        run: The processed load run.
+        input: Queue with tuples of page index and its IDs.
+        output: Queue receiving tuples of page index, page size, IDs and their
+            versions, closed with None.
+    """
+    while (item := await input.get()) is not None:
+        start, page_ids = item
+        processed = await asyncio.to_thread(get_processed_ids, run, page_ids)
+        if processed:
+            log.debug(f"Skipping {len(processed)} ids already stored in this run.")
+
+        ids = [id for id in page_ids if id not in processed]
+        id_to_version = await get_latest_versions(client, ids) if ids else {}
+        await output.put((start, len(page_ids), ids, id_to_version))
+
+    await output.put(None)
+
+
+async def diff_stage(input: asyncio.Queue, output: asyncio.Queue):
+    """Pipeline stage dropping IDs whose resolved version is already stored.
+
+    Stored versions are found with a single query per page, so a re-run only
+    costs metadata lookups for entries which didn't change.
 
-            total_processed += len(ids)
-            total_failed += len(failed_batch)
-            if failed_batch:
-                log.debug(f"Number of failed ids: {len(failed_batch)}")
-                with open("failed.txt", "a+") as file:
-                    file.write("\n".join([x for x in failed_batch]))
-        log.debug(
-            f"Total processed: {total_processed} -- Total failed: {total_failed}."
+    Args:
+        input: Queue with tuples of page index, page size, IDs and their versions.
+        output: Queue receiving tuples of page index, page size, IDs to fetch,
+            their versions and already stored versions, closed with None.
+    """
+    while (item := await input.get()) is not None:
+        start, count, ids, id_to_version = item
+
+        stored_ids = await asyncio.to_thread(get_stored_ids, ids, id_to_version)
+        if stored_ids:
+            log.debug(f"Skipping {len(stored_ids)} ids stored at latest version.")
+
+        stored = {get_full_id(id): id_to_version[id] for id in stored_ids}
+        ids = [id for id in ids if id not in stored_ids]
+        await output.put((start, count, ids, id_to_version, stored))
+
+    await output.put(None)
+
+
+async def download_stage(
+    client: HttpClient, run: LoadRun, input: asyncio.Queue, output: asyncio.Queue
+):
+    """Pipeline stage downloading and storing files of received IDs.
+
+    Downloads are stored through an insert buffer flushed by byte budget, so
+    memory stays flat regardless of page size and file sizes. Each stored batch
+    records its entries as done in the run.
+
+    Args:
+        client: Pooled HTTP client.
+        run: The processed load run.
+        input: Queue with tuples of page index, page size, IDs, their versions
+            and already stored versions.
+        output: Queue receiving tuples of page index, page size, versions,
+            already stored versions and failed IDs, closed with None.
+    """
+    while (item := await input.get()) is not None:
+        start, count, ids, id_to_version, stored = item
+        file_urls = get_file_urls(ids, id_to_version)
+
+        buffer = InsertBuffer(partial(insert_files, run=run))
+        failed_batch = await fetch_files(client, file_urls, id_to_version, buffer)
+        await buffer.flush()
+
+        failed_batch += [
+            (id, "Version not found.") for id in ids if id not in file_urls
+        ]
+        await output.put((start, count, id_to_version, stored, failed_batch))
+
+    await output.put(None)
+
+
+async def record_stage(run: LoadRun, progress: LoadProgress, input: asyncio.Queue):
+    """Pipeline stage recording results of stored pages.
+
+    Failures are stored and recorded in a worker thread so downloads continue
+    in the meantime. Then the page is checkpointed in the ledger.
+
+    Args:
+        run: The processed load run.
+        progress: Progress tracker of the run.
+        input: Queue with tuples of page index, page size, versions, stored
+            versions and failed IDs.
+    """
+    while (item := await input.get()) is not None:
+        start, count, id_to_version, stored, failed_batch = item
+
+        if failed_batch:
+            log.debug(f"Number of failed ids: {len(failed_batch)}")
+            await asyncio.to_thread(insert_failed, failed_batch, id_to_version, run=run)
+
+        await asyncio.to_thread(
+            complete_page, run, start, count, stored, len(failed_batch)
         )
 
-        # DO NOT DELETE!!!
-        sleep(5)  # Required to avoid 'Too many requests' error
-        # DO NOT DELETE!!!
+        progress.update(count, len(failed_batch))
+        log.info(str(progress))
+
+
+async def enqueue_stage(run: LoadRun, progress: LoadProgress, input: asyncio.Queue):
+    """Pipeline stage queueing resolved versions for ingest workers.
+
+    Entries without a resolved version are recorded as failed right away. Queued
+    pages are checkpointed in the ledger as completed.
+
+    Args:
+        run: The processed load run.
+        progress: Progress tracker of the run.
+        input: Queue with tuples of page index, page size, IDs to fetch, their
+            versions and already stored versions.
+    """
+    while (item := await input.get()) is not None:
+        start, count, ids, id_to_version, stored = item
+
+        entries = [
+            (get_full_id(id), id_to_version[id])
+            for id in ids
+            if id_to_version[id] is not None
+        ]
+        missing = [
+            (id, "Version not found.") for id in ids if id_to_version[id] is None
+        ]
+
+        if entries:
+            await asyncio.to_thread(enqueue_entries, entries)
+
+        if missing:
+            await asyncio.to_thread(insert_failed, missing, id_to_version, run=run)
+
+        await asyncio.to_thread(complete_page, run, start, count, stored, len(missing))
+
+        progress.update(count, len(missing))
+        log.info(f"Queued -- {progress}")
+
+
+async def fetch_all(
+    client: HttpClient, run: LoadRun, starts: list[int], enqueue: bool = False
+) -> None:
+    """Fetches IDs and corresponding latest file entries and stores them in database.
+
+    Work runs as a pipeline of concurrent stages (search, versions, diff,
+    download, record) connected by bounded queues. Next pages are prefetched and
+    resolved while the current batch downloads, and full queues pause the
+    upstream stages. Downloaded files are stored by byte budget as they arrive,
+    so file data of at most two budgets is held in memory. With enqueue
+    set, resolved versions are put into the ingest queue instead of being
+    downloaded, so workers on other nodes can share the downloads.
+
+    Args:
+        client: Pooled HTTP client.
+        run: The processed load run.
+        starts: Search API indices of pages to process.
+        enqueue: If True, queue entries for ingest workers instead of fetching.
+    """
+    log.debug("Entry fetching stareted.")
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("httpcore").setLevel(logging.WARNING)
+
+    log.debug(f"Pages left to process: {len(starts)}")
+
+    processed, failed = await asyncio.to_thread(get_run_progress, run)
+    progress = LoadProgress(run.total - run.start, processed, failed)
+
+    ids_queue = asyncio.Queue(maxsize=PDB_LOAD_QUEUE_SIZE)
+    versions_queue = asyncio.Queue(maxsize=PDB_LOAD_QUEUE_SIZE)
+    diff_queue = asyncio.Queue(maxsize=PDB_LOAD_QUEUE_SIZE)
+    results_queue = asyncio.Queue(maxsize=PDB_LOAD_QUEUE_SIZE)
+
+    async with asyncio.TaskGroup() as group:
+        group.create_task(search_stage(client, starts, ids_queue))
+        group.create_task(version_stage(client, run, ids_queue, versions_queue))
+        group.create_task(diff_stage(versions_queue, diff_queue))
+
+        if enqueue:
+            group.create_task(enqueue_stage(run, progress, diff_queue))
+        else:
+            group.create_task(download_stage(client, run, diff_queue, results_queue))
+            group.create_task(record_stage(run, progress, results_queue))
 
     log.debug("Entry fetching finished.")
 
-    logging.getLogger("requests").setLevel(logging.DEBUG)
-    logging.getLogger("urllib3").setLevel(logging.DEBUG)
+    logging.getLogger("httpx").setLevel(logging.DEBUG)
+    logging.getLogger("httpcore").setLevel(logging.DEBUG)
 
 
-def get_linspace(total: int):
+def get_linspace(total: int, workers: int = WORKER_LIMIT):
     """Helper method to calculate step and starts for each worker.
 
     Args:
         total: Total number of items to process.
+        workers: Number of workers to split the items between.
 
     Returns:
         A tuple containing:
             - Step size for each worker
             - Generator of start indices for each worker
     """
-    step = int(ceil(total / WORKER_LIMIT))
-    starts = (0 + i * step for i in range(WORKER_LIMIT))
+    step = int(ceil(total / workers))
+    starts = (0 + i * step for i in range(workers))
 
     return step, starts
 
 
-def run(start: int | None):
-    """Creates and starts child processes for fetching file data.
+def get_shard_starts(
+    run: LoadRun, pending: list[int], shard: int, shards: int
+) -> list[int]:
+    """Returns pending pages belonging to given shard of the run.
+
+    All pages of the run are split into contiguous equal ranges, so each shard
+    keeps the same pages no matter how far other shards got.
+
+    Args:
+        run: The processed load run.
+        pending: Search API indices of pages not completed yet.
+        shard: Index of the shard, starting from 0.
+        shards: Total number of shards.
+
+    Returns:
+        Search API indices of pending pages of the shard.
+    """
+    all_starts = list(range(run.start, run.total, PDB_SEARCH_API_LIMIT))
+    step, offsets = get_linspace(len(all_starts), shards)
+    offset = list(offsets)[shard]
+    shard_starts = set(all_starts[offset : offset + step])
+
+    return [start for start in pending if start in shard_starts]
+
+
+def get_shard_limits(shards: int) -> dict:
+    """Returns share of upstream limits of a single shard.
+
+    Args:
+        shards: Total number of shards running at once.
+
+    Returns:
+        Rate and concurrency limits of each upstream for one shard.
+    """
+    return {
+        name: {
+            "rate": limits["rate"] / shards,
+            "concurrency": max(limits["concurrency"] // shards, 1),
+        }
+        for name, limits in PDB_RATE_LIMITS.items()
+    }
+
+
+def get_run(
+    start: int | None, total: int, restart: bool, create: bool = True
+) -> tuple[LoadRun | None, list]:
+    """Returns load run to process and indices of its remaining pages.
+
+    Args:
+        start: Starting index for fetching. If None, resumes unfinished run.
+        total: Total number of entries reported by Search API.
+        restart: If True, never resume unfinished run.
+        create: If False, only resume unfinished run and never create one.
+
+    Returns:
+        Tuple of the run and Search API indices of its remaining pages, None and
+            an empty list if there is no run to resume and create is False.
+    """
+    with db_context() as session:
+        load_run_service = LoadRunService(session)
+        run = load_run_service.get_or_create_run(start, total, restart, create)
+        if run is None:
+            return None, []
+
+        starts = load_run_service.get_pending_starts(run, PDB_SEARCH_API_LIMIT)
+
+    return run, starts
+
+
+def get_pending_run(run_id: int) -> tuple[LoadRun | None, list]:
+    """Returns load run with given ID and indices of its remaining pages.
+
+    Args:
+        run_id: The ID of the run.
+
+    Returns:
+        Tuple of the run and Search API indices of its remaining pages, None and
+            an empty list if the run doesn't exist.
+    """
+    with db_context() as session:
+        load_run_service = LoadRunService(session)
+        run = load_run_service.get_run(run_id)
+        if run is None:
+            return None, []
+
+        return run, load_run_service.get_pending_starts(run, PDB_SEARCH_API_LIMIT)
+
+
+def finish_run(run: LoadRun) -> None:
+    """Marks load run as finished, if all its pages are completed.
+
+    Args:
+        run: The processed load run.
+    """
+    with db_context() as session:
+        load_run_service = LoadRunService(session)
+
+        if load_run_service.get_pending_starts(run, PDB_SEARCH_API_LIMIT):
+            log.info(f"Load run {run.id} still has pages left for other shards.")
+            return
+
+        load_run_service.finish_run(run)
+
+
+async def prepare_run(start: int | None, restart: bool) -> LoadRun | None:
+    """Fetches total number of entries and returns run to process.
+
+    Args:
+        start: Starting index for fetching. If None, resumes or starts from 0.
+        restart: If True, starts a new run even if an unfinished one exists.
+
+    Returns:
+        The run to process, None if total count couldn't be fetched.
+    """
+    async with HttpClient() as client:
+        ids_data = await fetch_ids(client, start=0, limit=0)
+
+    if ids_data is None:
+        return None
+
+    total = ids_data["total_count"]
+    log.debug(f"Total number of entries: {total}")
+    run, _ = await asyncio.to_thread(get_run, start, total, restart)
+
+    return run
+
+
+async def load(
+    start: int | None,
+    restart: bool = False,
+    shard: int = 0,
+    shards: int = 1,
+    enqueue: bool = False,
+    run_id: int | None = None,
+):
+    """Opens shared connection pool and fetches all entries of given shard.
+
+    Unfinished run recorded in the ledger is resumed, unless explicit start is
+    given or restart is requested. One of several shards never creates a run,
+    it only attaches to the given or unfinished one. Each shard gets an equal share of upstream
+    rate limits and connections.
+
+    Args:
+        start: Starting index for fetching. If None, resumes or starts from 0.
+        restart: If True, starts a new run even if an unfinished one exists.
+        shard: Index of the shard processed by this process, starting from 0.
+        shards: Total number of shards.
+        enqueue: If True, queue entries for ingest workers instead of fetching.
+        run_id: ID of the run already resolved by a parent process, if given,
+            start and restart are ignored and total isn't fetched again.
+    """
+    client = HttpClient(
+        max_connections=max(WORKER_LIMIT // shards, 1),
+        rate_limits=get_shard_limits(shards),
+    )
+    async with client:
+        if run_id is not None:
+            run, pending = await asyncio.to_thread(get_pending_run, run_id)
+            if run is None:
+                log.error(f"Load run {run_id} not found.")
+                return
+        else:
+            ids_data = await fetch_ids(client, start=0, limit=0)
+            if ids_data is None:
+                return
+
+            total = ids_data["total_count"]
+            log.debug(f"Total number of entries: {total}")
+            run, pending = await asyncio.to_thread(
+                get_run, start, total, restart, shards == 1
+            )
+            if run is None:
+                log.error("No unfinished load run for the shard, prepare one first.")
+                return
+
+        starts = get_shard_starts(run, pending, shard, shards)
+        log.info(f"Shard {shard + 1}/{shards} has {len(starts)} pages left.")
+        await fetch_all(client, run, starts, enqueue)
+        await asyncio.to_thread(finish_run, run)
+
+
+def run_shard(run_id: int, shard: int, shards: int, enqueue: bool = False):
+    """Runs single shard of a load run in current process.
 
     Args:
-        start: Starting index for fetching. If None, starts from 0.
+        run_id: ID of the run resolved by the parent process.
+        shard: Index of the shard, starting from 0.
+        shards: Total number of shards.
+        enqueue: If True, queue entries for ingest workers instead of fetching.
     """
+    asyncio.run(load(None, shard=shard, shards=shards, enqueue=enqueue, run_id=run_id))
+
+
+def run_processes(
+    start: int | None,
+    restart: bool,
+    processes: int,
+    enqueue: bool = False,
+    run_id: int | None = None,
+):
+    """Runs the full load split between multiple worker processes.
+
+    The run and its total are resolved once in the parent process, then every
+    worker processes the run with its own shard of pages, database connection
+    and rate limit budget. Parent reports combined progress of all workers from
+    the ledger.
+
+    Args:
+        start: Starting index for fetching. If None, resumes or starts from 0.
+        restart: If True, starts a new run even if an unfinished one exists.
+        processes: Number of worker processes.
+        enqueue: If True, queue entries for ingest workers instead of fetching.
+        run_id: ID of an existing run to process instead of resolving one.
+    """
+    if run_id is not None:
+        run, _ = get_pending_run(run_id)
+        if run is None:
+            log.error(f"Load run {run_id} not found.")
+            return
+    else:
+        run = asyncio.run(prepare_run(start, restart))
+        if run is None:
+            return
+
+    context = mp.get_context("spawn")
+    workers = [
+        context.Process(
+            target=run_shard, args=(run.id, shard, processes, enqueue), daemon=True
+        )
+        for shard in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+
+    processed, failed = get_run_progress(run)
+    progress = LoadProgress(run.total - run.start, processed, failed)
+
+    while alive := [worker.sentinel for worker in workers if worker.is_alive()]:
+        wait(alive, timeout=PDB_LOAD_PROGRESS_INTERVAL)
+
+        processed, failed = get_run_progress(run)
+        progress.update(processed - progress.processed, failed - progress.failed)
+        log.info(f"All shards -- {progress}")
+
+    failed_workers = [w.name for w in workers if w.exitcode != 0]
+    if failed_workers:
+        log.error(f"Workers {failed_workers} exited with error, rerun to resume.")
+
+
+def prepare(start: int | None = None, restart: bool = False) -> int | None:
+    """Creates or resumes a load run for shards started separately.
+
+    Args:
+        start: Starting index for fetching. If None, resumes or starts from 0.
+        restart: If True, starts a new run even if an unfinished one exists.
+
+    Returns:
+        ID of the run, None if total count couldn't be fetched.
+    """
+    run = asyncio.run(prepare_run(start, restart))
+    if run is None:
+        return None
+
+    log.info(f"Load run {run.id} prepared, start its shards with --run-id {run.id}.")
+    return run.id
+
+
+def run(
+    start: int | None = None,
+    restart: bool = False,
+    processes: int = 1,
+    shard: tuple[int, int] | None = None,
+    enqueue: bool = False,
+    run_id: int | None = None,
+):
+    """Runs the full load of PDB entries.
+
+    Shards started separately only attach to an existing run, either given by
+    its ID or the unfinished one, so they never create a run each.
+
+    Args:
+        start: Starting index for fetching. If None, resumes or starts from 0.
+        restart: If True, starts a new run even if an unfinished one exists.
+        processes: Number of worker processes to split the load between.
+        shard: Tuple of shard index and total number of shards, if this process
+            handles only part of the load.
+        enqueue: If True, only resolve versions and queue entries for ingest
+            workers.
+        run_id: ID of an existing run to process, e.g. created by `prepare`.
+
+    Raises:
+        ValueError: If a shard is asked to start a new run.
+    """
+    if shard is not None and (start is not None or restart):
+        raise ValueError("Shards can't start a new run, prepare it first.")
+
     log.info("Beggining fetch of all PDB entries.")
-    ids_data = fetch_ids(start=0, limit=0)
 
-    if ids_data is not None:
-        total = ids_data["total_count"]
-        log.debug(f"Total number of entries: {total}")
-        actual_start = start if start else 0
-        fetch_all(start=actual_start, total=total)
+    if processes > 1:
+        run_processes(start, restart, processes, enqueue, run_id)
+    else:
+        asyncio.run(
+            load(start, restart, *(shard or (0, 1)), enqueue=enqueue, run_id=run_id)
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,180 @@
+"""Local archive import module for PDB entries.
+
+This module bootstraps the mirror from a locally rsync'd wwPDB versioned archive
+instead of crawling it over HTTP. The tree is walked for versioned coordinate
+files (`.../mmcif/<category>/<id>/<id>_xyz_v<N>.cif.gz`), identifiers and versions
+are parsed from the file names and batches of files are imported in parallel by
+worker processes, so the import is bound by local disk rather than by upstream
+rate limits.
+"""
+
+import multiprocessing as mp
+import os
+import re
+from collections.abc import Iterable, Iterator
+from datetime import datetime as dt
+from itertools import islice
+
+from app.log import log as log
+from app.config import PDB_LOCAL_BATCH_SIZE
+from app.fetch.load import insert_files
+from app.services import FileService
+from app.database.database import db_context
+from app.database.models import ChangeInsert, FileInsert, Operations
+
+# Versioned coordinate file, e.g. pdb_00001abc_xyz_v2.cif.gz
+ENTRY_FILE = re.compile(r"^(pdb_[0-9a-z]{8})_xyz_v(\d+)\.cif\.gz$")
+
+
+def parse_entry_file(name: str) -> tuple[str, int] | None:
+    """Parses protein ID and version from name of a versioned coordinate file.
+
+    Args:
+        name: The file name.
+
+    Returns:
+        Tuple of protein ID and version, None for other files.
+    """
+    match = ENTRY_FILE.match(name)
+    if match is None:
+        return None
+
+    return match.group(1), int(match.group(2))
+
+
+def iter_entry_files(root: str) -> Iterator[tuple[str, str, int]]:
+    """Walks directory tree for versioned coordinate files.
+
+    Args:
+        root: Root of the local archive tree.
+
+    Returns:
+        Generator of (path, protein_id, version) tuples.
+    """
+    for directory, dirs, names in os.walk(root):
+        dirs.sort()
+
+        for name in sorted(names):
+            if parsed := parse_entry_file(name):
+                yield os.path.join(directory, name), *parsed
+
+
+def get_batches(entries: Iterator[tuple], size: int) -> Iterator[tuple]:
+    """Splits entries into batches of given size.
+
+    Args:
+        entries: Iterator of entries.
+        size: Maximum number of entries in a batch.
+
+    Returns:
+        Generator of tuples of entries.
+    """
+    while batch := tuple(islice(entries, size)):
+        yield batch
+
+
+def get_stored_versions(protein_ids: list[str]) -> set[tuple[str, int]]:
+    """Returns which versions of given proteins are already stored.
+
+    Args:
+        protein_ids: List of protein IDs.
+
+    Returns:
+        Set of stored (protein_id, version) tuples.
+    """
+    with db_context() as session:
+        return FileService(session).get_stored_versions(protein_ids)
+
+
+def read_files(entries: Iterable[tuple[str, str, int]]) -> tuple[list, list, int]:
+    """Reads given files and returns SQLModel objects for insertion.
+
+    Changes are stamped with modification time of the archive file, which rsync
+    preserves from the release of the version, so historical versions keep
+    their order when looking up the latest version before a date.
+
+    Args:
+        entries: Iterable of (path, protein_id, version) tuples.
+
+    Returns:
+        A tuple containing:
+            - list[FileInsert]: List of file objects to insert
+            - list[ChangeInsert]: List of change objects to insert
+            - int: Number of files which couldn't be read
+    """
+    files, changes, failed = [], [], 0
+
+    for path, protein_id, version in entries:
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+                modified = dt.fromtimestamp(os.fstat(file.fileno()).st_mtime)
+        except OSError as e:
+            log.error(f"Failed to read file {path}: {e}")
+            failed += 1
+            continue
+
+        files.append(FileInsert(protein_id=protein_id, version=version, file=data))
+        changes.append(
+            ChangeInsert(
+                file_id=0,  # placeholder
+                protein_id=protein_id,
+                operation_flag=Operations.ADDED.value,
+                timestamp=modified,
+            )
+        )
+
+    return files, changes, failed
+
+
+def import_batch(entries: tuple[tuple[str, str, int], ...]) -> tuple[int, int, int]:
+    """Imports a batch of local files, skipping already stored versions.
+
+    Stored versions are checked before reading, so a repeated import only
+    reads new files.
+
+    Args:
+        entries: Tuple of (path, protein_id, version) tuples.
+
+    Returns:
+        Tuple of numbers of imported, skipped and failed files.
+    """
+    stored = get_stored_versions(list({protein_id for _, protein_id, _ in entries}))
+    new = [entry for entry in entries if entry[1:] not in stored]
+
+    files, changes, failed = read_files(new)
+    if files:
+        insert_files(files, changes)
+
+    return len(files), len(entries) - len(new), failed
+
+
+def run(root: str, processes: int | None = None) -> None:
+    """Imports all versions found in a local archive tree.
+
+    The parent process walks the tree and hands batches of files to a pool of
+    worker processes, each with its own database connection.
+
+    Args:
+        root: Root of the local archive tree.
+        processes: Number of worker processes, defaults to number of CPUs.
+    """
+    if not os.path.isdir(root):
+        log.error(f"Directory {root} doesn't exist.")
+        return
+
+    processes = processes or os.cpu_count() or 1
+    log.info(f"Importing local archive from {root} with {processes} processes.")
+
+    imported, skipped, failed = 0, 0, 0
+    batches = get_batches(iter_entry_files(root), PDB_LOCAL_BATCH_SIZE)
+
+    context = mp.get_context("spawn")
+    with context.Pool(processes) as pool:
+        for result in pool.imap_unordered(import_batch, batches):
+            imported += result[0]
+            skipped += result[1]
+            failed += result[2]
+            log.info(f"Imported {imported}, skipped {skipped}, failed {failed} files.")
+
+    log.info(f"Local import of {root} finished.")
@@ -0,0 +1,63 @@
+"""Progress reporting module for long running loads.
+
+This module provides a helper tracking number of processed entries of a load,
+its throughput and estimated time until it finishes.
+"""
+
+from datetime import timedelta
+from time import monotonic
+
+
+class LoadProgress:
+    """Tracks throughput and estimated remaining time of a load.
+
+    Throughput is measured over entries processed since the tracker was created,
+    so resumed loads aren't skewed by work done before the restart.
+
+    Args:
+        total: Total number of entries of the load.
+        processed: Number of entries processed before tracking started.
+        failed: Number of entries failed before tracking started.
+    """
+
+    def __init__(self, total: int, processed: int = 0, failed: int = 0):
+        self.total = total
+        self.processed = processed
+        self.failed = failed
+        self.started = monotonic()
+        self.session_processed = 0
+
+    def update(self, processed: int, failed: int) -> None:
+        """Adds newly processed entries.
+
+        Args:
+            processed: Number of newly processed entries.
+            failed: Number of newly failed entries.
+        """
+        self.processed += processed
+        self.failed += failed
+        self.session_processed += processed
+
+    @property
+    def rate(self) -> float:
+        """Number of processed entries per second."""
+        elapsed = monotonic() - self.started
+
+        return self.session_processed / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> timedelta | None:
+        """Estimated time until all entries are processed, None if unknown."""
+        if not self.rate:
+            return None
+
+        remaining = max(self.total - self.processed, 0)
+
+        return timedelta(seconds=round(remaining / self.rate))
+
+    def __str__(self) -> str:
+        return (
+            f"Total processed: {self.processed}/{self.total} -- "
+            f"Total failed: {self.failed} -- "
+            f"Rate: {self.rate:.1f} ids/s -- ETA: {self.eta or 'unknown'}"
+        )
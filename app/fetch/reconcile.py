@@ -0,0 +1,204 @@
+"""Holdings reconciliation module for PDB entries.
+
+This module compares the mirror with the upstream list of current holdings and
+repairs drift caused by missed weekly lists or failed jobs. The listing is
+downloaded once and compared with stored entries in a single set-based pass, so
+only missing, stale and obsolete entries are fetched or updated.
+"""
+
+import asyncio
+import gzip
+import json
+
+from arrow import get as get_date
+
+from app.log import log as log
+from app.config import PDB_HOLDINGS_URL, PDB_INGEST_QUEUE, RECONCILE_MAX_OBSOLETE
+from app.fetch.client import HttpClient
+from app.fetch.ingest import drain
+from app.fetch.load import enqueue_entries
+from app.fetch.retry import CircuitOpenError
+from app.fetch.utils import fetch_last_versions, get_full_id, get_short_id
+from app.services import FileService, ProteinService
+from app.database.database import db_context
+from app.database.models import Operations
+from httpx import HTTPError
+
+
+async def fetch_holdings(client: HttpClient) -> dict | None:
+    """Fetches all current upstream entries with their last modification time.
+
+    Args:
+        client: Pooled HTTP client.
+
+    Returns:
+        Dictionary mapping protein IDs to naive local modification times, None
+            if the listing couldn't be fetched.
+    """
+    log.debug(f"Fetching holdings from url: {PDB_HOLDINGS_URL}")
+    try:
+        response = await client.get(PDB_HOLDINGS_URL)
+    except (HTTPError, CircuitOpenError) as e:
+        log.error(f"Fetching holdings failed - error: {e!r}")
+        return None
+
+    if response.status_code != 200:
+        log.error(f"Unexpected status code {response.status_code} for holdings.")
+        return None
+
+    data = json.loads(gzip.decompress(response.content))
+
+    return {
+        get_full_id(id): get_date(modified).to("local").naive
+        for id, modified in data.items()
+    }
+
+
+def diff_holdings(holdings: dict) -> dict[Operations, list[str]]:
+    """Finds missing, stale and obsolete entries.
+
+    Args:
+        holdings: Dictionary mapping protein IDs to their modification time.
+
+    Returns:
+        Dictionary mapping operations to protein IDs which need them.
+    """
+    with db_context() as session:
+        return ProteinService(session).diff_holdings(holdings)
+
+
+def get_stored_versions(protein_ids: list[str]) -> dict[str, int]:
+    """Returns latest stored versions of given proteins.
+
+    Args:
+        protein_ids: List of protein IDs.
+
+    Returns:
+        Dictionary mapping protein IDs to their latest stored version.
+    """
+    with db_context() as session:
+        return FileService(session).get_latest_versions(protein_ids)
+
+
+def mark_checked(checked: dict) -> None:
+    """Records proteins confirmed current up to their upstream modification.
+
+    Args:
+        checked: Dictionary mapping protein IDs to their modification time.
+    """
+    with db_context() as session:
+        ProteinService(session).mark_checked(checked)
+
+
+def deprecate(protein_ids: list[str]) -> int:
+    """Marks given proteins as deprecated.
+
+    Args:
+        protein_ids: List of protein IDs.
+
+    Returns:
+        Number of deprecated proteins.
+    """
+    with db_context() as session:
+        return len(ProteinService(session).deprecate_proteins(protein_ids))
+
+
+async def queue_outdated(
+    client: HttpClient,
+    protein_ids: list[str],
+    operation: Operations,
+    holdings: dict | None = None,
+) -> int:
+    """Resolves latest versions and queues those newer than the stored ones.
+
+    Entries whose latest version is already stored were modified upstream only
+    by minor revisions. Their modification time is recorded, so they aren't
+    reported as stale on every run.
+
+    Args:
+        client: Pooled HTTP client.
+        protein_ids: List of protein IDs.
+        operation: The operation recorded for stored files.
+        holdings: Dictionary mapping protein IDs to their upstream
+            modification time, recorded for entries confirmed current.
+
+    Returns:
+        Number of queued entries.
+    """
+    if not protein_ids:
+        return 0
+
+    ids = {get_short_id(protein_id): protein_id for protein_id in protein_ids}
+    versions = await fetch_last_versions(client, list(ids))
+    stored = await asyncio.to_thread(get_stored_versions, protein_ids)
+
+    entries = [
+        (protein_id, version)
+        for id, protein_id in ids.items()
+        if (version := versions[id]) is not None and version > stored.get(protein_id, 0)
+    ]
+    if entries:
+        await asyncio.to_thread(enqueue_entries, entries, operation)
+
+    checked = {
+        protein_id: holdings[protein_id]
+        for id, protein_id in ids.items()
+        if holdings
+        and protein_id in holdings
+        and (version := versions[id]) is not None
+        and version <= stored.get(protein_id, 0)
+    }
+    if checked:
+        await asyncio.to_thread(mark_checked, checked)
+
+    return len(entries)
+
+
+async def reconcile(process: bool = not PDB_INGEST_QUEUE) -> None:
+    """Reconciles stored entries with upstream holdings.
+
+    Missing and stale entries are put into the ingest queue, obsolete ones are
+    deprecated right away. A suspiciously large number of obsolete entries,
+    e.g. from a truncated listing, is only reported.
+
+    Args:
+        process: If True, drains the ingest queue afterwards in this process,
+            otherwise leaves it to ingest workers.
+    """
+    async with HttpClient() as client:
+        holdings = await fetch_holdings(client)
+        if not holdings:
+            return
+
+        diff = await asyncio.to_thread(diff_holdings, holdings)
+        log.info(
+            f"Holdings of {len(holdings)} entries differ in "
+            f"{len(diff[Operations.ADDED])} missing, "
+            f"{len(diff[Operations.MODIFIED])} possibly stale and "
+            f"{len(diff[Operations.OBSOLETE])} obsolete entries."
+        )
+
+        added = await queue_outdated(client, diff[Operations.ADDED], Operations.ADDED)
+        modified = await queue_outdated(
+            client, diff[Operations.MODIFIED], Operations.MODIFIED, holdings
+        )
+        log.info(f"Queued {added} missing and {modified} stale entries.")
+
+    obsolete = diff[Operations.OBSOLETE]
+    if len(obsolete) > RECONCILE_MAX_OBSOLETE * len(holdings):
+        log.error(
+            f"Refusing to deprecate {len(obsolete)} entries at once, "
+            "check the holdings listing."
+        )
+    elif obsolete:
+        deprecated = await asyncio.to_thread(deprecate, obsolete)
+        log.info(f"Deprecated {deprecated} obsolete entries.")
+
+    if process and added + modified:
+        await drain()
+
+
+def run() -> None:
+    """Runs reconciliation of stored entries with upstream holdings."""
+    log.info("Reconciling stored entries with upstream holdings.")
+    asyncio.run(reconcile())
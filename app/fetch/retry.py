@@ -0,0 +1,167 @@
+"""Retry policy and circuit breaker module for outbound PDB requests.
+
+This module provides a shared retry policy with capped exponential backoff and
+jitter, and a per-host circuit breaker which stops hammering an upstream that
+keeps failing until a cool-down period passes.
+"""
+
+from random import uniform
+from time import monotonic
+
+from app.log import log as log
+from app.config import (
+    PDB_HTTP_BACKOFF_BASE,
+    PDB_HTTP_BACKOFF_MAX,
+    PDB_HTTP_BREAKER_RESET,
+    PDB_HTTP_BREAKER_THRESHOLD,
+    PDB_HTTP_RETRIES,
+)
+
+__all__ = ["RetryPolicy", "CircuitBreaker", "CircuitOpenError", "PERMANENT_CODES"]
+
+# Status codes which won't change on repeated request.
+PERMANENT_CODES = (400, 401, 403, 404, 410)
+
+
+class CircuitOpenError(Exception):
+    """Exception raised when request is refused by an open circuit breaker.
+
+    Args:
+        host: The host whose circuit is open.
+    """
+
+    def __init__(self, host: str):
+        self.host = host
+        super().__init__(f"Circuit for host '{host}' is open.")
+
+
+class RetryPolicy:
+    """Retry policy with capped exponential backoff and full jitter.
+
+    Args:
+        retries: Maximum number of repeated attempts after the first one.
+        base: Backoff of the first retry in seconds.
+        cap: Maximum backoff in seconds.
+    """
+
+    def __init__(
+        self,
+        retries: int = PDB_HTTP_RETRIES,
+        base: float = PDB_HTTP_BACKOFF_BASE,
+        cap: float = PDB_HTTP_BACKOFF_MAX,
+    ):
+        self.retries = retries
+        self.base = base
+        self.cap = cap
+
+    @property
+    def attempts(self) -> int:
+        """Total number of attempts including the first one."""
+        return self.retries + 1
+
+    def get_delay(self, attempt: int) -> float:
+        """Returns randomized delay before given retry.
+
+        Args:
+            attempt: Number of the failed attempt, starting from 0.
+
+        Returns:
+            Delay in seconds between 0 and the capped exponential backoff.
+        """
+        return uniform(0, min(self.cap, self.base * 2**attempt))
+
+    @staticmethod
+    def is_retryable(status: int) -> bool:
+        """Checks whether request ending with given status should be repeated.
+
+        Args:
+            status: HTTP status code of the response.
+
+        Returns:
+            True for server errors and throttling, False otherwise.
+        """
+        return status == 429 or status >= 500
+
+
+class CircuitBreaker:
+    """Circuit breaker guarding requests to a single host.
+
+    After a number of consecutive failures the circuit opens and requests are
+    refused until the reset timeout passes. Then a single trial request is let
+    through (half-open state), closing the circuit on success or reopening it on
+    failure.
+
+    Args:
+        host: The guarded host, used in logs.
+        threshold: Number of consecutive failures opening the circuit.
+        reset_timeout: Seconds the circuit stays open before a trial request.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        threshold: int = PDB_HTTP_BREAKER_THRESHOLD,
+        reset_timeout: float = PDB_HTTP_BREAKER_RESET,
+    ):
+        self.host = host
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial = False
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the circuit currently refuses requests."""
+        if self.opened_at is None:
+            return False
+
+        return self.trial or monotonic() - self.opened_at < self.reset_timeout
+
+    def check(self) -> bool:
+        """Checks whether request may be sent, marking half-open trial if so.
+
+        Returns:
+            True if the request is the half-open trial, which must be ended by
+                recording its outcome or with `end_trial`.
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+        """
+        if self.is_open:
+            raise CircuitOpenError(self.host)
+
+        if self.opened_at is not None:
+            log.info(f"Circuit for host '{self.host}' half-open, sending trial.")
+            self.trial = True
+            return True
+
+        return False
+
+    def end_trial(self) -> None:
+        """Ends trial request without outcome, e.g. cancelled or throttled.
+
+        The circuit stays half-open, so the next request becomes the trial.
+        """
+        self.trial = False
+
+    def record_success(self) -> None:
+        """Closes the circuit after successful request."""
+        if self.opened_at is not None:
+            log.info(f"Circuit for host '{self.host}' closed.")
+
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+
+    def record_failure(self) -> None:
+        """Counts failed request, opening the circuit over the threshold."""
+        self.failures += 1
+
+        if self.trial or self.failures >= self.threshold:
+            if not self.trial:
+                log.error(
+                    f"Circuit for host '{self.host}' opened after {self.failures} failures."
+                )
+            self.opened_at = monotonic()
+            self.trial = False
@@ -2,12 +2,21 @@
 
 This module implements a singleton scheduler that manages periodic jobs for fetching
 and processing PDB data updates, including added, modified, and obsolete entries.
+The scheduler runs only in the sync worker which holds the leader lock, never in
+the API workers.
 """
 
+import signal
+from threading import Event
+
+
 from zoneinfo import ZoneInfo
 
 from apscheduler.schedulers.background import BackgroundScheduler
+from sqlmodel import text
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.events import (
     EVENT_JOB_ERROR,
     EVENT_JOB_EXECUTED,
@@ -16,16 +25,32 @@ from apscheduler.events import (
 
 from app.log import log as log
 from app.config import (
+    BACKFILL_INTERVAL,
     CRON_JOB_DAY,
+    DELTA_INTERVAL,
+    FAILED_RETRY_INTERVAL,
+    FILE_DELTAS,
+    RECONCILE_CRON_DAY,
+    SCHEDULER_LEADER_INTERVAL,
+    SCHEDULER_LOCK_ID,
+)
+from app.database.database import (
+    create_db_and_tables,
+    init_flag_data,
+    leader_lock,
 )
+from app.fetch import backfill, reconcile
 from app.fetch.jobs import (
+    catch_up,
+    compact_versions,
     process_added,
+    process_failed,
     process_modified,
     process_obsolete,
     event_listener,
 )
 
-__all__ = ["scheduler"]
+__all__ = ["Scheduler", "run"]
 
 
 class Singleton(type):
@@ -58,7 +83,10 @@ class Scheduler(metaclass=Singleton):
 
     This class implements a singleton pattern to ensure only one scheduler instance
     exists throughout the application. It manages jobs for processing added, modified,
-    and obsolete PDB entries on a scheduled basis.
+    and obsolete PDB entries on a scheduled basis, for reconciling the mirror with
+    upstream holdings, for retrying failed fetches and for backfilling historical
+    versions. With FILE_DELTAS enabled, older versions are also encoded as deltas.
+    Weeks missed while the worker was down are caught up right after start.
     """
 
     def __init__(self):
@@ -88,6 +116,7 @@ class Scheduler(metaclass=Singleton):
             id="fetch_added",
             coalesce=True,
             max_instances=1,
+            misfire_grace_time=None,
         )
         scheduler.add_job(
             func=process_modified,
@@ -96,6 +125,7 @@ class Scheduler(metaclass=Singleton):
             id="fetch_modified",
             coalesce=True,
             max_instances=1,
+            misfire_grace_time=None,
         )
         scheduler.add_job(
             func=process_obsolete,
@@ -104,7 +134,49 @@ class Scheduler(metaclass=Singleton):
             id="fetch_obsolete",
             coalesce=True,
             max_instances=1,
+            misfire_grace_time=None,
+        )
+        scheduler.add_job(
+            func=catch_up,
+            trigger=DateTrigger(timezone=CET),
+            replace_existing=True,
+            id="catch_up",
+        )
+        scheduler.add_job(
+            func=reconcile.run,
+            trigger=CronTrigger(
+                day_of_week=RECONCILE_CRON_DAY, hour=0, minute=0, timezone=CET
+            ),
+            replace_existing=True,
+            id="reconcile",
+            coalesce=True,
+            max_instances=1,
         )
+        scheduler.add_job(
+            func=process_failed,
+            trigger=IntervalTrigger(hours=FAILED_RETRY_INTERVAL, timezone=CET),
+            replace_existing=True,
+            id="retry_failed",
+            coalesce=True,
+            max_instances=1,
+        )
+        scheduler.add_job(
+            func=backfill.run,
+            trigger=IntervalTrigger(hours=BACKFILL_INTERVAL, timezone=CET),
+            replace_existing=True,
+            id="backfill",
+            coalesce=True,
+            max_instances=1,
+        )
+        if FILE_DELTAS:
+            scheduler.add_job(
+                func=compact_versions,
+                trigger=IntervalTrigger(hours=DELTA_INTERVAL, timezone=CET),
+                replace_existing=True,
+                id="compact_versions",
+                coalesce=True,
+                max_instances=1,
+            )
         scheduler.add_listener(
             event_listener, EVENT_JOB_EXECUTED | EVENT_JOB_MISSED | EVENT_JOB_ERROR
         )
@@ -130,4 +202,29 @@ class Scheduler(metaclass=Singleton):
         return self.scheduler.get_jobs()
 
 
-scheduler = Scheduler()
+def run() -> None:
+    """Runs the sync worker until it is stopped.
+
+    Only the worker holding the leader lock runs the jobs, others wait on
+    standby and take over once the leader is gone. The lock connection is
+    checked periodically, losing it stops the jobs and raises, so the worker
+    can be restarted by its supervisor.
+    """
+    create_db_and_tables()
+    init_flag_data()
+
+    with leader_lock(SCHEDULER_LOCK_ID, SCHEDULER_LEADER_INTERVAL) as connection:
+        stop = Event()
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        signal.signal(signal.SIGINT, lambda *args: stop.set())
+
+        scheduler = Scheduler()
+        scheduler.start()
+        log.info("Sync worker started, running scheduled jobs.")
+
+        try:
+            while not stop.wait(SCHEDULER_LEADER_INTERVAL):
+                connection.execute(text("SELECT 1"))
+        finally:
+            log.info("Sync worker stopping, waiting for running jobs.")
+            scheduler.shutdown()
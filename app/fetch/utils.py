@@ -4,20 +4,33 @@ This module provides helper functions for interacting with the PDB API,
 including fetching files, managing versions, and handling API responses.
 """
 
+import asyncio
 from urllib.parse import quote_plus
-from arrow import utcnow
+from arrow import get as get_date, utcnow
+from time import sleep
 from requests import Response, get
-from requests.exceptions import ConnectTimeout
+from requests.exceptions import RequestException
+from httpx import HTTPError
 import json
 
 from app.log import log as log
+from app.fetch.buffer import Download
+from app.fetch.client import HttpClient
+from app.fetch.retry import PERMANENT_CODES, CircuitOpenError, RetryPolicy
 from app.config import (
+    PDB_DATA_API_BATCH_SIZE,
     PDB_DATA_API_URL,
     PDB_FTP_STATUS_URL,
     PDB_HTTP_FILE_URL,
+    PDB_HTTP_READ_TIMEOUT,
+    PDB_HTTP_TIMEOUT,
     PDB_SEARCH_API_URL,
+    PDB_SYNC_MAX_WEEKS,
 )
 
+# Connect and read timeouts of blocking requests.
+HTTP_TIMEOUT = (PDB_HTTP_TIMEOUT, PDB_HTTP_READ_TIMEOUT)
+
 
 def get_full_id(id: str):
     """Returns 12-character id of given 4-character id.
@@ -31,6 +44,18 @@ def get_full_id(id: str):
     return f"pdb_0000{id.lower()}"
 
 
+def get_short_id(full_id: str) -> str:
+    """Returns 4-character id of given 12-character id.
+
+    Args:
+        full_id: The 12-character full PDB ID.
+
+    Returns:
+        str: The 4-character PDB ID.
+    """
+    return full_id.removeprefix("pdb_0000").upper()
+
+
 def get_error_message(response: Response) -> str:
     """Extracts error message if any given, otherwise returns plain text.
 
@@ -89,6 +114,28 @@ def get_graphql_query(id: str) -> str:
     return url
 
 
+def get_graphql_batch_query(ids: list[str]) -> str:
+    """Helper method to create url encoded multi-entry string for Data API.
+
+    Args:
+        ids: List of PDB structure IDs.
+
+    Returns:
+        The URL-encoded GraphQL query string.
+    """
+    log.debug(f"Generating GraphQL query string for {len(ids)} ids.")
+
+    entry_ids = json.dumps([id.upper() for id in ids])
+    query = (
+        f"{{entries(entry_ids: {entry_ids})"
+        f"{{rcsb_id pdbx_audit_revision_history{{major_revision}}}}}}"
+    )
+    encoded = quote_plus(query)
+
+    url = f"{PDB_DATA_API_URL}?query={encoded}"
+    return url
+
+
 def get_search_url(start: int = 0, limit: int = 1000) -> str:
     """Helper method to create a url encoded string for Search API.
 
@@ -134,7 +181,7 @@ def get_last_version(id: str) -> int | None:
     url = get_graphql_query(id)
     log.debug(f"Query for {id}: {url}")
 
-    response = get(url)
+    response = get(url, timeout=HTTP_TIMEOUT)
     if response.status_code == 200:
         body = response.json()
         version = body["data"]["entry"]["pdbx_audit_revision_history"][-1][
@@ -148,6 +195,98 @@ def get_last_version(id: str) -> int | None:
     return None
 
 
+async def fetch_revision_histories(
+    client: HttpClient, ids: list[str]
+) -> dict[str, list[int]]:
+    """Fetches revision history of multiple entries in a single Data API request.
+
+    Args:
+        client: Pooled HTTP client.
+        ids: List of PDB structure IDs.
+
+    Returns:
+        Dictionary mapping given IDs to their ordered major revisions. IDs unknown
+            to the Data API or failed requests are left out.
+    """
+    url = get_graphql_batch_query(ids)
+    try:
+        response = await client.get(url)
+    except (HTTPError, CircuitOpenError) as e:
+        log.error(f"No versions retrieved for {len(ids)} ids - error: {e!r}")
+        return {}
+
+    if response.status_code != 200:
+        message = get_error_message(response)
+        log.error(f"No versions retrieved for {len(ids)} ids - error: {message}")
+        return {}
+
+    body = None
+    upper_to_id = {id.upper(): id for id in ids}
+
+    histories = {}
+    try:
+        body = response.json()
+        for entry in body["data"]["entries"] or []:
+            if entry is None or entry["rcsb_id"] not in upper_to_id:
+                continue
+            history = entry["pdbx_audit_revision_history"] or []
+            histories[upper_to_id[entry["rcsb_id"]]] = [
+                x["major_revision"] for x in history
+            ]
+    except (ValueError, KeyError, TypeError) as e:
+        errors = body.get("errors") if isinstance(body, dict) else None
+        log.error(
+            f"No versions retrieved for {len(ids)} ids - invalid response: "
+            f"{e!r}, errors: {errors}"
+        )
+        return {}
+
+    log.debug(f"Received revision history for {len(histories)}/{len(ids)} ids.")
+    return histories
+
+
+async def resolve_revision_histories(
+    client: HttpClient, ids: list[str], batch_size: int = PDB_DATA_API_BATCH_SIZE
+) -> dict[str, list[int]]:
+    """Fetches revision histories of given IDs in concurrent batched requests.
+
+    Args:
+        client: Pooled HTTP client.
+        ids: List of PDB structure IDs.
+        batch_size: Maximum number of IDs per request.
+
+    Returns:
+        Dictionary mapping given IDs to their ordered major revisions.
+    """
+    batches = [ids[i : i + batch_size] for i in range(0, len(ids), batch_size)]
+    results = await asyncio.gather(
+        *(fetch_revision_histories(client, batch) for batch in batches)
+    )
+
+    histories = {}
+    for result in results:
+        histories.update(result)
+
+    return histories
+
+
+async def fetch_last_versions(
+    client: HttpClient, ids: list[str]
+) -> dict[str, int | None]:
+    """Fetches latest version numbers of given IDs using batched requests.
+
+    Args:
+        client: Pooled HTTP client.
+        ids: List of PDB structure IDs.
+
+    Returns:
+        Dictionary mapping given IDs to their latest version, None if not found.
+    """
+    histories = await resolve_revision_histories(client, ids)
+
+    return {id: max(h) if (h := histories.get(id)) else None for id in ids}
+
+
 def get_all_versions(id: str) -> set[int]:
     """Fetches all versions of given structure, if any.
 
@@ -162,7 +301,7 @@ def get_all_versions(id: str) -> set[int]:
     query = get_graphql_query(id)
 
     url = f"{PDB_DATA_API_URL}?query={query}"
-    response = get(url)
+    response = get(url, timeout=HTTP_TIMEOUT)
 
     if response.status_code == 200:
         body = response.json()
@@ -191,7 +330,7 @@ def fetch_files(urls: list[str]) -> list[bytes]:
     files = []
 
     for url in urls:
-        response = get(url)
+        response = get(url, timeout=HTTP_TIMEOUT)
 
         if response.status_code == 200:
             files.append(response.content)
@@ -199,30 +338,92 @@ def fetch_files(urls: list[str]) -> list[bytes]:
     return files
 
 
-def get_file(url: list[str]) -> list[bytes]:
-    """Fetches files from given urls with retry logic.
+def get_file(url: str) -> bytes | None:
+    """Fetches file from given url with bounded retry logic.
 
     Args:
-        url: List of URLs to fetch files from.
+        url: URL to fetch file from.
 
     Returns:
-        List of file contents as bytes.
+        File content as bytes, None if fetching failed.
     """
     log.debug(f"Fetching file from url: {url}")
-    finished = False
-    while not finished:
+    policy = RetryPolicy()
+
+    for attempt in range(policy.attempts):
         try:
-            response = get(url)
+            response = get(url, timeout=HTTP_TIMEOUT)
             code = response.status_code
             if code == 200:
                 log.debug("Fetching complete.")
-                finished = True
                 return response.content
             log.error(f"Unexpected status code {code} for url: {url}")
-        except ConnectTimeout as _:
-            log.error(f"Connection timed out on url: {url}")
+            if not policy.is_retryable(code):
+                break
+        except RequestException as e:
+            log.error(f"Request failed with {e!r} on url: {url}")
+
+        if attempt < policy.retries:
+            sleep(policy.get_delay(attempt))
 
     log.error(f"Fetching failed for url: {url}")
+    return None
+
+
+class FetchError:
+    """Failure of a file download.
+
+    Args:
+        message: Description of the failure, stored with failed fetches.
+        status: Status code of the upstream response, None if there was none.
+    """
+
+    def __init__(self, message: str, status: int | None = None):
+        self.message = message
+        self.status = status
+
+    @property
+    def permanent(self) -> bool:
+        """Whether the file was refused with a status which retrying won't change."""
+        return self.status in PERMANENT_CODES
+
+    def __str__(self) -> str:
+        return self.message
+
+
+async def fetch_file(
+    client: HttpClient, url: str, download: Download | None = None
+) -> tuple[bytes | None, FetchError | None]:
+    """Fetches file from given url using shared client.
+
+    Transient errors are retried by the client, permanent ones such as missing
+    file are reported right away.
+
+    Args:
+        client: Pooled HTTP client.
+        url: URL to fetch file from.
+        download: Download of an insert buffer the file is streamed into, so
+            its budget is reserved as chunks arrive.
+
+    Returns:
+        A tuple containing (file_content, error) where error is None if successful,
+            or (None, error) describing the failure.
+    """
+    log.debug(f"Fetching file from url: {url}")
+    try:
+        response = await client.get(url, download)
+    except (HTTPError, CircuitOpenError) as e:
+        log.error(f"Fetching failed for url: {url} - error: {e!r}")
+        return None, FetchError(f"{type(e).__name__}: {e}")
+
+    code = response.status_code
+    if code == 200:
+        log.debug("Fetching complete.")
+        data = download.getvalue() if download is not None else response.content
+        return data, None
+
+    log.error(f"Unexpected status code {code} for url: {url}")
+    return None, FetchError(f"Status code {code}", code)
 
 
 def fetch_file_at_version(id: str, version: str) -> tuple:
@@ -239,7 +440,7 @@ def fetch_file_at_version(id: str, version: str) -> tuple:
     category = id[1:3].lower()
     file_name = f"{id}_xyz_v{version}.cif.gz"
     url = f"{PDB_HTTP_FILE_URL}{category}/{id}/{file_name}"
-    response = get(url)
+    response = get(url, timeout=HTTP_TIMEOUT)
 
     if response.status_code == 200:
         body = response.content
@@ -259,7 +460,7 @@ def get_list_file(from_date: str, file_name: str) -> list[str]:
     """
     log.debug(f"Trying to fetch file with '{file_name}' entries.")
     url = f"{PDB_FTP_STATUS_URL}{from_date}/{file_name}.pdb"
-    response = get(url)
+    response = get(url, timeout=HTTP_TIMEOUT)
 
     if response.status_code == 200:
         log.debug("File sucessfully fetched.")
@@ -269,6 +470,89 @@ def get_list_file(from_date: str, file_name: str) -> list[str]:
     return []
 
 
+async def fetch_list_file(
+    client: HttpClient, from_date: str, file_name: str
+) -> list[str] | None:
+    """Fetches file with new, updated or removed entries using shared client.
+
+    A list which upstream permanently doesn't have (e.g. 404 for a week without
+    release) is treated as empty, so synchronization moves past that week.
+
+    Args:
+        client: Pooled HTTP client.
+        from_date: The date to fetch entries from.
+        file_name: The type of entries to fetch ('added', 'modified', or 'obsolete').
+
+    Returns:
+        List of PDB IDs from the requested file, None if fetching failed with a
+            transient error.
+    """
+    log.debug(f"Trying to fetch file with '{file_name}' entries from {from_date}.")
+    url = f"{PDB_FTP_STATUS_URL}{from_date}/{file_name}.pdb"
+    try:
+        response = await client.get(url)
+    except (HTTPError, CircuitOpenError) as e:
+        log.error(f"Fetching '{file_name}' entries failed - error: {e!r}")
+        return None
+
+    if response.status_code == 200:
+        return list(response.text.split())
+
+    if response.status_code in PERMANENT_CODES:
+        log.warning(
+            f"No file found for '{file_name}' entries from {from_date} "
+            f"(status code {response.status_code}), skipping the week."
+        )
+        return []
+
+    log.error(
+        f"Fetching '{file_name}' entries from {from_date} failed with status "
+        f"code {response.status_code}."
+    )
+    return None
+
+
+def get_status_dates(
+    since: str | None, max_weeks: int = PDB_SYNC_MAX_WEEKS
+) -> list[str]:
+    """Returns weekly update dates following the last synchronized one.
+
+    Args:
+        since: The last synchronized date in YYYYMMDD format, None if unknown.
+        max_weeks: Maximum number of weeks to return.
+
+    Returns:
+        List of date strings in YYYYMMDD format, oldest first. Only the last
+            date if nothing was synchronized yet.
+    """
+    last_date = get_date(get_last_date(), "YYYYMMDD")
+    dates = []
+
+    for week in range(max_weeks):
+        date = last_date.shift(weeks=-week).format("YYYYMMDD")
+        if since is not None and date <= since:
+            break
+
+        dates.append(date)
+
+        if since is None:
+            break
+
+    return dates[::-1]
+
+
+def get_next_date(date: str) -> str:
+    """Returns the weekly update date following given one.
+
+    Args:
+        date: The date string in YYYYMMDD format.
+
+    Returns:
+        The date string in YYYYMMDD format a week later.
+    """
+    return get_date(date, "YYYYMMDD").shift(weeks=1).format("YYYYMMDD")
+
+
 def get_last_date():
     """Gets last date when files were updated (currently Friday).
 
@@ -0,0 +1,316 @@
+"""Directory watch module for PDB entries.
+
+This module keeps the mirror current with a locally rsync'd wwPDB versioned
+archive. New versioned coordinate files are picked up from inotify events as soon
+as they are written and stored in small batches. The whole tree is also scanned
+periodically, which catches files missed while the watcher was down, when the
+kernel event queue overflowed or when inotify is not available at all.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import signal
+import struct
+from threading import Event
+from time import monotonic
+
+from app.log import log as log
+from app.config import PDB_LOCAL_BATCH_SIZE, WATCH_BATCH_DELAY, WATCH_SCAN_INTERVAL
+from app.fetch.local import (
+    get_batches,
+    import_batch,
+    iter_entry_files,
+    parse_entry_file,
+)
+
+__all__ = ["Inotify", "Watcher", "run"]
+
+# inotify event flags, see inotify(7).
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# Header of an inotify event: watch descriptor, mask, cookie and name length.
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
+    """Minimal inotify wrapper over libc, watching individual directories.
+
+    Raises:
+        OSError: If inotify is not available.
+    """
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+
+        self._libc = libc
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._paths = {}
+
+    def add_watch(self, path: str) -> None:
+        """Starts watching a directory for new files and subdirectories.
+
+        Args:
+            path: Path of the directory.
+
+        Raises:
+            OSError: If the watch can't be added, e.g. when out of watches.
+        """
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), path)
+
+        self._paths[wd] = path
+
+    def read(self, timeout: float) -> list[tuple[str | None, int]]:
+        """Waits for events and returns them.
+
+        Args:
+            timeout: Maximum number of seconds to wait.
+
+        Returns:
+            List of (path, mask) tuples, path is None on queue overflow.
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+
+        data = b""
+        while True:
+            try:
+                data += os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+
+        events, offset = [], 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                events.append((None, mask))
+            elif mask & IN_IGNORED:
+                self._paths.pop(wd, None)
+            elif wd in self._paths:
+                events.append((os.path.join(self._paths[wd], name), mask))
+
+        return events
+
+    def close(self) -> None:
+        """Closes the inotify instance and removes all watches."""
+        os.close(self._fd)
+
+
+class Watcher:
+    """Watches local archive tree and stores new versions in micro-batches.
+
+    Files are collected until there are `batch_size` of them or the oldest one
+    waited `delay` seconds, so bursts of an rsync run are stored together while
+    a single new file is still stored within seconds.
+
+    Args:
+        root: Root of the local archive tree.
+        batch_size: Maximum number of files stored at once.
+        delay: Seconds a new file waits for others to be stored with.
+        scan_interval: Seconds between full scans of the tree.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        batch_size: int = PDB_LOCAL_BATCH_SIZE,
+        delay: float = WATCH_BATCH_DELAY,
+        scan_interval: float = WATCH_SCAN_INTERVAL,
+    ):
+        self.root = root
+        self.batch_size = batch_size
+        self.delay = delay
+        self.scan_interval = scan_interval
+        self.inotify = None
+        self.pending = {}
+        self.pending_since = 0.0
+        self.next_scan = 0.0
+
+    def start_inotify(self) -> None:
+        """Watches the whole tree, falling back to periodic scans on failure."""
+        try:
+            self.inotify = Inotify()
+            self.add_tree(self.root, queue=False)
+        except OSError as e:
+            log.warning(f"Can't watch {self.root}, relying on periodic scans: {e}")
+            self.stop_inotify()
+
+    def stop_inotify(self) -> None:
+        """Closes inotify instance if there is one."""
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+
+    def add_tree(self, path: str, queue: bool = True) -> None:
+        """Watches a directory with all its subdirectories.
+
+        Args:
+            path: Path of the directory.
+            queue: Whether to queue files already present, which could have been
+                written before the watch was added.
+        """
+        for directory, _, names in os.walk(path):
+            try:
+                self.inotify.add_watch(directory)
+            except FileNotFoundError:
+                continue  # removed meanwhile, e.g. rsync temporary directory
+
+            if queue:
+                for name in names:
+                    self.add_file(os.path.join(directory, name))
+
+    def add_file(self, path: str) -> None:
+        """Queues a file for storing if it is a versioned coordinate file.
+
+        Args:
+            path: Path of the file.
+        """
+        parsed = parse_entry_file(os.path.basename(path))
+        if parsed is None:
+            return
+
+        if not self.pending:
+            self.pending_since = monotonic()
+        self.pending[path] = parsed
+
+    def handle_events(self, events: list[tuple[str | None, int]]) -> None:
+        """Queues new files and watches new directories.
+
+        Args:
+            events: List of (path, mask) tuples.
+        """
+        for path, mask in events:
+            if path is None:
+                log.warning("Watch event queue overflowed, scanning tree.")
+                self.next_scan = 0.0
+            elif mask & IN_ISDIR:
+                try:
+                    self.add_tree(path)
+                except OSError as e:
+                    log.warning(f"Can't watch {path}, relying on scans: {e}")
+                    self.stop_inotify()
+                    return
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                self.add_file(path)
+
+    def is_due(self) -> bool:
+        """Checks whether queued files should be stored now."""
+        return bool(self.pending) and (
+            len(self.pending) >= self.batch_size
+            or monotonic() - self.pending_since >= self.delay
+        )
+
+    def flush(self) -> None:
+        """Stores all queued files in batches.
+
+        Failed batches are left for the next full scan.
+        """
+        entries = [(path, *parsed) for path, parsed in self.pending.items()]
+        self.pending = {}
+
+        for batch in get_batches(iter(entries), self.batch_size):
+            try:
+                imported, skipped, failed = import_batch(batch)
+            except Exception as e:
+                log.error(f"Failed to store {len(batch)} watched files: {e}")
+                continue
+
+            log.info(f"Stored {imported} new files, skipped {skipped + failed}.")
+
+    def scan(self, stop: Event) -> None:
+        """Stores all versions in the tree which are not stored yet.
+
+        Args:
+            stop: Event stopping the scan early.
+        """
+        log.info(f"Scanning {self.root} for new files.")
+        imported = 0
+
+        batches = get_batches(iter_entry_files(self.root), self.batch_size)
+        for batch in batches:
+            if stop.is_set():
+                return
+
+            try:
+                imported += import_batch(batch)[0]
+            except Exception as e:
+                log.error(f"Failed to store {len(batch)} scanned files: {e}")
+
+        log.info(f"Scan of {self.root} finished, stored {imported} new files.")
+
+    def get_timeout(self) -> float:
+        """Returns seconds to wait for events before the next due action."""
+        timeout = min(self.delay, self.next_scan - monotonic())
+        if self.pending:
+            timeout = min(timeout, self.pending_since + self.delay - monotonic())
+
+        return max(timeout, 0.0)
+
+    def run(self, stop: Event) -> None:
+        """Watches the tree until stopped.
+
+        The tree is scanned first, so files added while no watcher was running
+        are stored too.
+
+        Args:
+            stop: Event stopping the watcher.
+        """
+        self.start_inotify()
+
+        try:
+            while not stop.is_set():
+                if monotonic() >= self.next_scan:
+                    self.scan(stop)
+                    self.next_scan = monotonic() + self.scan_interval
+
+                if self.inotify is not None:
+                    self.handle_events(self.inotify.read(self.get_timeout()))
+                else:
+                    stop.wait(self.get_timeout())
+
+                if self.is_due():
+                    self.flush()
+
+            self.flush()
+        finally:
+            self.stop_inotify()
+
+
+def run(root: str) -> None:
+    """Watches a local archive tree and stores new versions until stopped.
+
+    Args:
+        root: Root of the local archive tree.
+    """
+    if not os.path.isdir(root):
+        log.error(f"Directory {root} doesn't exist.")
+        return
+
+    stop = Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+
+    log.info(f"Watching {root} for new files.")
+    Watcher(root).run(stop)
+    log.info("Directory watch stopped.")
@@ -14,7 +14,6 @@ from app.log import log as log
 from app.config import API_PATH
 from app.api.main import api_router
 from app.database.database import create_db_and_tables, init_flag_data
-from app.fetch.scheduler import scheduler
 
 router = APIRouter()
 router.include_router(api_router, prefix=API_PATH)
@@ -25,7 +24,8 @@ async def lifespan(app: FastAPI):
     """Manages the application lifecycle events.
 
     This function handles startup and shutdown events for the FastAPI application.
-    It initializes the database, creates necessary tables, and manages the scheduler.
+    It initializes the database and creates necessary tables. Scheduled jobs
+    run in a separate sync worker, see `run_sync_worker.py`.
 
     Args:
         app: The FastAPI application instance.
@@ -41,9 +41,7 @@ async def lifespan(app: FastAPI):
         init_flag_data()
     except OperationalError as e:
         log.error(f"An operational error occured white creating tables: {e.pgcode}")
-    scheduler.start()
     yield
-    scheduler.shutdown()
 
 
 app = FastAPI(
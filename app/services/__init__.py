@@ -1,3 +1,6 @@
 from app.services.protein import ProteinService
 from app.services.files import FileService
 from app.services.failed import FailedFetchService
+from app.services.load_run import LoadRunService
+from app.services.ingest_queue import IngestQueueService
+from app.services.sync_state import SyncStateService
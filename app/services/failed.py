@@ -5,13 +5,20 @@ including tracking failed fetches and managing retry attempts.
 """
 
 from sqlmodel import Session
+
+from app.config import (
+    FAILED_RETRY_ATTEMPTS,
+    FAILED_RETRY_BACKOFF,
+    FAILED_RETRY_BACKOFF_MAX,
+    FAILED_RETRY_LEASE,
+)
 from app.database.repositories import (
     FileRepository,
     FailedFetchRepository,
     ProteinRepository,
 )
 
-from app.database.models import FailedFetch
+from app.database.models import FailedFetch, Operations
 from app.log import log as log
 
 
@@ -36,7 +43,13 @@ class FailedFetchService:
         self.file_repository = FileRepository(db)
         self.protein_repository = ProteinRepository(db)
 
-    def insert_failed_fetch(self, protein_id: str, error: str) -> bool:
+    def insert_failed_fetch(
+        self,
+        protein_id: str,
+        error: str,
+        operation: Operations = Operations.ADDED,
+        version: int | None = None,
+    ) -> bool:
         """Inserts a record of a failed fetch operation.
 
         If the protein doesn't exist, creates a new protein entry first.
@@ -44,26 +57,53 @@ class FailedFetchService:
         Args:
             protein_id: The ID of the protein that failed to fetch.
             error: The error message describing why the fetch failed.
+            operation: The operation that failed.
+            version: The version that failed to fetch, defaults to the one
+                following the latest stored version.
 
         Returns:
             True if insertion was successful, False otherwise.
         """
-        protein = self.protein_repository.get_protein_by_id(protein_id=protein_id)
-
-        if not protein:
-            log.debug(f"Protein {protein_id} not found, inserting new protein entry.")
-            self.protein_repository.insert_protein(protein_id=protein_id)
-
-        version = (
-            self.file_repository.get_latest_version_by_protein_id(protein_id=protein_id)
-            + 1
+        self.protein_repository.insert_in_bulk(
+            [{"id": protein_id, "deprecated": False}]
         )
+
+        if version is None:
+            version = (
+                self.file_repository.get_latest_version_by_protein_id(
+                    protein_id=protein_id
+                )
+                + 1
+            )
         result = self.failed_fetch_repository.insert_new_failed_fetch(
-            protein_id=protein_id, version=version, error=error
+            protein_id=protein_id,
+            version=version,
+            error=error,
+            operation_flag=operation.value,
         )
 
         return result
 
+    def insert_failed_fetches(
+        self,
+        failed: list[tuple[str, int | None, str]],
+        operation: Operations = Operations.ADDED,
+    ) -> None:
+        """Inserts records of multiple failed fetch operations at once.
+
+        Args:
+            failed: List of (protein_id, version, error) tuples, version may be
+                None if unknown.
+            operation: The operation that failed.
+        """
+        if not failed:
+            return
+
+        protein_ids, versions, errors = map(list, zip(*failed))
+        self.failed_fetch_repository.insert_in_bulk(
+            protein_ids, versions, errors, operation.value
+        )
+
     def get_all_failed_fetches(self) -> list[FailedFetch]:
         """Retrieves all failed fetch records.
 
@@ -71,3 +111,48 @@ class FailedFetchService:
             List of all failed fetch records in the database.
         """
         return self.failed_fetch_repository.get_all_failed_fetches()
+
+    def claim_due_failed_fetches(
+        self, limit: int, max_attempts: int = FAILED_RETRY_ATTEMPTS
+    ) -> list[tuple]:
+        """Claims failed fetches whose backoff has passed for a retry.
+
+        Args:
+            limit: Maximum number of records to claim.
+            max_attempts: Number of retries after which records are left alone.
+
+        Returns:
+            List of (id, protein_id, version, operation_flag) tuples.
+        """
+        return self.failed_fetch_repository.claim_due_failed_fetches(
+            limit, max_attempts, FAILED_RETRY_LEASE
+        )
+
+    def resolve_failed_fetches(self, entries: list[tuple[str, int]]) -> int:
+        """Removes failed fetches of protein versions which were stored since.
+
+        Args:
+            entries: List of (protein_id, version) tuples.
+
+        Returns:
+            Number of removed records.
+        """
+        if not entries:
+            return 0
+
+        protein_ids, versions = map(list, zip(*entries))
+        return self.failed_fetch_repository.delete_resolved(protein_ids, versions)
+
+    def postpone_failed_fetches(self, failed: list[tuple[int, str]]) -> None:
+        """Records failed retries and schedules the next ones with backoff.
+
+        Args:
+            failed: List of (id, error) tuples of failed fetch records.
+        """
+        if not failed:
+            return
+
+        ids, errors = map(list, zip(*failed))
+        self.failed_fetch_repository.postpone(
+            ids, errors, FAILED_RETRY_BACKOFF, FAILED_RETRY_BACKOFF_MAX
+        )
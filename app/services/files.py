@@ -4,11 +4,17 @@ This module provides a service layer for handling protein file-related operation
 including file retrieval, version management, and bulk file operations.
 """
 
+import os
+import zlib
 from datetime import datetime
 from sqlmodel import Session
 
+from app.config import DELTA_BATCH_SIZE, DELTA_MAX_RATIO, FILE_STORE_BATCH_SIZE
+
 from app.database.repositories import FileRepository, ProteinRepository
 from app.database.models import FileBase, File, FileInsert, ChangeInsert
+from app.database.delta import apply_gzip_delta, encode_gzip_delta, reconstructions
+from app.database.store import BlobStore, get_blob_store, get_hash
 from app.log import log as log
 from app.database.repositories.change import ChangeRepository
 
@@ -18,11 +24,17 @@ class FileService:
 
     This class provides methods for interacting with protein files in the database,
     including file retrieval, version management, and bulk file operations.
+    Contents are addressed by their SHA-256 and each distinct content is kept
+    once, in the file content table or, with a file store configured, in the
+    store. Files refer to their content by hash. Files stored earlier are still
+    read from their own records. Older versions may be kept as deltas against
+    their next version and are rebuilt when requested.
     """
 
     file_repository: FileRepository
     protein_repository: ProteinRepository
     change_repository: ChangeRepository
+    blob_store: BlobStore | None
 
     def __init__(self, db: Session):
         """Initialize the file service with database session.
@@ -33,21 +45,126 @@ class FileService:
         self.file_repository = FileRepository(db)
         self.protein_repository = ProteinRepository(db)
         self.change_repository = ChangeRepository(db)
+        self.blob_store = get_blob_store()
+
+    def _read_content(
+        self, file: File, as_path: bool = False
+    ) -> bytes | memoryview | str | None:
+        """Returns content of a file record from the store or the database.
+
+        Contents missing in the store are loaded from the file record or the
+        file content table, where files stored before the store was configured
+        are kept. Older versions kept as deltas are rebuilt from the next one.
+
+        Args:
+            file: The file record.
+            as_path: If True, return path of content kept on disk instead of
+                reading it.
+
+        Returns:
+            The file content (a memory mapped slice for pack store) or its
+                path, None if it is missing.
+        """
+        if file.sha256 and self.blob_store:
+            if as_path:
+                path = self.blob_store.get_path(file.protein_id, file.sha256)
+                if path is not None and os.path.isfile(path):
+                    return path
+
+            data = self.blob_store.get(file.protein_id, file.sha256)
+            if data is not None:
+                return data
+
+        if file.file is not None:
+            return bytes(file.file)
+
+        if file.sha256:
+            data = self.file_repository.get_content(file.sha256)
+            if data is not None:
+                return data
+
+        data = self._reconstruct(file)
+        if data is not None:
+            return data
+
+        log.error(f"Content of file {file.id} is missing.")
+        return None
+
+    def _reconstruct(self, file: File) -> bytes | None:
+        """Rebuilds content of a file kept as delta against its next version.
+
+        Rebuilt contents are byte-identical to the downloaded file, which is
+        checked against its hash. They are cached, so frequently requested older
+        versions are patched only once per process.
+
+        Args:
+            file: The file record.
+
+        Returns:
+            The gzipped file content, None if the file is not kept as delta or
+                it can't be rebuilt.
+        """
+        data = reconstructions.get(file.id)
+        if data is not None:
+            return data
+
+        delta = self.file_repository.get_delta(file.id)
+        if delta is None:
+            return None
+
+        base_file = self.file_repository.get_by_id(
+            delta.base_id, with_data=self.blob_store is None
+        )
+        base = self._read_content(base_file) if base_file else None
+        if base is None:
+            return None
+
+        data = apply_gzip_delta(base, delta.data)
+        if file.sha256 and get_hash(data) != file.sha256:
+            log.error(f"Rebuilt content of file {file.id} doesn't match its hash.")
+            return None
+
+        reconstructions.put(file.id, data)
+
+        return data
+
+    def _store_content(self, protein_id: str, data: bytes) -> tuple[bytes | None, str]:
+        """Writes file content to the store, if there is one.
+
+        Args:
+            protein_id: ID of the protein the file belongs to.
+            data: The file content.
+
+        Returns:
+            Tuple of content to keep in the file content table (None if it was
+                written to the store) and its SHA-256.
+        """
+        sha256 = get_hash(data)
+        if self.blob_store is None:
+            return data, sha256
+
+        self.blob_store.put(protein_id, sha256, data)
+        return None, sha256
 
-    def get_latest_by_protein_id(self, protein_id: str) -> bytes:
+    def get_latest_by_protein_id(
+        self, protein_id: str, as_path: bool = False
+    ) -> bytes | memoryview | str | None:
         """Fetches latest entry of given protein.
 
         Args:
             protein_id: The ID of the protein to fetch.
+            as_path: If True, return path of content kept on disk instead of
+                reading it.
 
         Returns:
-            The latest file content if found, None otherwise.
+            The latest file content or its path if found, None otherwise.
         """
-        data: FileBase = self.file_repository.get_latest_by_protein_id(protein_id)
+        data: FileBase = self.file_repository.get_latest_by_protein_id(
+            protein_id, with_data=self.blob_store is None
+        )
 
         if data:
-            binary_file = data.file
-            return bytes(binary_file)
+            return self._read_content(data, as_path)
 
         return None
 
@@ -67,45 +184,96 @@ class FileService:
 
         return None
 
+    def get_latest_versions(self, protein_ids: list[str]) -> dict[str, int]:
+        """Fetches latest stored version numbers of given proteins.
+
+        Args:
+            protein_ids: IDs of the proteins to fetch versions for.
+
+        Returns:
+            Dictionary mapping protein IDs to their latest version, proteins
+                without stored files are left out.
+        """
+        if not protein_ids:
+            return {}
+
+        return self.file_repository.get_latest_versions(protein_ids)
+
+    def get_stored_versions(self, protein_ids: list[str]) -> set[tuple[str, int]]:
+        """Fetches all stored versions of given proteins.
+
+        Args:
+            protein_ids: IDs of the proteins to fetch versions for.
+
+        Returns:
+            Set of (protein_id, version) tuples.
+        """
+        if not protein_ids:
+            return set()
+
+        return self.file_repository.get_stored_versions(protein_ids)
+
+    def get_missing_versions(
+        self, versions: dict[str, list[int]]
+    ) -> list[tuple[str, int]]:
+        """Finds which of given protein versions are not stored yet.
+
+        Args:
+            versions: Dictionary mapping protein IDs to their versions.
+
+        Returns:
+            List of missing (protein_id, version) tuples.
+        """
+        pairs = [(id, version) for id, values in versions.items() for version in values]
+        if not pairs:
+            return []
+
+        protein_ids, numbers = map(list, zip(*pairs))
+        return self.file_repository.get_missing_versions(protein_ids, numbers)
+
     def get_by_version_and_protein_id(
-        self, protein_id: str, version: int
-    ) -> bytes | None:
+        self, protein_id: str, version: int, as_path: bool = False
+    ) -> bytes | memoryview | str | None:
         """Fetches specific version of a protein entry.
 
         Args:
             protein_id: The ID of the protein to fetch.
             version: The specific version to fetch.
+            as_path: If True, return path of content kept on disk instead of
+                reading it.
 
         Returns:
-            The file content if found, None otherwise.
+            The file content or its path if found, None otherwise.
         """
         data: File = self.file_repository.get_by_protein_id_at_version(
-            protein_id, version
+            protein_id, version, with_data=self.blob_store is None
         )
 
         if data:
-            binary_file = data.file
-            return bytes(binary_file)
+            return self._read_content(data, as_path)
 
         return None
 
     def get_latest_by_id_before_date(
-        self, protein_id: str, date: datetime
-    ) -> bytes | None:
+        self, protein_id: str, date: datetime, as_path: bool = False
+    ) -> bytes | memoryview | str | None:
         """Fetches latest protein entry prior to specified date.
 
         Args:
             protein_id: The ID of the protein to fetch.
             date: The cutoff date for the file version.
+            as_path: If True, return path of content kept on disk instead of
+                reading it.
 
         Returns:
-            The file content if found, None otherwise.
+            The file content or its path if found, None otherwise.
         """
-        data: File = self.file_repository.get_latest_by_id_before_date(protein_id, date)
+        data: File = self.file_repository.get_latest_by_id_before_date(
+            protein_id, date, with_data=self.blob_store is None
+        )
 
         if data:
-            binary_file = data.file
-            return bytes(binary_file)
+            return self._read_content(data, as_path)
 
         return None
 
@@ -118,21 +286,21 @@ class FileService:
         Returns:
             List of file contents if found, None otherwise.
         """
-        data: list[File] = self.file_repository.get_new_files_after_date(date)
+        data: list[File] = self.file_repository.get_new_files_after_date(
+            date, with_data=self.blob_store is None
+        )
 
         if data:
-            output = []
-            for entry in data:
-                binary_file = entry.file
-                output.append(bytes(binary_file))
-            return output
+            contents = (self._read_content(entry) for entry in data)
+            return [bytes(content) for content in contents if content is not None]
 
         return None
 
     def insert_new_version(self, protein_id: str, file: bytes, version: int) -> bool:
         """Inserts a new version of given protein.
 
-        If protein doesn't have an entry, creates it first.
+        If protein doesn't have an entry, creates it in the same statement.
+        Versions which are already stored are left untouched.
 
         Args:
             protein_id: The ID of the protein to insert.
@@ -140,43 +308,53 @@ class FileService:
             version: The version number of the file.
 
         Returns:
-            True if insertion was successful, False otherwise.
+            True if the version was inserted, False otherwise.
         """
-        protein = self.protein_repository.get_protein_by_id(protein_id=protein_id)
-
-        if not protein:
-            log.debug(f"Protein {protein_id} not found, inserting new protein entry.")
-            self.protein_repository.insert_protein(protein_id=protein_id)
-
-        result = self.file_repository.insert_new_version(
-            protein_id=protein_id, file=file, version=version
+        content, sha256 = self._store_content(protein_id, file)
+        file_id = self.file_repository.insert_new_version(
+            protein_id=protein_id, file=content, version=version, sha256=sha256
         )
-        return result
+        return file_id is not None
 
     def bulk_insert_new_files(
         self, files: list[FileInsert], changes: list[ChangeInsert]
     ) -> None:
         """Inserts new file entries in bulk.
 
+        Versions which are already stored are skipped together with their
+        changes.
+
         Args:
             files: List of file objects to insert.
-            changes: List of change objects to insert.
+            changes: List of change objects to insert, one per file, None for
+                files stored without a change.
         """
         file_values = []
         change_values = []
+        contents = {}
 
         for file in files:
+            content, sha256 = self._store_content(file.protein_id, file.file)
+            if content is not None:
+                contents[sha256] = content
             file_values.append(
                 {
                     "protein_id": file.protein_id,
                     "version": file.version,
-                    "file": file.file,
+                    "file": None,
+                    "sha256": sha256,
                 }
             )
 
-        file_ids = self.file_repository.insert_in_bulk(file_values)
+        self.file_repository.insert_contents(contents)
+        rows = self.file_repository.insert_in_bulk(file_values)
+        file_ids = {(protein_id, version): id for id, protein_id, version in rows}
+
+        for file, change in zip(files, changes):
+            file_id = file_ids.get((file.protein_id, file.version))
+            if file_id is None:
+                continue
 
-        for file_id, change in zip(file_ids, changes):
             change_values.append(
                 {
                     "protein_id": change.protein_id,
@@ -186,4 +364,128 @@ class FileService:
                 }
             )
 
-        self.change_repository.insert_bulk(change_values)
+        if change_values:
+            self.change_repository.insert_bulk(change_values)
+
+    def copy_new_files(
+        self, files: list[FileInsert], changes: list[ChangeInsert | None]
+    ) -> list[int]:
+        """Inserts new file entries, their proteins and changes using binary COPY.
+
+        Rows are staged with COPY and inserted by a single statement, so the
+        batch takes one round trip and can be safely repeated. Versions which
+        are already stored are skipped together with their changes.
+
+        Args:
+            files: List of file objects to insert.
+            changes: List of change objects to insert, one per file.
+
+        Returns:
+            List of IDs of the inserted files.
+        """
+        rows = self.file_repository.copy_in_bulk(
+            (
+                file.protein_id,
+                file.version,
+                *self._store_content(file.protein_id, file.file),
+                change.timestamp if change else None,
+                change.operation_flag if change else None,
+            )
+            for file, change in zip(files, changes)
+        )
+        self.file_repository.commit()
+
+        return [file_id for file_id, _, _ in rows]
+
+    def compact_versions(self, batch_size: int = DELTA_BATCH_SIZE) -> int:
+        """Keeps older versions as deltas against their next version.
+
+        Only contents kept in the database are encoded. Deltas larger than
+        DELTA_MAX_RATIO of the gzipped content, deltas of files whose gzip
+        stream can't be reproduced and deltas not rebuilding the exact file are
+        discarded and the full content is kept, such files are not checked
+        again.
+
+        Args:
+            batch_size: Maximum number of files encoded at once.
+
+        Returns:
+            Number of files encoded as deltas.
+        """
+        encoded, after = 0, 0
+
+        while candidates := self.file_repository.get_delta_candidates(
+            after, batch_size
+        ):
+            deltas = []
+            for file_id, base_id in candidates:
+                file = self.file_repository.get_by_id(file_id)
+                base_file = self.file_repository.get_by_id(
+                    base_id, with_data=self.blob_store is None
+                )
+                target = self._read_content(file)
+                base = self._read_content(base_file)
+                if target is None or base is None:
+                    continue
+
+                try:
+                    data = encode_gzip_delta(base, target)
+                    if data is not None and apply_gzip_delta(base, data) != target:
+                        data = None
+                except (OSError, EOFError, ValueError, zlib.error) as e:
+                    log.warning(f"Can't encode file {file_id} as delta: {e}")
+                    data = None
+
+                if data is not None and len(data) > len(target) * DELTA_MAX_RATIO:
+                    data = None
+                deltas.append({"file_id": file_id, "base_id": base_id, "data": data})
+
+            if deltas:
+                self.file_repository.insert_deltas(deltas)
+            encoded += sum(delta["data"] is not None for delta in deltas)
+            after = candidates[-1][0]
+            log.info(f"Encoded {encoded} older versions as deltas.")
+
+        return encoded
+
+    def move_to_store(self, batch_size: int = FILE_STORE_BATCH_SIZE) -> int:
+        """Moves contents kept in the database to the configured store.
+
+        Without a file store, contents of file records are deduplicated into
+        the file content table. Otherwise contents of file records and of the
+        file content table are written to the file store. Each batch is written
+        before its contents are released from the database, so an interrupted
+        move can simply be repeated.
+
+        Args:
+            batch_size: Maximum number of files or contents moved at once.
+
+        Returns:
+            Number of moved files and contents.
+        """
+        moved = 0
+
+        if self.blob_store is None:
+            while count := self.file_repository.deduplicate_contents(batch_size):
+                moved += count
+                log.info(f"Moved {moved} files to file content table.")
+
+            return moved
+
+        while rows := self.file_repository.get_contents_in_database(batch_size):
+            hashes = [
+                self._store_content(protein_id, data)[1] for _, protein_id, data in rows
+            ]
+            self.file_repository.release_contents([id for id, _, _ in rows], hashes)
+            moved += len(rows)
+            log.info(f"Moved {moved} files to file store.")
+
+        while rows := self.file_repository.get_contents_in_table(batch_size):
+            for sha256, protein_ids, data in rows:
+                for protein_id in protein_ids:
+                    self.blob_store.put(protein_id, sha256, bytes(data))
+            self.file_repository.delete_contents([sha256 for sha256, _, _ in rows])
+            moved += len(rows)
+            log.info(f"Moved {moved} files and contents to file store.")
+
+        return moved
@@ -0,0 +1,157 @@
+"""Service module for managing the distributed ingest work queue.
+
+This module provides a service layer for queueing entry versions to ingest and for
+claiming and settling batches of queued tasks by workers.
+"""
+
+from sqlmodel import Session
+
+from app.config import (
+    FAILED_RETRY_ATTEMPTS,
+    FAILED_RETRY_BACKOFF,
+    FAILED_RETRY_BACKOFF_MAX,
+    PDB_INGEST_ATTEMPTS,
+    PDB_INGEST_BACKOFF,
+    PDB_INGEST_BACKOFF_MAX,
+    PDB_INGEST_LEASE,
+)
+from app.database.repositories import IngestTaskRepository
+from app.database.models import Operations, TaskState
+from app.log import log as log
+
+
+class IngestQueueService:
+    """Service class for managing the distributed ingest work queue.
+
+    Tasks which run out of attempts stay in the queue as failed and are also
+    returned to the caller, so they can be recorded as failed fetches.
+    """
+
+    ingest_task_repository: IngestTaskRepository
+
+    def __init__(self, db: Session):
+        """Initialize the ingest queue service with database session.
+
+        Args:
+            db: SQLModel database session.
+        """
+        self.ingest_task_repository = IngestTaskRepository(db)
+
+    def enqueue(self, entries: list[tuple[str, int]], operation: Operations) -> int:
+        """Queues entry versions for ingest.
+
+        Args:
+            entries: List of (protein_id, version) tuples.
+            operation: The operation recorded for stored files.
+
+        Returns:
+            Number of newly queued tasks.
+        """
+        if not entries:
+            return 0
+
+        protein_ids, versions = map(list, zip(*entries))
+        count = self.ingest_task_repository.enqueue(
+            protein_ids, versions, [operation.value] * len(entries)
+        )
+        log.debug(f"Queued {count} of {len(entries)} entries for ingest.")
+
+        return count
+
+    def enqueue_failed_fetches(self) -> int:
+        """Queues failed fetches due to be retried, counting the retry.
+
+        Returns:
+            Number of queued tasks.
+        """
+        count = self.ingest_task_repository.enqueue_failed_fetches(
+            FAILED_RETRY_ATTEMPTS,
+            FAILED_RETRY_BACKOFF,
+            FAILED_RETRY_BACKOFF_MAX,
+            Operations.OBSOLETE.value,
+        )
+        log.debug(f"Queued {count} failed fetches for ingest.")
+
+        return count
+
+    def claim(
+        self,
+        limit: int,
+        lease: float = PDB_INGEST_LEASE,
+        max_attempts: int = PDB_INGEST_ATTEMPTS,
+    ) -> tuple[list[tuple], list[tuple]]:
+        """Claims a batch of tasks, failing expired tasks out of attempts first.
+
+        Args:
+            limit: Maximum number of tasks to claim.
+            lease: Seconds the tasks stay reserved for the worker.
+            max_attempts: Maximum number of attempts of a task.
+
+        Returns:
+            A tuple containing:
+                - list[tuple]: Claimed (id, protein_id, version, operation_flag)
+                - list[tuple]: Expired (protein_id, version, operation_flag, error)
+        """
+        expired = self.ingest_task_repository.expire_leases(max_attempts)
+        tasks = self.ingest_task_repository.claim(limit, lease, max_attempts)
+
+        return tasks, expired
+
+    def settle(
+        self,
+        done: list[int],
+        failed: list[tuple[int, str, bool]],
+        max_attempts: int = PDB_INGEST_ATTEMPTS,
+    ) -> list[tuple]:
+        """Removes finished tasks and returns failed ones to the queue.
+
+        Failed tasks are claimable again after a backoff growing with their
+        attempts, tasks failing permanently are failed right away.
+
+        Args:
+            done: IDs of the stored tasks.
+            failed: List of (id, error, permanent) tuples of the failed tasks.
+            max_attempts: Maximum number of attempts of a task.
+
+        Returns:
+            List of (protein_id, version, operation_flag, error) tuples of the
+                tasks which failed for good.
+        """
+        if done:
+            self.ingest_task_repository.delete(done)
+
+        if not failed:
+            return []
+
+        ids, errors, permanent = map(list, zip(*failed))
+        return self.ingest_task_repository.release(
+            ids,
+            errors,
+            permanent,
+            max_attempts,
+            PDB_INGEST_BACKOFF,
+            PDB_INGEST_BACKOFF_MAX,
+        )
+
+    def get_next_available(
+        self, max_attempts: int = PDB_INGEST_ATTEMPTS
+    ) -> float | None:
+        """Retrieves seconds until a pending task waiting for backoff is due.
+
+        Args:
+            max_attempts: Maximum number of attempts of a task.
+
+        Returns:
+            Seconds to wait, None if no task is pending.
+        """
+        return self.ingest_task_repository.get_next_available(max_attempts)
+
+    def get_counts(self) -> dict[TaskState, int]:
+        """Retrieves number of queued tasks in each state.
+
+        Returns:
+            Dictionary mapping task states to numbers of tasks.
+        """
+        counts = self.ingest_task_repository.get_counts()
+
+        return {state: counts.get(state.value, 0) for state in TaskState}
@@ -0,0 +1,164 @@
+"""Service module for managing full load progress.
+
+This module provides a service layer for the full load ledger, including
+starting or resuming runs, checkpointing completed pages and reporting progress.
+"""
+
+from sqlmodel import Session
+
+from app.database.repositories import LoadRunRepository
+from app.database.models import LoadRun, EntryStatus
+from app.log import log as log
+
+
+class LoadRunService:
+    """Service class for managing full load progress.
+
+    This class provides methods for resuming interrupted full loads and for
+    recording which pages and entries were already processed.
+    """
+
+    load_run_repository: LoadRunRepository
+
+    def __init__(self, db: Session):
+        """Initialize the load run service with database session.
+
+        Args:
+            db: SQLModel database session.
+        """
+        self.load_run_repository = LoadRunRepository(db)
+
+    def get_or_create_run(
+        self, start: int | None, total: int, restart: bool = False, create: bool = True
+    ) -> LoadRun | None:
+        """Returns unfinished run to resume, or creates a new one.
+
+        Unfinished run is resumed only if no explicit start is given. Lookup and
+        creation run under an advisory lock, so concurrently started shards
+        agree on a single run.
+
+        Args:
+            start: Search API index to start from, None to resume.
+            total: Total number of entries reported by Search API.
+            restart: If True, never resume unfinished run.
+            create: If False, only resume unfinished run and never create one.
+
+        Returns:
+            The run to process, None if there is none to resume and create is
+                False.
+        """
+        self.load_run_repository.lock()
+
+        if start is None and not restart:
+            run = self.load_run_repository.get_unfinished_run()
+
+            if run:
+                log.info(f"Resuming unfinished load run {run.id} from {run.started}.")
+                if run.total != total:
+                    self.load_run_repository.update_total(run.id, total)
+                    run.total = total
+                return run
+
+        if not create:
+            return None
+
+        run = self.load_run_repository.insert_run(start=start or 0, total=total)
+        log.info(f"Created new load run {run.id} starting at {run.start}.")
+
+        return run
+
+    def get_run(self, run_id: int) -> LoadRun | None:
+        """Returns run with given ID.
+
+        Args:
+            run_id: The ID of the run.
+
+        Returns:
+            The run if found.
+        """
+        return self.load_run_repository.get_run(run_id)
+
+    def get_pending_starts(self, run: LoadRun, page_size: int) -> list[int]:
+        """Returns indices of pages which weren't completed yet.
+
+        Args:
+            run: The processed run.
+            page_size: Number of entries per page.
+
+        Returns:
+            Ordered list of Search API indices of remaining pages.
+        """
+        completed = self.load_run_repository.get_completed_starts(run.id)
+        starts = range(run.start, run.total, page_size)
+
+        return [start for start in starts if start not in completed]
+
+    def get_progress(self, run: LoadRun) -> tuple[int, int]:
+        """Returns number of processed and failed entries of a run.
+
+        Args:
+            run: The processed run.
+
+        Returns:
+            Tuple of processed and failed counts.
+        """
+        return self.load_run_repository.get_progress(run.id)
+
+    def get_processed_ids(self, run: LoadRun, protein_ids: list[str]) -> set[str]:
+        """Returns which of given proteins were already stored in a run.
+
+        Args:
+            run: The processed run.
+            protein_ids: IDs of proteins to check.
+
+        Returns:
+            Set of protein IDs stored successfully in the run.
+        """
+        if not protein_ids:
+            return set()
+
+        return self.load_run_repository.get_processed_ids(run.id, protein_ids)
+
+    def record_entries(
+        self, run: LoadRun, id_to_version: dict, status: EntryStatus
+    ) -> None:
+        """Records processing status of given entries.
+
+        Args:
+            run: The processed run.
+            id_to_version: Dictionary mapping protein IDs to fetched versions.
+            status: Processing result of the entries.
+        """
+        if not id_to_version:
+            return
+
+        values = [
+            {
+                "run_id": run.id,
+                "protein_id": protein_id,
+                "version": version,
+                "status": status.value,
+            }
+            for protein_id, version in id_to_version.items()
+        ]
+        self.load_run_repository.insert_entries(values)
+
+    def complete_page(self, run: LoadRun, start: int, processed: int, failed: int):
+        """Records checkpoint of a completed page.
+
+        Args:
+            run: The processed run.
+            start: Search API index of the page.
+            processed: Number of entries processed on the page.
+            failed: Number of entries which failed on the page.
+        """
+        self.load_run_repository.insert_page(run.id, start, processed, failed)
+
+    def finish_run(self, run: LoadRun) -> None:
+        """Marks run as finished.
+
+        Args:
+            run: The processed run.
+        """
+        self.load_run_repository.finish_run(run.id)
+        log.info(f"Load run {run.id} finished.")
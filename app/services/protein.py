@@ -60,6 +60,18 @@ class ProteinService:
 
         return []
 
+    def get_ids_after(self, after: str | None, limit: int) -> list[str]:
+        """Returns next page of current protein IDs.
+
+        Args:
+            after: Last ID of the previous page, None for the first page.
+            limit: Maximum number of IDs to return.
+
+        Returns:
+            List of protein IDs ordered by ID.
+        """
+        return self.protein_repository.get_ids_after(after, limit)
+
     def get_protein_ids_after_date(self, date: datetime) -> list[str]:
         """Retrieves ids of entries with files created after given date.
 
@@ -104,3 +116,57 @@ class ProteinService:
             values.append({"id": id, "deprecated": False})
 
         self.protein_repository.insert_in_bulk(values)
+
+    def copy_new_proteins(self, ids: list[str]):
+        """Inserts missing protein entries in bulk using binary COPY.
+
+        Args:
+            ids: List of protein IDs to insert.
+        """
+        self.protein_repository.copy_in_bulk(ids)
+
+    def deprecate_proteins(self, ids: list[str]) -> list[str]:
+        """Marks given proteins as deprecated in bulk.
+
+        Args:
+            ids: List of protein IDs to deprecate.
+
+        Returns:
+            List of protein IDs which were found and deprecated.
+        """
+        if not ids:
+            return []
+
+        return self.protein_repository.deprecate_in_bulk(ids)
+
+    def diff_holdings(self, holdings: dict) -> dict[Operations, list[str]]:
+        """Finds entries which differ from upstream holdings.
+
+        Args:
+            holdings: Dictionary mapping protein IDs of all current upstream
+                entries to their last modification time.
+
+        Returns:
+            Dictionary mapping operations to protein IDs which need them, i.e.
+                missing, stale and obsolete entries.
+        """
+        rows = self.protein_repository.diff_holdings(holdings.items())
+        diff = {operation: [] for operation in Operations}
+
+        for protein_id, flag in rows:
+            diff[Operations(flag)].append(protein_id)
+
+        return diff
+
+    def mark_checked(self, checked: dict):
+        """Records proteins confirmed current up to their upstream modification.
+
+        Entries modified upstream only by minor revisions get no new version,
+        so they aren't reported as stale again until modified once more.
+
+        Args:
+            checked: Dictionary mapping protein IDs to their upstream
+                modification time.
+        """
+        if checked:
+            self.protein_repository.set_checked(list(checked), list(checked.values()))
@@ -0,0 +1,46 @@
+"""Service module for managing the weekly synchronization state.
+
+This module provides a service layer for tracking which weekly update lists were
+already processed by the synchronization jobs.
+"""
+
+from sqlmodel import Session
+
+from app.database.repositories import SyncStateRepository
+from app.database.models import Operations
+from app.log import log as log
+
+
+class SyncStateService:
+    """Service class for managing the weekly synchronization state."""
+
+    sync_state_repository: SyncStateRepository
+
+    def __init__(self, db: Session):
+        """Initialize the sync state service with database session.
+
+        Args:
+            db: SQLModel database session.
+        """
+        self.sync_state_repository = SyncStateRepository(db)
+
+    def get_last_date(self, operation: Operations) -> str | None:
+        """Returns the date of the last processed list of given operation.
+
+        Args:
+            operation: The operation whose lists are processed.
+
+        Returns:
+            Date in YYYYMMDD format, None if no list was processed yet.
+        """
+        return self.sync_state_repository.get_last_date(operation.value)
+
+    def set_last_date(self, operation: Operations, last_date: str) -> None:
+        """Records the date of the last processed list of given operation.
+
+        Args:
+            operation: The operation whose lists are processed.
+            last_date: Date in YYYYMMDD format.
+        """
+        self.sync_state_repository.set_last_date(operation.value, last_date)
+        log.debug(f"Synchronized {operation.name.lower()} entries up to {last_date}.")
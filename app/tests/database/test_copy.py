@@ -0,0 +1,44 @@
+"""Tests for binary COPY encoding."""
+
+import struct
+from datetime import datetime
+
+import pytest
+
+from app.database.copy import COPY_HEADER, COPY_TRAILER, CopyStream, encode_value
+
+
+def test_encode_value_types():
+    """Test values are encoded in PostgreSQL binary format."""
+    assert encode_value(None) == struct.pack("!i", -1)
+    assert encode_value(True) == struct.pack("!i", 1) + b"\x01"
+    assert encode_value(7) == struct.pack("!ii", 4, 7)
+    assert encode_value("pdb") == struct.pack("!i", 3) + b"pdb"
+    assert encode_value(b"\x00\x01") == struct.pack("!i", 2) + b"\x00\x01"
+    assert encode_value(datetime(2000, 1, 2)) == struct.pack("!iq", 8, 86400000000)
+
+    with pytest.raises(TypeError):
+        encode_value(1.5)
+
+
+def test_copy_stream_chunks():
+    """Test stream yields header, rows and trailer across small reads."""
+    rows = [(1, "a"), (2, None)]
+    expected = (
+        COPY_HEADER
+        + struct.pack("!h", 2)
+        + encode_value(1)
+        + encode_value("a")
+        + struct.pack("!h", 2)
+        + encode_value(2)
+        + encode_value(None)
+        + COPY_TRAILER
+    )
+
+    stream = CopyStream(rows)
+    chunks = []
+    while chunk := stream.read(5):
+        assert len(chunk) <= 5
+        chunks.append(chunk)
+
+    assert b"".join(chunks) == expected
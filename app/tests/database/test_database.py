@@ -0,0 +1,37 @@
+"""Tests for database helpers."""
+
+from unittest.mock import Mock, patch
+
+from app.database import database
+from app.database.repositories import FileRepository
+
+
+def test_leader_lock_waits_for_lock(mock_db_engine):
+    """Test standby process retries until it acquires and then releases the lock."""
+    autocommit = mock_db_engine.connect.return_value.execution_options
+    connection = autocommit.return_value.__enter__.return_value
+    connection.execute.return_value.scalar.side_effect = [False, False, True]
+
+    with patch.object(database, "sleep") as sleep:
+        with database.leader_lock(1, interval=5) as leader:
+            assert leader is connection
+            assert sleep.call_count == 2
+
+    autocommit.assert_called_once_with(isolation_level="AUTOCOMMIT")
+    unlock = connection.execute.call_args
+    assert "pg_advisory_unlock" in str(unlock.args[0])
+    assert unlock.args[1] == {"lock_id": 1}
+
+
+def test_ensure_unique_versions_skips_existing_key():
+    """Test duplicates are only removed while the unique key is missing."""
+    db = Mock()
+    db.exec.return_value.scalar.return_value = True
+
+    FileRepository(db).ensure_unique_versions()
+    assert db.exec.call_count == 1
+
+    db.exec.return_value.scalar.return_value = False
+    FileRepository(db).ensure_unique_versions()
+    assert "DELETE FROM file" in str(db.exec.call_args_list[2].args[0])
+    db.commit.assert_called_once()
@@ -0,0 +1,145 @@
+"""Tests for delta encoding of older file versions."""
+
+import gzip
+import io
+import zlib
+from unittest.mock import Mock, patch
+
+from app.database import delta
+from app.database.models import File, FileDelta
+from app.database.store import get_hash
+from app.services import FileService
+
+# Mock data
+MOCK_PROTEIN_ID = "pdb_00001abc"
+NEW_CONTENT = b"".join(
+    f"ATOM {i} C 1.000 2.000 3.000\n".encode() for i in range(1000)
+) + (b"_pdbx_audit_revision_history.revision_date 2024-05-01\n")
+OLD_CONTENT = NEW_CONTENT.replace(b"2024-05-01", b"2020-01-01").replace(
+    b"ATOM 500 ", b"HETATM 500 "
+)
+
+
+def gzip_file(content: bytes, level: int = 9) -> bytes:
+    """Returns content gzipped like the archive, with file name and time."""
+    output = io.BytesIO()
+    with gzip.GzipFile(
+        "pdb_00001abc_xyz_v1.cif", "wb", level, output, mtime=1700000000
+    ) as file:
+        file.write(content)
+    return output.getvalue()
+
+
+def test_delta_roundtrip():
+    """Test delta rebuilds the encoded version and is small."""
+    data = delta.encode_delta(NEW_CONTENT, OLD_CONTENT)
+
+    assert delta.apply_delta(NEW_CONTENT, data) == OLD_CONTENT
+    assert len(data) < len(gzip.compress(OLD_CONTENT)) // 10
+    assert delta.apply_delta(b"", delta.encode_delta(b"", b"no newline")) == (
+        b"no newline"
+    )
+
+
+def test_gzip_delta_rebuilds_identical_file():
+    """Test gzip header and deflate parameters of the original are kept."""
+    for level in (6, 9):
+        target = gzip_file(OLD_CONTENT, level)
+        data = delta.encode_gzip_delta(gzip.compress(NEW_CONTENT), target)
+
+        assert delta.apply_gzip_delta(gzip.compress(NEW_CONTENT), data) == target
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15, 8, zlib.Z_HUFFMAN_ONLY)
+    stream = compressor.compress(OLD_CONTENT) + compressor.flush()
+    original = gzip_file(OLD_CONTENT)
+    header_size = delta.get_gzip_header_size(original)
+    foreign = original[:header_size] + stream + original[-8:]
+    assert gzip.decompress(foreign) == OLD_CONTENT
+    assert delta.encode_gzip_delta(gzip.compress(NEW_CONTENT), foreign) is None
+
+
+def test_reconstruction_cache_evicts_least_recently_used():
+    """Test cache keeps most recently used contents within its budget."""
+    cache = delta.ReconstructionCache(max_bytes=10)
+    cache.put(1, b"aaaa")
+    cache.put(2, b"bbbb")
+    cache.get(1)
+    cache.put(3, b"cccc")
+    cache.put(4, b"too large content")
+
+    assert cache.get(1) == b"aaaa"
+    assert cache.get(2) is None
+    assert cache.get(3) == b"cccc"
+    assert cache.get(4) is None
+
+
+def get_service() -> FileService:
+    """Returns file service without file store over a mock repository."""
+    with patch("app.services.files.get_blob_store", return_value=None):
+        service = FileService(Mock())
+    service.file_repository = Mock()
+    service.file_repository.get_content.return_value = None
+
+    return service
+
+
+def test_read_content_rebuilds_delta():
+    """Test older version is rebuilt from the next one and cached."""
+    service = get_service()
+    base = File(id=2, protein_id=MOCK_PROTEIN_ID, version=2)
+    base.file = gzip_file(NEW_CONTENT)
+    original = gzip_file(OLD_CONTENT)
+    old = File(id=1, protein_id=MOCK_PROTEIN_ID, version=1, sha256=get_hash(original))
+    service.file_repository.get_by_id.return_value = base
+    service.file_repository.get_delta.return_value = FileDelta(
+        file_id=1, base_id=2, data=delta.encode_gzip_delta(base.file, original)
+    )
+
+    with patch("app.services.files.reconstructions", delta.ReconstructionCache()):
+        assert service._reconstruct(old) == original
+        assert get_hash(service._read_content(old)) == old.sha256
+
+    service.file_repository.get_delta.assert_called_once_with(1)
+
+
+def test_read_content_rejects_mismatching_rebuild():
+    """Test rebuilt content not matching the stored hash isn't served."""
+    service = get_service()
+    base = File(id=2, protein_id=MOCK_PROTEIN_ID, version=2)
+    base.file = gzip_file(NEW_CONTENT)
+    old = File(id=1, protein_id=MOCK_PROTEIN_ID, version=1, sha256="0" * 64)
+    service.file_repository.get_by_id.return_value = base
+    service.file_repository.get_delta.return_value = FileDelta(
+        file_id=1,
+        base_id=2,
+        data=delta.encode_gzip_delta(base.file, gzip_file(OLD_CONTENT)),
+    )
+
+    with patch("app.services.files.reconstructions", delta.ReconstructionCache()):
+        assert service._read_content(old) is None
+
+
+def test_compact_versions_keeps_only_smaller_deltas():
+    """Test older versions are encoded and incompressible ones are kept full."""
+    service = get_service()
+    files = {
+        1: File(id=1, protein_id=MOCK_PROTEIN_ID, version=1),
+        2: File(id=2, protein_id=MOCK_PROTEIN_ID, version=2),
+        3: File(id=3, protein_id=MOCK_PROTEIN_ID, version=3),
+    }
+    files[1].file = gzip_file(OLD_CONTENT)
+    files[2].file = gzip_file(NEW_CONTENT)
+    files[3].file = gzip_file(b"unrelated\n")
+    service.file_repository.get_by_id.side_effect = lambda id, **kwargs: files[id]
+    service.file_repository.get_delta_candidates.side_effect = [
+        [(1, 2), (2, 3)],
+        [],
+    ]
+
+    assert service.compact_versions() == 1
+
+    deltas = service.file_repository.insert_deltas.call_args.args[0]
+    assert [(d["file_id"], d["base_id"]) for d in deltas] == [(1, 2), (2, 3)]
+    assert delta.apply_gzip_delta(files[2].file, deltas[0]["data"]) == files[1].file
+    assert deltas[1]["data"] is None
+    service.file_repository.get_delta_candidates.assert_called_with(2, 200)
@@ -0,0 +1,46 @@
+"""Tests for raw SQL statements of the application."""
+
+import ast
+import re
+from pathlib import Path
+
+import pytest
+
+import app
+
+pglast = pytest.importorskip("pglast")
+
+# Named bind parameters, not the :: cast operator.
+PARAMETER = re.compile(r"(?<!:):(\w+)")
+
+
+def get_statements() -> list[tuple[str, str]]:
+    """Returns constant SQL literals passed to text() in application modules."""
+    root = Path(app.__file__).parent
+    statements = []
+    for path in sorted(root.rglob("*.py")):
+        if "tests" in path.relative_to(root).parts:
+            continue
+
+        for node in ast.walk(ast.parse(path.read_text())):
+            if (
+                isinstance(node, ast.Call)
+                and getattr(node.func, "id", None) == "text"
+                and node.args
+                and isinstance(node.args[0], ast.Constant)
+            ):
+                location = f"{path.relative_to(root)}:{node.lineno}"
+                statements.append((location, node.args[0].value))
+
+    return statements
+
+
+STATEMENTS = get_statements()
+
+
+@pytest.mark.parametrize(
+    "sql", [sql for _, sql in STATEMENTS], ids=[x for x, _ in STATEMENTS]
+)
+def test_statement_parses(sql: str):
+    """Test statement is valid PostgreSQL syntax."""
+    pglast.parse_sql(PARAMETER.sub(r"$1", sql))
@@ -0,0 +1,160 @@
+"""Tests for file content stores."""
+
+import hashlib
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.database import store
+from app.database.models import ChangeInsert, File, FileInsert
+from app.services import FileService
+
+# Mock data
+MOCK_PROTEIN_ID = "pdb_00001abc"
+MOCK_CONTENT = b"data_1ABC"
+MOCK_HASH = hashlib.sha256(MOCK_CONTENT).hexdigest()
+
+
+def test_filesystem_store_shards_by_category(tmp_path):
+    """Test contents are addressed by hash within category directories."""
+    blob_store = store.FilesystemStore(str(tmp_path))
+
+    blob_store.put(MOCK_PROTEIN_ID, MOCK_HASH, MOCK_CONTENT)
+    blob_store.put(MOCK_PROTEIN_ID, MOCK_HASH, MOCK_CONTENT)
+
+    assert blob_store.get_path(MOCK_PROTEIN_ID, MOCK_HASH) == str(
+        tmp_path / "ab" / f"{MOCK_HASH}.cif.gz"
+    )
+    assert [path.name for path in (tmp_path / "ab").iterdir()] == [
+        f"{MOCK_HASH}.cif.gz"
+    ]
+    assert blob_store.get(MOCK_PROTEIN_ID, MOCK_HASH) == MOCK_CONTENT
+    assert blob_store.get(MOCK_PROTEIN_ID, "0" * 64) is None
+
+
+def test_get_blob_store_from_config(tmp_path, monkeypatch):
+    """Test backend is selected by configuration."""
+    store.get_blob_store.cache_clear()
+    monkeypatch.setattr(store, "FILE_STORE", "filesystem")
+    monkeypatch.setattr(store, "FILE_STORE_PATH", str(tmp_path))
+    try:
+        blob_store = store.get_blob_store()
+        assert isinstance(blob_store, store.FilesystemStore)
+        assert blob_store.root == str(tmp_path)
+
+        store.get_blob_store.cache_clear()
+        monkeypatch.setattr(store, "FILE_STORE", "tape")
+        with pytest.raises(ValueError):
+            store.get_blob_store()
+    finally:
+        store.get_blob_store.cache_clear()
+
+
+def test_copy_new_files_keeps_only_hash_with_store(tmp_path):
+    """Test contents go to the store and only hashes to the database."""
+    blob_store = store.FilesystemStore(str(tmp_path))
+    file = FileInsert(protein_id=MOCK_PROTEIN_ID, version=1, file=MOCK_CONTENT)
+    change = ChangeInsert(
+        file_id=0,
+        protein_id=MOCK_PROTEIN_ID,
+        operation_flag=1,
+        timestamp=datetime.now(),
+    )
+
+    with patch("app.services.files.get_blob_store", return_value=blob_store):
+        service = FileService(Mock())
+    service.file_repository = Mock()
+    service.file_repository.copy_in_bulk.side_effect = lambda rows: [
+        (1, row[0], row[1]) for row in rows if row[2] is None and row[3] == MOCK_HASH
+    ]
+
+    assert service.copy_new_files([file], [change]) == [1]
+    assert blob_store.get(MOCK_PROTEIN_ID, MOCK_HASH) == MOCK_CONTENT
+
+
+def test_read_content_falls_back_to_database(tmp_path):
+    """Test files stored before the store was configured are read from database."""
+    blob_store = store.FilesystemStore(str(tmp_path))
+    with patch("app.services.files.get_blob_store", return_value=blob_store):
+        service = FileService(Mock())
+
+    stored = File(id=1, protein_id=MOCK_PROTEIN_ID, version=1, sha256=MOCK_HASH)
+    legacy = File(id=2, protein_id=MOCK_PROTEIN_ID, version=2, file=b"legacy")
+    blob_store.put(MOCK_PROTEIN_ID, MOCK_HASH, MOCK_CONTENT)
+
+    assert service._read_content(stored) == MOCK_CONTENT
+    assert service._read_content(legacy) == b"legacy"
+    assert service._read_content(stored, as_path=True) == blob_store.get_path(
+        MOCK_PROTEIN_ID, MOCK_HASH
+    )
+    assert service._read_content(legacy, as_path=True) == b"legacy"
+
+
+def test_pack_store_appends_and_rolls_over(tmp_path):
+    """Test contents are appended to packs, deduplicated and rolled over."""
+    blob_store = store.PackStore(str(tmp_path), max_pack_size=16)
+    contents = [b"first_content", b"second", b"third"]
+    hashes = [hashlib.sha256(content).hexdigest() for content in contents]
+
+    for content, sha256 in zip(contents, hashes):
+        blob_store.put(MOCK_PROTEIN_ID, sha256, content)
+    blob_store.put(MOCK_PROTEIN_ID, hashes[0], contents[0])
+
+    assert (tmp_path / "ab" / "00000.pack").read_bytes() == b"first_content"
+    assert (tmp_path / "ab" / "00001.pack").read_bytes() == b"secondthird"
+    assert (tmp_path / "ab" / "index").stat().st_size == 3 * store.INDEX_RECORD.size
+
+    view = blob_store.get(MOCK_PROTEIN_ID, hashes[2])
+    assert isinstance(view, memoryview)
+    assert bytes(view) == b"third"
+    assert blob_store.get(MOCK_PROTEIN_ID, "0" * 64) is None
+
+
+def test_pack_store_reads_appends_of_other_processes(tmp_path):
+    """Test a cache miss picks up records appended by another store."""
+    reader = store.PackStore(str(tmp_path))
+    writer = store.PackStore(str(tmp_path))
+    assert reader.get(MOCK_PROTEIN_ID, MOCK_HASH) is None
+
+    writer.put(MOCK_PROTEIN_ID, MOCK_HASH, MOCK_CONTENT)
+    with open(tmp_path / "ab" / "index", "ab") as index:
+        index.write(b"torn")  # record of an interrupted append
+
+    assert bytes(reader.get(MOCK_PROTEIN_ID, MOCK_HASH)) == MOCK_CONTENT
+
+
+def test_bulk_insert_keeps_identical_contents_once():
+    """Test identical contents are stored once and referenced by hash."""
+    with patch("app.services.files.get_blob_store", return_value=None):
+        service = FileService(Mock())
+    service.file_repository = Mock()
+    service.file_repository.insert_in_bulk.return_value = []
+    files = [
+        FileInsert(protein_id=MOCK_PROTEIN_ID, version=version, file=MOCK_CONTENT)
+        for version in (1, 2)
+    ]
+
+    service.bulk_insert_new_files(files, [])
+
+    service.file_repository.insert_contents.assert_called_once_with(
+        {MOCK_HASH: MOCK_CONTENT}
+    )
+    file_values = service.file_repository.insert_in_bulk.call_args.args[0]
+    assert [(value["file"], value["sha256"]) for value in file_values] == [
+        (None, MOCK_HASH),
+        (None, MOCK_HASH),
+    ]
+
+
+def test_read_content_from_content_table():
+    """Test contents of deduplicated files are read by their hash."""
+    with patch("app.services.files.get_blob_store", return_value=None):
+        service = FileService(Mock())
+    service.file_repository = Mock()
+    service.file_repository.get_content.return_value = MOCK_CONTENT
+
+    file = File(id=1, protein_id=MOCK_PROTEIN_ID, version=1, sha256=MOCK_HASH)
+
+    assert service._read_content(file) == MOCK_CONTENT
+    service.file_repository.get_content.assert_called_once_with(MOCK_HASH)
@@ -7,6 +7,7 @@ from unittest.mock import Mock, patch
 
 from app.main import app
 from app.api.dependencies import get_file_service, get_protein_service
+from app.api.endpoints import files
 
 client = TestClient(app, base_url="http://testserver/api/v1/files")
 
@@ -163,3 +164,71 @@ def test_get_new_cif_files_not_found(mock_protein_service):
 
     response = client.get(f"/date/{MOCK_DATE.isoformat()}")
     assert response.status_code == 404
+
+
+def test_get_latest_cif_from_store(mock_file_service, tmp_path):
+    """Test content kept on disk is sent from the file."""
+    path = tmp_path / "ab" / "hash.cif.gz"
+    path.parent.mkdir()
+    path.write_bytes(MOCK_BINARY_FILE_CONTENT)
+    mock_file_service.get_latest_by_protein_id.return_value = str(path)
+
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+
+    response = client.get(f"/{MOCK_PROTEIN_ID}/latest")
+    assert response.status_code == 200
+    assert response.content == MOCK_BINARY_FILE_CONTENT
+    mock_file_service.get_latest_by_protein_id.assert_called_once_with(
+        protein_id=MOCK_PROTEIN_FULL_ID, as_path=True
+    )
+
+
+def test_get_cif_at_version_accel_redirect(mock_file_service, monkeypatch):
+    """Test content kept on disk is handed to nginx when redirect is set."""
+    mock_file_service.get_by_version_and_protein_id.return_value = (
+        "/store/ab/hash.cif.gz"
+    )
+    monkeypatch.setattr(files, "FILE_ACCEL_REDIRECT", "/protected/")
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+
+    with patch("app.api.endpoints.files.get_blob_store") as get_blob_store:
+        get_blob_store.return_value.root = "/store"
+        response = client.get(f"/{MOCK_PROTEIN_ID}/version/{MOCK_VERSION}")
+
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["X-Accel-Redirect"] == "/protected/ab/hash.cif.gz"
+    assert response.headers["Content-Disposition"] == (
+        f'attachment; filename="pdb_mirror_{MOCK_PROTEIN_FULL_ID}_v{MOCK_VERSION}.cif"'
+    )
+
+
+def test_get_cif_at_version_accel_redirect_without_store(
+    mock_file_service, tmp_path, monkeypatch
+):
+    """Test files left on disk are sent by the API with the database store."""
+    path = tmp_path / "ab" / "hash.cif.gz"
+    path.parent.mkdir()
+    path.write_bytes(MOCK_BINARY_FILE_CONTENT)
+    mock_file_service.get_by_version_and_protein_id.return_value = str(path)
+    monkeypatch.setattr(files, "FILE_ACCEL_REDIRECT", "/protected/")
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+
+    with patch.object(files, "get_blob_store", return_value=None):
+        response = client.get(f"/{MOCK_PROTEIN_ID}/version/{MOCK_VERSION}")
+
+    assert response.status_code == 200
+    assert response.content == MOCK_BINARY_FILE_CONTENT
+    assert "X-Accel-Redirect" not in response.headers
+
+
+def test_get_latest_cif_from_pack(mock_file_service):
+    """Test slices of memory mapped packs are sent as content."""
+    mock_file_service.get_latest_by_protein_id.return_value = memoryview(
+        MOCK_BINARY_FILE_CONTENT
+    )
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+
+    response = client.get(f"/{MOCK_PROTEIN_ID}/latest")
+    assert response.status_code == 200
+    assert response.content == MOCK_BINARY_FILE_CONTENT
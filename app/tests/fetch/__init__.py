@@ -0,0 +1 @@
+"""Fetch tests package."""
@@ -0,0 +1,91 @@
+"""Tests for historical version backfill."""
+
+import asyncio
+from unittest.mock import Mock, patch
+
+from app.fetch import backfill, jobs, load, utils
+from app.database.models import Operations
+
+# Mock data
+MOCK_IDS = ["pdb_00001abc", "pdb_00002def"]
+
+
+async def mock_resolve_revision_histories(client, ids: list[str]) -> dict:
+    return {"1ABC": [1, 1, 2, 3], "2DEF": [1]}
+
+
+async def mock_fetch_file(client, url: str, download=None) -> tuple:
+    if "_v2" in url:
+        return None, utils.FetchError("Status code 404", 404)
+    return b"data", None
+
+
+def test_backfill_batch_fetches_only_missing_versions():
+    """Test only missing versions are downloaded and stored without changes."""
+    get_missing_versions = Mock(return_value=[("pdb_00001abc", 2), ("pdb_00001abc", 3)])
+    insert_files = Mock()
+
+    with (
+        patch.object(
+            backfill, "resolve_revision_histories", mock_resolve_revision_histories
+        ),
+        patch.object(backfill, "get_missing_versions", get_missing_versions),
+        patch.object(load, "fetch_file", mock_fetch_file),
+        patch.object(backfill, "insert_files", insert_files),
+    ):
+        result = asyncio.run(backfill.backfill_batch(Mock(), MOCK_IDS))
+
+    assert result == (1, 1)
+    get_missing_versions.assert_called_once_with(
+        {"pdb_00001abc": [1, 2, 3], "pdb_00002def": [1]}
+    )
+    files, changes = insert_files.call_args.args
+    assert [(f.protein_id, f.version) for f in files] == [("pdb_00001abc", 3)]
+    assert changes == [None]
+
+
+def test_backfill_walks_pages_by_last_id():
+    """Test entries are paged by the last ID of the previous page."""
+    pages = [MOCK_IDS, []]
+    get_protein_ids = Mock(side_effect=lambda after, limit: pages.pop(0))
+
+    async def mock_backfill_batch(client, protein_ids):
+        return 2, 0
+
+    with (
+        patch.object(backfill, "get_protein_ids", get_protein_ids),
+        patch.object(backfill, "backfill_batch", mock_backfill_batch),
+    ):
+        result = asyncio.run(backfill.backfill(batch_size=2))
+
+    assert result == (2, 0)
+    assert get_protein_ids.call_args.args == ("pdb_00002def", 2)
+
+
+def test_backfill_waits_for_weekly_sync():
+    """Test backfill pauses while a weekly sync holds its lock."""
+    lock = jobs.SYNC_LOCKS[Operations.ADDED]
+    lock.acquire()
+
+    async def release(delay):
+        lock.release()
+
+    with patch.object(backfill.asyncio, "sleep", side_effect=release) as sleep:
+        asyncio.run(backfill.wait_for_sync())
+
+    sleep.assert_called_once_with(backfill.BACKFILL_PAUSE)
+    assert not lock.locked()
+
+
+def test_backfill_waits_for_sync_of_other_process():
+    """Test backfill pauses while another process holds the shared sync lock."""
+    is_lock_shared = Mock(side_effect=[True, False])
+
+    with (
+        patch.object(jobs, "is_lock_shared", is_lock_shared),
+        patch.object(backfill.asyncio, "sleep") as sleep,
+    ):
+        asyncio.run(backfill.wait_for_sync())
+
+    sleep.assert_called_once_with(backfill.BACKFILL_PAUSE)
+    is_lock_shared.assert_called_with(jobs.SYNC_LOCK_ID)
@@ -0,0 +1,147 @@
+"""Tests for insert buffer of downloaded files."""
+
+import asyncio
+from threading import Event
+from unittest.mock import Mock
+
+import pytest
+
+from app.fetch.buffer import InsertBuffer
+
+
+def make_file(id: str, size: int) -> Mock:
+    return Mock(protein_id=id, version=1, file=b"x" * size)
+
+
+def test_buffer_flushes_by_byte_budget():
+    """Test files are stored once the budget is reached and on final flush."""
+    insert = Mock()
+
+    async def fill():
+        buffer = InsertBuffer(insert, max_bytes=10)
+        for id in ["1ABC", "2DEF", "3GHI"]:
+            await buffer.add(make_file(id, 6), id)
+        await buffer.flush()
+        return buffer
+
+    buffer = asyncio.run(fill())
+
+    assert [call.args[1] for call in insert.call_args_list] == [
+        ["1ABC", "2DEF"],
+        ["3GHI"],
+    ]
+    assert buffer.stored == {"1ABC": 1, "2DEF": 1, "3GHI": 1}
+
+
+def test_buffer_waits_for_running_insert():
+    """Test a full buffer isn't flushed before the previous insert finished."""
+    release = Event()
+    running = []
+
+    def insert(files, changes):
+        running.append(len(files))
+        release.wait(1)
+        running.append(-len(files))
+
+    async def fill():
+        buffer = InsertBuffer(insert, max_bytes=1)
+        await buffer.add(make_file("1ABC", 1), None)
+        await asyncio.sleep(0.05)
+        release.set()
+        await buffer.add(make_file("2DEF", 1), None)
+        await buffer.flush()
+
+    asyncio.run(fill())
+
+    assert running == [1, -1, 1, -1]
+
+
+def test_buffer_keeps_budget_during_running_insert():
+    """Test concurrent downloads don't overfill buffer while an insert runs."""
+    release = Event()
+    flushed = []
+
+    def insert(files, changes):
+        release.wait(1)
+        flushed.append(sum(len(file.file) for file in files))
+
+    async def download(buffer, id):
+        async with buffer.downloads:
+            await asyncio.sleep(0)
+            await buffer.add(make_file(id, 5), None)
+
+    async def fill():
+        buffer = InsertBuffer(insert, max_bytes=10, max_downloads=4)
+        downloads = [download(buffer, str(i)) for i in range(100)]
+        task = asyncio.gather(*downloads)
+        await asyncio.sleep(0.05)
+        assert buffer.downloads.locked()
+        release.set()
+        await task
+        await buffer.flush()
+
+    asyncio.run(fill())
+
+    assert sum(flushed) == 500
+    assert max(flushed) == 10
+
+
+def test_buffer_raises_insert_error():
+    """Test failed insertion is raised by the next flush."""
+
+    def insert(files, changes):
+        raise RuntimeError("database unavailable")
+
+    async def fill():
+        buffer = InsertBuffer(insert, max_bytes=1)
+        await buffer.add(make_file("1ABC", 1), None)
+        await buffer.flush()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(fill())
+
+
+def test_buffer_reserves_budget_for_streamed_chunks():
+    """Test bytes of buffered files and downloads in progress stay in budget."""
+    held = []
+
+    async def download(buffer, id):
+        async with buffer.download() as download:
+            for _ in range(5):
+                await download.write(b"x")
+                held.append(buffer._size + buffer._reserved)
+                await asyncio.sleep(0)
+            await download.add(make_file(id, len(download.getvalue())), None)
+
+    async def fill():
+        buffer = InsertBuffer(Mock(), max_bytes=10, max_downloads=8)
+        await asyncio.gather(*(download(buffer, str(i)) for i in range(20)))
+        await buffer.flush()
+        return buffer
+
+    buffer = asyncio.run(fill())
+
+    assert len(buffer.stored) == 20
+    # Only the oldest download may exceed the budget, by at most its own size.
+    assert max(held) <= 10 + 5
+    assert buffer._reserved == 0
+
+
+def test_buffer_releases_failed_download():
+    """Test reservation of a download which wasn't added is released."""
+
+    async def fail(buffer):
+        async with buffer.download() as download:
+            await download.write(b"xxxx")
+            await download.discard()
+            await download.write(b"xx")
+
+    async def run():
+        buffer = InsertBuffer(Mock(), max_bytes=10)
+        await fail(buffer)
+        return buffer
+
+    buffer = asyncio.run(run())
+
+    assert buffer._reserved == 0
+    assert not buffer._active
@@ -0,0 +1,127 @@
+"""Tests for pooled HTTP client retries and circuit breaking."""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from httpx import AsyncClient, ConnectError, MockTransport, Request, Response
+
+from app.fetch.client import HttpClient
+from app.fetch.retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+# Mock data
+MOCK_URL = "https://files.example.org/file.cif.gz"
+
+
+def run_requests(
+    responses: list,
+    count: int = 1,
+    breaker: CircuitBreaker | None = None,
+    sink: Mock | None = None,
+) -> tuple:
+    """Sends requests through client answering with given responses in order."""
+    calls = []
+
+    def handler(request: Request) -> Response:
+        calls.append(request)
+        response = responses[min(len(calls), len(responses)) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def run():
+        async with HttpClient(retry_policy=RetryPolicy(base=0)) as client:
+            client._client = AsyncClient(transport=MockTransport(handler))
+            if breaker:
+                client._breakers[breaker.host] = breaker
+            results = []
+            for _ in range(count):
+                try:
+                    results.append(await client.get(MOCK_URL, sink))
+                except Exception as e:
+                    results.append(e)
+            return results
+
+    return asyncio.run(run()), calls
+
+
+def test_get_not_found_is_not_retried():
+    """Test permanent error is returned after single attempt."""
+    results, calls = run_requests([Response(404)])
+
+    assert results[0].status_code == 404
+    assert len(calls) == 1
+
+
+def test_get_retries_server_errors():
+    """Test server errors and transport errors are retried until success."""
+    results, calls = run_requests(
+        [Response(500), ConnectError("refused"), Response(200, content=b"data")]
+    )
+
+    assert results[0].content == b"data"
+    assert len(calls) == 3
+
+
+def test_get_gives_up_after_retries():
+    """Test retries are bounded and the last error is raised."""
+    results, calls = run_requests([ConnectError("refused")])
+
+    assert isinstance(results[0], ConnectError)
+    assert len(calls) == RetryPolicy().attempts
+
+
+def test_get_circuit_opens():
+    """Test failing host is cut off by circuit breaker."""
+    breaker = CircuitBreaker("files.example.org", threshold=RetryPolicy().attempts)
+    results, calls = run_requests([Response(500)], count=2, breaker=breaker)
+
+    assert results[0].status_code == 500
+    assert isinstance(results[1], CircuitOpenError)
+    assert len(calls) == RetryPolicy().attempts
+
+
+def test_circuit_breaker_half_open():
+    """Test open circuit lets single trial request through after timeout."""
+    breaker = CircuitBreaker("host", threshold=1, reset_timeout=0)
+    breaker.record_failure()
+
+    breaker.check()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    breaker.record_success()
+    breaker.check()
+    assert not breaker.is_open
+
+
+def test_retry_policy_delay_is_capped():
+    """Test backoff grows exponentially up to the cap."""
+    policy = RetryPolicy(base=1, cap=4)
+
+    assert all(0 <= policy.get_delay(0) <= 1 for _ in range(10))
+    assert all(0 <= policy.get_delay(10) <= 4 for _ in range(10))
+
+
+def test_get_ends_trial_without_outcome():
+    """Test throttled or failing trial request doesn't keep the circuit open."""
+    breaker = CircuitBreaker("files.example.org", threshold=1, reset_timeout=0)
+    breaker.record_failure()
+
+    results, calls = run_requests([ValueError("broken")], breaker=breaker)
+
+    assert isinstance(results[0], ValueError)
+    assert not breaker.trial
+    assert breaker.check()
+
+
+def test_get_streams_body_into_sink():
+    """Test successful body is streamed into sink, failed attempt discarded."""
+    sink = Mock(write=AsyncMock(), discard=AsyncMock())
+    results, calls = run_requests(
+        [ConnectError("refused"), Response(200, content=b"data")], sink=sink
+    )
+
+    assert results[0].status_code == 200
+    sink.discard.assert_awaited_once()
+    assert b"".join(call.args[0] for call in sink.write.await_args_list) == b"data"
@@ -0,0 +1,66 @@
+"""Tests for ingest queue workers."""
+
+import asyncio
+from unittest.mock import Mock, patch
+
+from app.fetch import ingest, load, utils
+from app.database.models import Operations
+
+# Mock data
+MOCK_TASKS = [
+    (1, "pdb_00001abc", 2, Operations.MODIFIED.value),
+    (2, "pdb_00002def", 1, Operations.ADDED.value),
+]
+
+
+async def mock_fetch_file(client, url: str, download=None) -> tuple:
+    if "2def" in url:
+        return None, utils.FetchError("Status code 404", 404)
+    return b"data", None
+
+
+def test_process_tasks_settles_results():
+    """Test fetched tasks are stored and removed, failed ones released."""
+    insert_files = Mock()
+    settle_tasks = Mock()
+
+    with (
+        patch.object(load, "fetch_file", mock_fetch_file),
+        patch.object(ingest, "insert_files", insert_files),
+        patch.object(ingest, "settle_tasks", settle_tasks),
+    ):
+        failures = asyncio.run(ingest.process_tasks(Mock(), MOCK_TASKS))
+
+    assert failures == 1
+    files, changes = insert_files.call_args.args
+    assert [(file.protein_id, file.version) for file in files] == [("pdb_00001abc", 2)]
+    assert changes[0].operation_flag == Operations.MODIFIED.value
+    settle_tasks.assert_called_once_with(
+        [1], [(2, "Fetch error: Status code 404", True)]
+    )
+
+
+def test_work_stops_on_empty_queue():
+    """Test claim loop waits for tasks in backoff and stops once none pend."""
+    claim_tasks = Mock(side_effect=[MOCK_TASKS, [], MOCK_TASKS[:1], []])
+    get_next_available = Mock(side_effect=[0.01, None])
+
+    async def mock_process_tasks(client, tasks: list) -> int:
+        return 0
+
+    with (
+        patch.object(ingest, "claim_tasks", claim_tasks),
+        patch.object(ingest, "get_next_available", get_next_available),
+        patch.object(ingest, "process_tasks", mock_process_tasks),
+    ):
+        processed = asyncio.run(ingest.work(Mock(), batch_size=2))
+
+    assert processed == 3
+    assert claim_tasks.call_count == 4
+
+
+def test_fetch_error_is_permanent():
+    """Test only refused files are failed without further attempts."""
+    assert utils.FetchError("Status code 404", 404).permanent
+    assert not utils.FetchError("Status code 503", 503).permanent
+    assert not utils.FetchError("ConnectTimeout: timed out").permanent
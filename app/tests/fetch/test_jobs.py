@@ -0,0 +1,157 @@
+"""Tests for weekly synchronization jobs."""
+
+import asyncio
+from unittest.mock import Mock, patch
+
+from app.fetch import jobs, load, utils
+from app.database.models import Operations
+
+# Mock data
+MOCK_IDS = ["1ABC", "2DEF", "3GHI"]
+
+
+class MockClient:
+    async def __aenter__(self):
+        return Mock()
+
+    async def __aexit__(self, *args):
+        pass
+
+
+async def mock_fetch_last_versions(client, ids: list[str]) -> dict:
+    return {id: (None if id == "2DEF" else 3) for id in ids}
+
+
+async def mock_fetch_files(
+    client, file_urls: dict, id_to_version: dict, buffer, operation: Operations
+) -> list:
+    for id in file_urls:
+        file = Mock(protein_id=id, version=id_to_version[id], file=b"data")
+        await buffer.add(file, operation)
+    return []
+
+
+def run_sync(operation: Operations) -> tuple[int, Mock, Mock]:
+    insert_files = Mock()
+    insert_failed = Mock()
+
+    with (
+        patch.object(jobs, "HttpClient", MockClient),
+        patch.object(jobs, "fetch_last_versions", mock_fetch_last_versions),
+        patch.object(jobs, "fetch_files", mock_fetch_files),
+        patch.object(jobs, "insert_files", insert_files),
+        patch.object(jobs, "insert_failed", insert_failed),
+    ):
+        failures = asyncio.run(jobs.sync_entries(MOCK_IDS, operation, batch_size=2))
+
+    return failures, insert_files, insert_failed
+
+
+def test_sync_added_entries_in_batches():
+    """Test new entries are stored at version 1 in batches."""
+    failures, insert_files, insert_failed = run_sync(Operations.ADDED)
+
+    assert failures == 0
+    batches = [call.args[0] for call in insert_files.call_args_list]
+    assert [[file.protein_id for file in batch] for batch in batches] == [
+        ["1ABC", "2DEF"],
+        ["3GHI"],
+    ]
+    assert all(file.version == 1 for batch in batches for file in batch)
+    insert_failed.assert_not_called()
+
+
+def test_sync_modified_entries_records_missing_versions():
+    """Test modified entries use resolved versions and report unresolved ones."""
+    failures, insert_files, insert_failed = run_sync(Operations.MODIFIED)
+
+    assert failures == 1
+    assert insert_files.call_args_list[0].args[1] == [Operations.MODIFIED]
+    insert_failed.assert_called_once_with(
+        [("2DEF", "Version not found.")],
+        {"1ABC": 3, "2DEF": None},
+        Operations.MODIFIED,
+    )
+
+
+def test_retry_failed_batch_settles_records():
+    """Test failed fetches are fetched once per version and settled."""
+    records = [
+        (1, "pdb_00001abc", 2, Operations.MODIFIED.value),
+        (2, "pdb_00001abc", 2, Operations.MODIFIED.value),
+        (3, "pdb_00002def", 1, Operations.ADDED.value),
+    ]
+    urls = []
+
+    async def mock_fetch_file(client, url: str, download=None) -> tuple:
+        urls.append(url)
+        if "2def" in url:
+            return None, utils.FetchError("Status code 404", 404)
+        return b"data", None
+
+    insert_files = Mock()
+    settle_failed = Mock()
+
+    with (
+        patch.object(load, "fetch_file", mock_fetch_file),
+        patch.object(jobs, "insert_files", insert_files),
+        patch.object(jobs, "settle_failed", settle_failed),
+    ):
+        resolved = asyncio.run(jobs.retry_failed_batch(Mock(), records))
+
+    assert resolved == 1
+    assert len(urls) == 2
+    files, changes = insert_files.call_args.args
+    assert [(file.protein_id, file.version) for file in files] == [("pdb_00001abc", 2)]
+    assert changes[0].operation_flag == Operations.MODIFIED.value
+    settle_failed.assert_called_once_with(
+        [("pdb_00001abc", 2)], [(3, "Fetch error: Status code 404")]
+    )
+
+
+def test_fetch_list_files_stops_at_gap():
+    """Test lists after an unavailable week are not marked as synchronized."""
+    lists = {"20261003": ["1ABC", "2DEF"], "20261010": None, "20261017": ["3GHI"]}
+
+    async def mock_fetch_list_file(client, date: str, file_name: str):
+        return lists[date]
+
+    with (
+        patch.object(jobs, "HttpClient", MockClient),
+        patch.object(jobs, "fetch_list_file", mock_fetch_list_file),
+    ):
+        ids, synced = asyncio.run(jobs.fetch_list_files(list(lists), "added"))
+
+    assert ids == ["1ABC", "2DEF"]
+    assert synced == "20261003"
+
+
+def test_sync_lists_skips_overlapping_run():
+    """Test a run is skipped while the same operation is being synchronized."""
+    handler = Mock()
+    get_pending_dates = Mock()
+
+    with patch.object(jobs, "get_pending_dates", get_pending_dates):
+        with jobs.SYNC_LOCKS[Operations.ADDED]:
+            jobs.sync_lists(Operations.ADDED, handler)
+
+    get_pending_dates.assert_not_called()
+    handler.assert_not_called()
+
+
+def test_process_failed_hands_due_records_to_queue():
+    """Test queue mode enqueues due records before retrying what is left."""
+    calls = []
+
+    async def mock_retry_failed() -> tuple:
+        calls.append("retry")
+        return 0, 0
+
+    with (
+        patch.object(jobs, "enqueue_failed", lambda: calls.append("enqueue") or 1),
+        patch.object(jobs, "retry_failed", mock_retry_failed),
+    ):
+        jobs.process_failed(enqueue=True)
+        jobs.process_failed(enqueue=False)
+
+    assert calls == ["enqueue", "retry", "retry"]
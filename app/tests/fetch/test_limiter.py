@@ -0,0 +1,74 @@
+"""Tests for adaptive rate limiter."""
+
+import asyncio
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+from app.fetch.limiter import AdaptiveLimiter, parse_retry_after
+
+
+def test_parse_retry_after():
+    """Test both delay and HTTP date formats are parsed."""
+    date = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30))
+
+    assert parse_retry_after("12") == 12.0
+    assert 25 < parse_retry_after(date) <= 30
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+
+def test_limiter_throttle_halves_once():
+    """Test burst of throttled responses halves concurrency only once."""
+
+    async def run() -> AdaptiveLimiter:
+        limiter = AdaptiveLimiter("test", rate=1000, concurrency=8)
+        for _ in range(4):
+            await limiter.acquire()
+        for _ in range(4):
+            await limiter.release(429, retry_after=5.0)
+        return limiter
+
+    limiter = asyncio.run(run())
+
+    assert limiter.limit == 4
+    assert limiter.active == 0
+    assert limiter.rate == 500
+
+
+def test_limiter_recovers_after_successes():
+    """Test concurrency grows back additively on successful responses."""
+
+    async def run() -> AdaptiveLimiter:
+        limiter = AdaptiveLimiter("test", rate=1000, concurrency=4)
+        limiter.limit = 2.0
+        for _ in range(8):
+            await limiter.acquire()
+            await limiter.release(200)
+        return limiter
+
+    limiter = asyncio.run(run())
+
+    assert limiter.limit == 4
+
+
+def test_limiter_cancelled_acquire_frees_slot():
+    """Test acquire cancelled while waiting for a token gives its slot back."""
+
+    async def run() -> AdaptiveLimiter:
+        limiter = AdaptiveLimiter("test", rate=1, concurrency=1)
+        await limiter.acquire()
+        await limiter.release(200)
+
+        task = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        assert limiter.active == 1
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return limiter
+
+    limiter = asyncio.run(run())
+
+    assert limiter.active == 0
@@ -0,0 +1,159 @@
+"""Tests for full load pipeline."""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from app.fetch import load
+from app.database.models import LoadRun
+
+# Mock data
+MOCK_PAGES = {0: ["1ABC", "2DEF"], 2: ["3GHI", "4JKL"]}
+MOCK_RUN = LoadRun(id=1, start=0, total=4)
+
+
+async def mock_fetch_ids(client, start: int, limit: int) -> dict:
+    return {"result_set": [{"identifier": id} for id in MOCK_PAGES[start]]}
+
+
+async def mock_get_latest_versions(client, ids: list[str]) -> dict:
+    return {id: (None if id == "2DEF" else 1) for id in ids}
+
+
+async def mock_fetch_files(
+    client, file_urls: dict, id_to_version: dict, buffer
+) -> list:
+    for id in file_urls:
+        file = Mock(protein_id=load.get_full_id(id), version=1, file=b"data")
+        await buffer.add(file, id)
+    return []
+
+
+def test_fetch_all_pipeline():
+    """Test pages flow through all stages, skipping already stored IDs."""
+    insert_files = Mock()
+    insert_failed = Mock()
+    complete_page = Mock()
+
+    with (
+        patch.object(load, "PDB_SEARCH_API_LIMIT", 2),
+        patch.object(load, "fetch_ids", mock_fetch_ids),
+        patch.object(load, "get_latest_versions", mock_get_latest_versions),
+        patch.object(load, "fetch_files", mock_fetch_files),
+        patch.object(load, "insert_files", insert_files),
+        patch.object(load, "insert_failed", insert_failed),
+        patch.object(load, "complete_page", complete_page),
+        patch.object(load, "get_run_progress", Mock(return_value=(0, 0))),
+        patch.object(load, "get_processed_ids", Mock(return_value={"4JKL"})),
+        patch.object(load, "get_stored_ids", Mock(return_value=set())),
+    ):
+        asyncio.run(load.fetch_all(Mock(), MOCK_RUN, starts=[0, 2]))
+
+    assert [call.args[1] for call in insert_files.call_args_list] == [
+        ["1ABC"],
+        ["3GHI"],
+    ]
+    assert all(call.kwargs["run"] is MOCK_RUN for call in insert_files.call_args_list)
+    insert_failed.assert_called_once_with(
+        [("2DEF", "Version not found.")], {"1ABC": 1, "2DEF": None}, run=MOCK_RUN
+    )
+    complete_page.assert_any_call(MOCK_RUN, 0, 2, {}, 1)
+    complete_page.assert_any_call(MOCK_RUN, 2, 2, {}, 0)
+
+
+def test_insert_files_records_committed_entries():
+    """Test files of a run are recorded as done with their batch."""
+    files = [Mock(protein_id="pdb_00001abc", version=2)]
+
+    with (
+        patch.object(load, "FileService") as file_service,
+        patch.object(load, "LoadRunService") as load_run_service,
+    ):
+        load.insert_files(files, [Mock()], run=MOCK_RUN)
+
+    file_service.return_value.copy_new_files.assert_called_once()
+    load_run_service.return_value.record_entries.assert_called_once_with(
+        MOCK_RUN, {"pdb_00001abc": 2}, load.EntryStatus.DONE
+    )
+
+
+def test_fetch_all_skips_stored_versions():
+    """Test entries stored at their latest version are not downloaded again."""
+    complete_page = Mock()
+
+    with (
+        patch.object(load, "PDB_SEARCH_API_LIMIT", 2),
+        patch.object(load, "fetch_ids", mock_fetch_ids),
+        patch.object(load, "get_latest_versions", mock_get_latest_versions),
+        patch.object(load, "fetch_files", mock_fetch_files),
+        patch.object(load, "insert_files", Mock()),
+        patch.object(load, "insert_failed", Mock()),
+        patch.object(load, "complete_page", complete_page),
+        patch.object(load, "get_run_progress", Mock(return_value=(0, 0))),
+        patch.object(load, "get_processed_ids", Mock(return_value=set())),
+        patch.object(load, "get_stored_ids", Mock(return_value={"3GHI", "4JKL"})),
+        patch.object(load, "get_file_urls", Mock(wraps=load.get_file_urls)) as urls,
+    ):
+        asyncio.run(load.fetch_all(Mock(), MOCK_RUN, starts=[2]))
+
+    assert urls.call_args.args[0] == []
+    complete_page.assert_called_once_with(
+        MOCK_RUN, 2, 2, {"pdb_00003ghi": 1, "pdb_00004jkl": 1}, 0
+    )
+
+
+def test_load_shard_uses_resolved_run():
+    """Test shard of a resolved run doesn't fetch total or resolve run again."""
+    fetch_all, fetch_ids, get_run = AsyncMock(), AsyncMock(), Mock()
+
+    with (
+        patch.object(load, "PDB_SEARCH_API_LIMIT", 2),
+        patch.object(load, "fetch_all", fetch_all),
+        patch.object(load, "fetch_ids", fetch_ids),
+        patch.object(load, "get_run", get_run),
+        patch.object(load, "get_pending_run", Mock(return_value=(MOCK_RUN, [0, 2]))),
+        patch.object(load, "finish_run", Mock()),
+    ):
+        asyncio.run(load.load(None, shard=1, shards=2, enqueue=True, run_id=1))
+
+    fetch_ids.assert_not_called()
+    get_run.assert_not_called()
+    assert fetch_all.call_args.args[1:] == (MOCK_RUN, [2], True)
+
+
+def test_load_shard_only_attaches_to_unfinished_run():
+    """Test shard without a run ID never creates a run of its own."""
+    fetch_all = AsyncMock()
+    get_run = Mock(return_value=(None, []))
+
+    with (
+        patch.object(load, "fetch_all", fetch_all),
+        patch.object(load, "fetch_ids", AsyncMock(return_value={"total_count": 4})),
+        patch.object(load, "get_run", get_run),
+    ):
+        asyncio.run(load.load(None, shard=0, shards=2))
+
+    assert get_run.call_args.args == (None, 4, False, False)
+    fetch_all.assert_not_called()
+
+
+def test_run_rejects_shard_starting_new_run():
+    """Test shard can't be started with explicit start or restart."""
+    with patch.object(load, "load", AsyncMock()) as load_shard:
+        with pytest.raises(ValueError):
+            load.run(restart=True, shard=(0, 2))
+
+    load_shard.assert_not_called()
+
+
+def test_get_shard_starts_cover_all_pages():
+    """Test shards split pending pages into disjoint complete ranges."""
+    run = LoadRun(id=1, start=0, total=10500)
+    pending = [x for x in range(0, 10500, 1000) if x != 3000]
+
+    shards = [load.get_shard_starts(run, pending, i, 4) for i in range(4)]
+
+    assert shards[0] == [0, 1000, 2000]
+    assert shards[1] == [4000, 5000]
+    assert sorted(sum(shards, [])) == pending
@@ -0,0 +1,86 @@
+"""Tests for local archive import."""
+
+import os
+from datetime import datetime
+from unittest.mock import patch
+
+from app.fetch import local
+
+# Mock data
+ENTRY_DIR = "pdb_versioned/data/entries/ab/pdb_00001abc"
+
+
+def create_tree(root) -> None:
+    """Creates small versioned archive tree with unrelated files."""
+    entry = root / ENTRY_DIR / "mmcif"
+    entry.mkdir(parents=True)
+    for name in [
+        "pdb_00001abc_xyz_v2.cif.gz",
+        "pdb_00001abc_xyz_v1.cif.gz",
+        "pdb_00001abc_xyz_v1.cif.gz.md5",
+        "pdb_00001abc_sf_v1.cif.gz",
+    ]:
+        (entry / name).write_bytes(name.encode())
+
+
+def test_parse_entry_file():
+    """Test ID and version are parsed only from coordinate files."""
+    assert local.parse_entry_file("pdb_00001abc_xyz_v12.cif.gz") == (
+        "pdb_00001abc",
+        12,
+    )
+    assert local.parse_entry_file("pdb_00001abc_sf_v1.cif.gz") is None
+    assert local.parse_entry_file("pdb_00001abc_xyz_v1.cif") is None
+
+
+def test_iter_entry_files(tmp_path):
+    """Test walk yields coordinate files in version order."""
+    create_tree(tmp_path)
+
+    entries = list(local.iter_entry_files(str(tmp_path)))
+
+    assert [entry[1:] for entry in entries] == [
+        ("pdb_00001abc", 1),
+        ("pdb_00001abc", 2),
+    ]
+    assert entries[0][0].endswith("pdb_00001abc_xyz_v1.cif.gz")
+
+
+def test_get_batches():
+    """Test entries are split into batches of given size."""
+    batches = list(local.get_batches(iter(range(5)), 2))
+
+    assert batches == [(0, 1), (2, 3), (4,)]
+
+
+def test_import_batch_skips_stored_versions(tmp_path):
+    """Test only versions not yet stored are read and inserted."""
+    create_tree(tmp_path)
+    entries = tuple(local.iter_entry_files(str(tmp_path)))
+
+    with (
+        patch.object(local, "get_stored_versions", return_value={("pdb_00001abc", 1)}),
+        patch.object(local, "insert_files") as insert_files,
+    ):
+        result = local.import_batch(entries)
+
+    assert result == (1, 1, 0)
+    files, changes = insert_files.call_args.args
+    assert [(f.protein_id, f.version) for f in files] == [("pdb_00001abc", 2)]
+    assert files[0].file == b"pdb_00001abc_xyz_v2.cif.gz"
+    assert len(changes) == 1
+
+
+def test_read_files_stamps_changes_with_file_time(tmp_path):
+    """Test historical versions keep release time of the archive file."""
+    create_tree(tmp_path)
+    entries = list(local.iter_entry_files(str(tmp_path)))
+    for days, (path, _, _) in enumerate(entries, start=1):
+        os.utime(path, (days * 86400, days * 86400))
+
+    _, changes, _ = local.read_files(entries)
+
+    assert [change.timestamp for change in changes] == [
+        datetime.fromtimestamp(86400),
+        datetime.fromtimestamp(2 * 86400),
+    ]
@@ -0,0 +1,58 @@
+"""Tests for holdings reconciliation."""
+
+import asyncio
+import gzip
+import json
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock, patch
+
+from httpx import Response
+
+from app.fetch import reconcile
+from app.database.models import Operations
+
+# Mock data
+MOCK_HOLDINGS = {"1ABC": "2024-01-05T00:00:00+0000", "2def": "2024-02-01T00:00:00+0000"}
+
+
+def test_fetch_holdings_parses_listing():
+    """Test holdings listing is decompressed and keyed by full IDs."""
+    content = gzip.compress(json.dumps(MOCK_HOLDINGS).encode())
+    client = Mock(get=AsyncMock(return_value=Response(200, content=content)))
+
+    holdings = asyncio.run(reconcile.fetch_holdings(client))
+
+    assert set(holdings) == {"pdb_00001abc", "pdb_00002def"}
+    assert holdings["pdb_00001abc"].tzinfo is None
+
+
+def test_queue_outdated_skips_current_versions():
+    """Test only newer entries are queued and current ones marked checked."""
+    versions = {"1ABC": 2, "2DEF": 3, "3GHI": None}
+    holdings = {id: datetime(2024, 1, 5) for id in ["pdb_00001abc", "pdb_00003ghi"]}
+    enqueue_entries, mark_checked = Mock(), Mock()
+
+    with (
+        patch.object(
+            reconcile, "fetch_last_versions", AsyncMock(return_value=versions)
+        ),
+        patch.object(
+            reconcile,
+            "get_stored_versions",
+            Mock(return_value={"pdb_00001abc": 2, "pdb_00002def": 1}),
+        ),
+        patch.object(reconcile, "enqueue_entries", enqueue_entries),
+        patch.object(reconcile, "mark_checked", mark_checked),
+    ):
+        queued = asyncio.run(
+            reconcile.queue_outdated(
+                Mock(),
+                ["pdb_00001abc", "pdb_00002def", "pdb_00003ghi"],
+                Operations.MODIFIED,
+                holdings,
+            )
+        )
+
+    assert queued == 1
+    enqueue_entries.assert_called_once_with([("pdb_00002def", 3)], Operations.MODIFIED)
+    mark_checked.assert_called_once_with({"pdb_00001abc": datetime(2024, 1, 5)})
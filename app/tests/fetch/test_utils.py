@@ -0,0 +1,121 @@
+"""Tests for fetch utility functions."""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+from urllib.parse import unquote_plus
+
+from httpx import Response
+
+from app.fetch import utils
+from app.fetch.utils import (
+    fetch_last_versions,
+    fetch_revision_histories,
+    get_graphql_batch_query,
+    get_status_dates,
+    resolve_revision_histories,
+)
+
+# Mock data
+MOCK_IDS = ["1abc", "2DEF", "3ghi"]
+MOCK_ENTRIES = {
+    "data": {
+        "entries": [
+            {
+                "rcsb_id": "1ABC",
+                "pdbx_audit_revision_history": [
+                    {"major_revision": 1},
+                    {"major_revision": 1},
+                    {"major_revision": 2},
+                ],
+            },
+            {
+                "rcsb_id": "2DEF",
+                "pdbx_audit_revision_history": [{"major_revision": 1}],
+            },
+        ]
+    }
+}
+
+
+def get_mock_client(*responses: Response) -> Mock:
+    """Creates client mock returning given responses in order."""
+    client = Mock()
+    client.get = AsyncMock(side_effect=responses)
+    return client
+
+
+def test_get_graphql_batch_query():
+    """Test multi-entry query contains all uppercased IDs."""
+    url = unquote_plus(get_graphql_batch_query(MOCK_IDS))
+
+    assert 'entries(entry_ids: ["1ABC", "2DEF", "3GHI"])' in url
+    assert "rcsb_id" in url
+
+
+def test_fetch_revision_histories_success():
+    """Test revision histories are mapped back to requested IDs."""
+    client = get_mock_client(Response(200, json=MOCK_ENTRIES))
+
+    histories = asyncio.run(fetch_revision_histories(client, MOCK_IDS))
+
+    assert histories == {"1abc": [1, 1, 2], "2DEF": [1]}
+    client.get.assert_called_once()
+
+
+def test_fetch_revision_histories_error():
+    """Test failed request returns empty mapping."""
+    client = get_mock_client(Response(500, text="error"))
+
+    histories = asyncio.run(fetch_revision_histories(client, MOCK_IDS))
+
+    assert histories == {}
+
+
+def test_fetch_revision_histories_invalid_body():
+    """Test malformed or errored GraphQL responses return empty mapping."""
+    client = get_mock_client(
+        Response(200, text="<html>"),
+        Response(200, json={"data": None, "errors": [{"message": "timeout"}]}),
+        Response(200, json={"data": {}}),
+    )
+
+    for _ in range(3):
+        assert asyncio.run(fetch_revision_histories(client, MOCK_IDS)) == {}
+
+
+def test_resolve_revision_histories_batches():
+    """Test IDs are split into one request per batch."""
+    client = get_mock_client(
+        Response(200, json=MOCK_ENTRIES), Response(200, json={"data": {"entries": []}})
+    )
+
+    histories = asyncio.run(resolve_revision_histories(client, MOCK_IDS, batch_size=2))
+
+    assert histories == {"1abc": [1, 1, 2], "2DEF": [1]}
+    assert client.get.call_count == 2
+
+
+def test_fetch_last_versions_missing():
+    """Test latest version is picked and missing IDs resolve to None."""
+    client = get_mock_client(Response(200, json=MOCK_ENTRIES))
+
+    versions = asyncio.run(fetch_last_versions(client, MOCK_IDS))
+
+    assert versions == {"1abc": 2, "2DEF": 1, "3ghi": None}
+
+
+def test_get_status_dates_lists_missed_weeks():
+    """Test all weeks after the last synchronized one are returned, oldest first."""
+    with patch.object(utils, "get_last_date", Mock(return_value="20261010")):
+        assert get_status_dates(None) == ["20261010"]
+        assert get_status_dates("20261010") == []
+        assert get_status_dates("20260919") == ["20260926", "20261003", "20261010"]
+        assert get_status_dates("20200101", max_weeks=2) == ["20261003", "20261010"]
+
+
+def test_fetch_list_file_skips_missing_week():
+    """Test missing list counts as empty week, server error as unavailable."""
+    client = get_mock_client(Response(404), Response(500))
+
+    assert asyncio.run(utils.fetch_list_file(client, "20261010", "added")) == []
+    assert asyncio.run(utils.fetch_list_file(client, "20261010", "added")) is None
@@ -0,0 +1,79 @@
+"""Tests for directory watch."""
+
+import os
+from threading import Event
+from unittest.mock import patch
+
+from app.fetch import watch
+
+# Mock data
+FILE_NAME = "pdb_00001abc_xyz_v1.cif.gz"
+
+
+def test_inotify_reports_new_files_and_directories(tmp_path):
+    """Test written files and created directories are reported."""
+    inotify = watch.Inotify()
+    try:
+        inotify.add_watch(str(tmp_path))
+        (tmp_path / "ab").mkdir()
+        (tmp_path / FILE_NAME).write_bytes(b"data")
+
+        events = inotify.read(1)
+    finally:
+        inotify.close()
+
+    assert (str(tmp_path / "ab"), watch.IN_CREATE | watch.IN_ISDIR) in events
+    paths = [path for path, mask in events if mask & watch.IN_CLOSE_WRITE]
+    assert paths == [str(tmp_path / FILE_NAME)]
+
+
+def test_watcher_queues_files_of_new_directories(tmp_path):
+    """Test files written before a new directory was watched are queued."""
+    entry = tmp_path / "ab" / "pdb_00001abc"
+    entry.mkdir(parents=True)
+    (entry / FILE_NAME).write_bytes(b"data")
+    (entry / "readme.txt").write_bytes(b"data")
+
+    watcher = watch.Watcher(str(tmp_path))
+    watcher.start_inotify()
+    try:
+        watcher.handle_events([(str(tmp_path / "ab"), watch.IN_ISDIR)])
+    finally:
+        watcher.stop_inotify()
+
+    assert watcher.pending == {str(entry / FILE_NAME): ("pdb_00001abc", 1)}
+
+
+def test_watcher_flushes_in_batches():
+    """Test queued files are stored in batches once enough are queued."""
+    watcher = watch.Watcher("/data", batch_size=2, delay=60)
+    watcher.add_file(os.path.join("/data", FILE_NAME))
+    assert not watcher.is_due()
+
+    watcher.add_file("/data/pdb_00001abc_xyz_v2.cif.gz")
+    watcher.add_file("/data/pdb_00002def_xyz_v1.cif.gz")
+    assert watcher.is_due()
+
+    with patch.object(watch, "import_batch", return_value=(1, 0, 0)) as import_batch:
+        watcher.flush()
+
+    assert [len(call.args[0]) for call in import_batch.call_args_list] == [2, 1]
+    assert watcher.pending == {}
+
+
+def test_watcher_scans_without_inotify(tmp_path):
+    """Test watcher falls back to scans when inotify is not available."""
+    (tmp_path / FILE_NAME).write_bytes(b"data")
+    stop = Event()
+
+    def import_batch(batch):
+        stop.set()
+        return len(batch), 0, 0
+
+    with (
+        patch.object(watch, "Inotify", side_effect=OSError("not available")),
+        patch.object(watch, "import_batch", side_effect=import_batch) as mock,
+    ):
+        watch.Watcher(str(tmp_path)).run(stop)
+
+    assert mock.call_args.args[0] == ((str(tmp_path / FILE_NAME), "pdb_00001abc", 1),)
@@ -1,4 +1,6 @@
-from app.fetch import load
+from app.fetch import backfill, ingest, load, local, reconcile, watch
+from app.database.database import db_context
+from app.services import FileService
 import argparse
 
 
@@ -16,6 +18,23 @@ def non_negative_int(value: int) -> int:
     return value
 
 
+def shard(value: str) -> tuple[int, int]:
+    """Parses shard given as 'i/N' into zero based index and total.
+
+    Args:
+        value: argument to parse
+    Returns:
+        tuple of shard index and total number of shards
+    """
+    try:
+        index, total = (int(x) for x in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("Shard must be given as 'i/N'.")
+    if not 1 <= index <= total:
+        raise argparse.ArgumentTypeError("Shard index must be between 1 and N.")
+    return index - 1, total
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Run the load function with a start value"
@@ -27,9 +46,142 @@ if __name__ == "__main__":
         required=False,
         default=None,
         type=non_negative_int,
-        help="Starting ID",
+        help="Starting ID, starts a new run instead of resuming unfinished one",
+    )
+
+    parser.add_argument(
+        "-r",
+        "--restart",
+        action="store_true",
+        help="Start a new run even if an unfinished one exists",
+    )
+
+    parser.add_argument(
+        "--run-id",
+        default=None,
+        type=non_negative_int,
+        help="Process the existing load run with given ID, e.g. from --prepare",
+    )
+
+    parser.add_argument(
+        "--prepare",
+        action="store_true",
+        help="Only create (or resume) the load run and log its ID for shards "
+        "started with --run-id",
+    )
+
+    parser.add_argument(
+        "--enqueue",
+        action="store_true",
+        help="Only resolve versions and queue entries (and failed fetches) for "
+        "ingest workers",
+    )
+
+    parser.add_argument(
+        "--drain",
+        action="store_true",
+        help="Run ingest workers processing the queue until it is empty, "
+        "may run on any number of nodes",
+    )
+
+    parser.add_argument(
+        "--reconcile",
+        action="store_true",
+        help="Only compare stored entries with upstream holdings and fetch the "
+        "missing, stale and obsolete ones",
+    )
+
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="Only download historical versions of stored entries which are missing",
+    )
+
+    parser.add_argument(
+        "--move-to-store",
+        action="store_true",
+        help="Only move contents kept in file records to the configured file store "
+        "or, without one, deduplicate them into the file content table",
+    )
+
+    parser.add_argument(
+        "--compact-versions",
+        action="store_true",
+        help="Only keep older versions of files stored in database as deltas "
+        "against their next version",
+    )
+
+    parser.add_argument(
+        "--from-dir",
+        default=None,
+        metavar="PATH",
+        help="Import all versions from a local wwPDB versioned archive tree "
+        "instead of downloading them",
+    )
+
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="With --from-dir, keep watching the tree and store new files as "
+        "they appear",
+    )
+
+    group = parser.add_mutually_exclusive_group()
+
+    group.add_argument(
+        "-p",
+        "--processes",
+        default=None,
+        type=non_negative_int,
+        help="Number of worker processes to split the load between "
+        "(defaults to 1, or number of CPUs with --from-dir)",
+    )
+
+    group.add_argument(
+        "--shard",
+        default=None,
+        type=shard,
+        help="Process only i-th of N shards of the load, e.g. '2/4'",
     )
 
     args = parser.parse_args()
 
-    load.run(start=args.start)
+    if args.watch and not args.from_dir:
+        parser.error("--watch requires --from-dir")
+
+    if (args.start is not None or args.restart) and (args.shard or args.run_id):
+        parser.error(
+            "--start and --restart create a new run, which --shard and --run-id "
+            "can't do, create it with --prepare first"
+        )
+
+    if args.watch:
+        watch.run(args.from_dir)
+    elif args.from_dir:
+        local.run(args.from_dir, processes=args.processes)
+    elif args.drain:
+        ingest.run(processes=args.processes or 1)
+    elif args.move_to_store:
+        with db_context() as session:
+            FileService(session).move_to_store()
+    elif args.compact_versions:
+        with db_context() as session:
+            FileService(session).compact_versions()
+    elif args.backfill:
+        backfill.run()
+    elif args.reconcile:
+        reconcile.run()
+    elif args.prepare:
+        load.prepare(start=args.start, restart=args.restart)
+    else:
+        if args.enqueue:
+            ingest.enqueue_failed()
+
+        load.run(
+            start=args.start,
+            restart=args.restart,
+            processes=args.processes or 1,
+            shard=args.shard,
+            enqueue=args.enqueue,
+            run_id=args.run_id,
+        )
@@ -0,0 +1,4 @@
+from app.fetch import scheduler
+
+if __name__ == "__main__":
+    scheduler.run()